@@ -0,0 +1,449 @@
+import argparse
+import importlib
+import json
+import platform
+import random
+import statistics
+import string
+import sys
+import time
+
+from ciphers import (decrypt_affine, decrypt_beaufort, decrypt_caesar, decrypt_mono, decrypt_vigenere, encrypt_affine,
+                     encrypt_beaufort, encrypt_caesar, encrypt_mono, encrypt_vigenere)
+
+# "break" is a keyword, so the breaker module cannot be imported with an import statement
+breaker = importlib.import_module("break")
+
+BENCHMARK_VERSION = 1
+BENCHMARK_FILE = 'benchmark.json'
+CORPUS_SIZES = "1K,64K,1M,16M,100M"
+BREAK_LENGTHS = "400,1000,4000"
+BREAK_CIPHERS = ("caesar", "affine", "mono", "vigenere", "beaufort")
+# lengths of the random Vigenère and Beaufort key words
+KEY_WORD_LENGTHS = (3, 12)
+SIZE_SUFFIXES = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+# a sentence of the synthetic corpus ends after this many words on average
+SENTENCE_WORDS = 12
+# shortest timed run of the encryption benchmark, repeating the call on small corpora
+MIN_RUN_SECONDS = 0.05
+# relative slowdown tolerated by "compare" before a result counts as a regression
+TOLERANCE = 0.15
+AFFINE_MULTIPLIERS = [a for a in range(1, 26) if breaker.coprime_with_26(a)]
+
+
+def parse_size(text):
+    """
+    Parses a size such as "512", "64K" or "100M".
+
+    Args:
+        text (str): The size, optionally followed by K, M or G (powers of 1024).
+
+    Returns:
+        int: The size in bytes.
+
+    Raises:
+        ValueError: If the text is not a positive size.
+    """
+    text = text.strip().upper()
+    multiplier = SIZE_SUFFIXES.get(text[-1:], 1)
+    size = int(text[:-1] if text[-1:] in SIZE_SUFFIXES else text) * multiplier
+    if size <= 0:
+        raise ValueError(f"size must be positive: {text}")
+    return size
+
+
+def parse_list(text, convert):
+    """
+    Parses a comma separated argument.
+
+    Args:
+        text (str): The argument.
+        convert (callable): Function converting one item.
+
+    Returns:
+        list: The converted items.
+    """
+    try:
+        return [convert(item) for item in text.split(",") if item.strip()]
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error)) from error
+
+
+def synthetic_corpus(words, size, rng):
+    """
+    Generates English-like plaintext by drawing dictionary words at random.
+
+    The words are drawn uniformly, so the text follows the same letter and quadgram
+    statistics as the score table built from the dictionary. They are grouped into
+    capitalized sentences with punctuation and line breaks, like ordinary prose.
+
+    Args:
+        words (list): The dictionary words to draw from.
+        size (int): Number of characters of the corpus.
+        rng (random.Random): The random number generator.
+
+    Returns:
+        str: The corpus, exactly `size` characters long.
+    """
+    parts = []
+    length = 0
+    while length < size:
+        sentence = rng.choices(words, k=rng.randint(SENTENCE_WORDS // 2, SENTENCE_WORDS * 3 // 2))
+        sentence[0] = sentence[0].capitalize()
+        text = " ".join(sentence) + rng.choice((". ", ". ", ", ", "!\n", ".\n"))
+        parts.append(text)
+        length += len(text)
+    return "".join(parts)[:size]
+
+
+def random_keys(rng):
+    """
+    Draws a random key for every cipher.
+
+    Args:
+        rng (random.Random): The random number generator.
+
+    Returns:
+        dict: The Caesar shift, the Affine (a, b) pair, the Monoalphabetic key alphabet
+        and the Vigenère and Beaufort key words.
+    """
+    alphabet = list(string.ascii_uppercase)
+    rng.shuffle(alphabet)
+    return {"caesar": rng.randrange(1, 26), "affine": (rng.choice(AFFINE_MULTIPLIERS), rng.randrange(26)),
+            "mono": "".join(alphabet),
+            "vigenere": "".join(rng.choices(string.ascii_uppercase, k=rng.randint(*KEY_WORD_LENGTHS))),
+            "beaufort": "".join(rng.choices(string.ascii_uppercase, k=rng.randint(*KEY_WORD_LENGTHS)))}
+
+
+def encryption_paths(keys):
+    """
+    Lists the encryption and decryption functions to time, with their keys applied.
+
+    Args:
+        keys (dict): The keys drawn by `random_keys`.
+
+    Returns:
+        list: (name, function) pairs; each function takes the text only.
+    """
+    a, b = keys["affine"]
+    return [
+        ("encrypt_caesar", lambda text: encrypt_caesar(text, keys["caesar"])),
+        ("decrypt_caesar", lambda text: decrypt_caesar(text, keys["caesar"])),
+        ("encrypt_affine", lambda text: encrypt_affine(text, a, b)),
+        ("decrypt_affine", lambda text: decrypt_affine(text, a, b)),
+        ("encrypt_mono", lambda text: encrypt_mono(text, keys["mono"])),
+        ("decrypt_mono", lambda text: decrypt_mono(text, keys["mono"])),
+        ("encrypt_vigenere", lambda text: encrypt_vigenere(text, keys["vigenere"])),
+        ("decrypt_vigenere", lambda text: decrypt_vigenere(text, keys["vigenere"])),
+        ("encrypt_beaufort", lambda text: encrypt_beaufort(text, keys["beaufort"])),
+        ("decrypt_beaufort", lambda text: decrypt_beaufort(text, keys["beaufort"])),
+    ]
+
+
+def best_time(function, argument, repeat):
+    """
+    Times a function, keeping the fastest of several runs.
+
+    A run calls the function as many times as it takes to fill `MIN_RUN_SECONDS`, so
+    small inputs are not lost in the timer's resolution.
+
+    Args:
+        function (callable): The function to time.
+        argument: Its argument.
+        repeat (int): Number of runs.
+
+    Returns:
+        float: Seconds per call of the fastest run.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            function(argument)
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= MIN_RUN_SECONDS:
+                break
+        best = min(best, elapsed / calls)
+    return best
+
+
+def benchmark_encryption(words, sizes, seed, repeat=3):
+    """
+    Measures the throughput of every encryption and decryption function.
+
+    Args:
+        words (list): The dictionary words the corpora are drawn from.
+        sizes (list): Corpus sizes in characters.
+        seed (int): Seed of the corpora and keys.
+        repeat (int, optional): Runs per measurement; the fastest is kept.
+
+    Returns:
+        list: One record per function and size: function, size, seconds and chars/s.
+    """
+    records = []
+    for size in sizes:
+        rng = random.Random(f"{seed}:{size}")
+        corpus = synthetic_corpus(words, size, rng)
+        for name, function in encryption_paths(random_keys(rng)):
+            seconds = best_time(function, corpus, repeat)
+            records.append({"function": name, "size": size, "seconds": round(seconds, 6),
+                            "chars_per_second": round(size / seconds) if seconds else None})
+    return records
+
+
+def break_once(cipher, ciphertext, model, search_options):
+    """
+    Breaks a ciphertext with one cipher's attack.
+
+    Args:
+        cipher (str): One of `BREAK_CIPHERS`.
+        ciphertext (str): The text to be decrypted.
+        model (LanguageModel): The language model.
+        search_options (dict): Keyword arguments of `find_key`.
+
+    Returns:
+        tuple: The decrypted text (or None), plus the restarts and score evaluations of
+        the key search (0 for the other attacks).
+    """
+    if cipher == "caesar":
+        ranked = breaker.rank_caesar_shifts(ciphertext, model)
+        return (encrypt_caesar(ciphertext, ranked[0][0]) if ranked else None), 0, 0
+    if cipher == "affine":
+        ranked = breaker.rank_affine_keys(ciphertext, model)
+        return (breaker.decrypt_affine_with_keys(ciphertext, *ranked[0][0]) if ranked else None), 0, 0
+    if cipher in breaker.POLYALPHABETIC_MULTIPLIERS:
+        broken = breaker.break_polyalphabetic(ciphertext, cipher, model)
+        return (broken[1] if broken else None), 0, 0
+    progress = []
+    key = breaker.find_key(ciphertext, model.alphabet, model.ngrams, on_progress=progress.append,
+                           **search_options)
+    plaintext = breaker.break_mono(ciphertext, breaker.key_mapping(model.alphabet, key))
+    last = progress[-1] if progress else breaker.SearchProgress(0, 0, 0.0, 0)
+    return plaintext, last.restarts, last.evaluations
+
+
+def benchmark_breaking(model, lengths, seed, trials=3, ciphers=BREAK_CIPHERS, inits=("random",),
+                       search="hillclimb", time_limit=None):
+    """
+    Measures time-to-key, score evaluations and success rate of the attacks.
+
+    Every trial breaks a fresh stretch of synthetic text encrypted with a fresh random
+    key. A trial succeeds when the decryption matches the plaintext letter for letter.
+
+    Args:
+        model (LanguageModel): The language model.
+        lengths (list): Ciphertext lengths in characters.
+        seed (int): Seed of the texts, keys and key searches.
+        trials (int, optional): Ciphertexts broken per cipher and length.
+        ciphers (tuple, optional): The attacks to measure.
+        inits (tuple, optional): Start modes of the monoalphabetic key search to compare.
+        search (str, optional): Strategy of the monoalphabetic key search.
+        time_limit (float, optional): Seconds each key search may run.
+
+    Returns:
+        list: One record per cipher, length and start mode, with the mean and median
+        seconds, mean restarts and evaluations, and the success rate. When both start
+        modes run, the frequency record adds `restarts_saved`, the fraction of the random
+        start's restarts that the frequency start did not need.
+    """
+    words = sorted(model.words)
+    records = []
+    for cipher in ciphers:
+        for length in lengths:
+            mean_restarts = {}
+            for init in (inits if cipher == "mono" else (None,)):
+                seconds, restarts, evaluations, successes = [], [], [], 0
+                for trial in range(trials):
+                    rng = random.Random(f"{seed}:{length}:{trial}")
+                    plaintext = synthetic_corpus(words, length, rng)
+                    keys = random_keys(rng)
+                    ciphertext = dict(encryption_paths(keys))[f"encrypt_{cipher}"](plaintext)
+                    search_options = {"seed": seed + trial, "search": search, "init": init}
+                    if time_limit:
+                        search_options["deadline"] = time.monotonic() + time_limit
+                    start = time.perf_counter()
+                    decrypted, used_restarts, used_evaluations = break_once(cipher, ciphertext, model, search_options)
+                    seconds.append(time.perf_counter() - start)
+                    restarts.append(used_restarts)
+                    evaluations.append(used_evaluations)
+                    successes += decrypted is not None and decrypted.lower() == plaintext.lower()
+                record = {"cipher": cipher, "length": length, "trials": trials,
+                          "seconds": round(statistics.mean(seconds), 6),
+                          "median_seconds": round(statistics.median(seconds), 6),
+                          "success_rate": round(successes / trials, 4)}
+                if cipher == "mono":
+                    mean_restarts[init] = statistics.mean(restarts)
+                    record.update(init=init, search=search, restarts=round(mean_restarts[init], 2),
+                                  evaluations=round(statistics.mean(evaluations)))
+                    if init == "frequency" and mean_restarts.get("random"):
+                        record["restarts_saved"] = round(1 - mean_restarts[init] / mean_restarts["random"], 4)
+                records.append(record)
+    return records
+
+
+def run_benchmarks(model, sizes, lengths, seed=0, repeat=3, trials=3, ciphers=BREAK_CIPHERS, inits=("random",),
+                   search="hillclimb", time_limit=None):
+    """
+    Runs the encryption and breaking benchmarks.
+
+    Args:
+        model (LanguageModel): The language model.
+        sizes (list): Corpus sizes of the encryption benchmark.
+        lengths (list): Ciphertext lengths of the breaking benchmark.
+        seed (int, optional): Seed of every corpus, key and search.
+        repeat (int, optional): Runs per encryption measurement.
+        trials (int, optional): Ciphertexts broken per cipher and length.
+        ciphers (tuple, optional): The attacks to measure.
+        inits (tuple, optional): Start modes of the monoalphabetic key search.
+        search (str, optional): Strategy of the monoalphabetic key search.
+        time_limit (float, optional): Seconds each key search may run.
+
+    Returns:
+        dict: The results, with the environment they were measured in.
+    """
+    words = sorted(model.words)
+    return {
+        "version": BENCHMARK_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": breaker.np is not None,
+        "seed": seed,
+        "encryption": benchmark_encryption(words, sizes, seed, repeat),
+        "breaking": benchmark_breaking(model, lengths, seed, trials, ciphers, inits, search, time_limit),
+    }
+
+
+def compare_results(baseline, current, tolerance=TOLERANCE):
+    """
+    Finds the measurements of a run that are worse than in a baseline run.
+
+    Encryption regresses when its chars/s drop by more than the tolerance. Breaking
+    regresses when its mean time grows by more than the tolerance or its success rate
+    drops, and the frequency start when the fraction of restarts it saves drops by more
+    than the tolerance. Measurements missing from either run are skipped.
+
+    Args:
+        baseline (dict): Results of `run_benchmarks` to compare against.
+        current (dict): Results of `run_benchmarks` to check.
+        tolerance (float, optional): Relative change tolerated, e.g. 0.15 for 15%.
+
+    Returns:
+        list: A description of each regression.
+    """
+    regressions = []
+    before = {(record["function"], record["size"]): record for record in baseline.get("encryption", [])}
+    for record in current.get("encryption", []):
+        old = before.get((record["function"], record["size"]))
+        if old and old["chars_per_second"] and record["chars_per_second"] is not None \
+                and record["chars_per_second"] < old["chars_per_second"] * (1 - tolerance):
+            regressions.append(f"{record['function']} at {record['size']} chars: "
+                               f"{old['chars_per_second']:,} -> {record['chars_per_second']:,} chars/s")
+
+    def break_id(record):
+        return record["cipher"], record["length"], record.get("init"), record.get("search")
+
+    before = {break_id(record): record for record in baseline.get("breaking", [])}
+    for record in current.get("breaking", []):
+        old = before.get(break_id(record))
+        if not old:
+            continue
+        name = " ".join(str(part) for part in break_id(record) if part is not None)
+        if record["seconds"] > old["seconds"] * (1 + tolerance):
+            regressions.append(f"break {name}: {old['seconds']:.3f} -> {record['seconds']:.3f} s")
+        if record["success_rate"] < old["success_rate"]:
+            regressions.append(f"break {name}: success rate {old['success_rate']:.0%} -> {record['success_rate']:.0%}")
+        if "restarts_saved" in record and "restarts_saved" in old \
+                and record["restarts_saved"] < old["restarts_saved"] - tolerance:
+            regressions.append(f"break {name}: restarts saved {old['restarts_saved']:.0%} -> "
+                               f"{record['restarts_saved']:.0%}")
+    return regressions
+
+
+def print_summary(results):
+    """
+    Prints the results as a table.
+
+    Args:
+        results (dict): Results of `run_benchmarks`.
+    """
+    for record in results["encryption"]:
+        print(f"{record['function']:<16}{record['size']:>12,} chars {record['chars_per_second']:>16,} chars/s")
+    for record in results["breaking"]:
+        name = record["cipher"] + (f" ({record['init']})" if record.get("init") else "")
+        line = f"break {name:<18}{record['length']:>6} chars {record['seconds']:>10.3f} s " \
+               f"{record['success_rate']:>6.0%} solved"
+        if "evaluations" in record:
+            line += f" {record['restarts']:>8} restarts {record['evaluations']:>12,} evaluations"
+        if "restarts_saved" in record:
+            line += f" {record['restarts_saved']:>6.0%} restarts saved"
+        print(line)
+
+
+def main():
+    """
+    Runs the benchmarks and writes them to JSON, or compares two JSON results.
+
+    The "run" command encrypts seeded synthetic corpora with random keys and breaks
+    seeded ciphertexts of several lengths. The "compare" command exits with status 1
+    when a result regressed against a baseline, so it can gate a CI job.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the ciphers and the breakers.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument("-d", "--dictionary", default=breaker.DICTIONARY_FILE, help="Dictionary file name/path")
+    run_parser.add_argument("-t", "--table", help="Compiled score table path")
+    run_parser.add_argument("-o", "--output", default=BENCHMARK_FILE, help="JSON results path")
+    run_parser.add_argument("--sizes", type=lambda text: parse_list(text, parse_size), default=CORPUS_SIZES,
+                            help="Comma separated corpus sizes of the encryption benchmark, e.g. 1K,1M,100M")
+    run_parser.add_argument("--lengths", type=lambda text: parse_list(text, parse_size), default=BREAK_LENGTHS,
+                            help="Comma separated ciphertext lengths of the breaking benchmark")
+    run_parser.add_argument("--ciphers", type=lambda text: parse_list(text, str), default=",".join(BREAK_CIPHERS),
+                            help="Comma separated attacks to benchmark")
+    run_parser.add_argument("--inits", type=lambda text: parse_list(text, str), default="random,frequency",
+                            help="Comma separated start modes of the monoalphabetic key search to compare")
+    run_parser.add_argument("--search", choices=breaker.SEARCH_STRATEGIES, default="hillclimb",
+                            help="Monoalphabetic key search strategy")
+    run_parser.add_argument("--seed", type=int, default=0, help="Seed of the corpora, keys and searches")
+    run_parser.add_argument("--repeat", type=int, default=3, help="Runs per encryption measurement")
+    run_parser.add_argument("--trials", type=int, default=3, help="Ciphertexts broken per cipher and length")
+    run_parser.add_argument("--time-limit", type=float, help="Seconds each key search may run")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare results against a baseline")
+    compare_parser.add_argument("baseline", help="JSON results to compare against")
+    compare_parser.add_argument("current", help="JSON results to check")
+    compare_parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                                help="Relative slowdown tolerated, e.g. 0.15 for 15%%")
+
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        with open(args.current, 'r') as f:
+            current = json.load(f)
+        regressions = compare_results(baseline, current, args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions.")
+        return
+
+    if not set(args.ciphers) <= set(BREAK_CIPHERS) or not set(args.inits) <= set(breaker.INIT_MODES):
+        parser.error(f"--ciphers takes {', '.join(BREAK_CIPHERS)} and --inits {', '.join(breaker.INIT_MODES)}")
+    if args.repeat < 1 or args.trials < 1:
+        parser.error("--repeat and --trials must be positive")
+    model = breaker.LanguageModel(args.dictionary, args.table).load()
+    results = run_benchmarks(model, args.sizes, args.lengths, args.seed, args.repeat, args.trials, args.ciphers,
+                             args.inits, args.search, args.time_limit)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print_summary(results)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,169 @@
 import argparse
+import array
+import codecs
+import collections
+import contextlib
+import cProfile
+import functools
+import glob
+import gzip
+import hashlib
+import heapq
+import io
+import json
 import math
+import mmap
+import multiprocessing
+import os
 import random
 import re
+import string
+import struct
+import sys
+import time
+from multiprocessing import shared_memory
+
+from ciphers import (CHUNK_SIZE, TranslationTable, affine_decryption_table, decrypt_beaufort, decrypt_vigenere,
+                     encrypt_caesar)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 
 try_number = 10000
 limitnumber = 3
 
+# upper bound on the number of (candidate, window) pairs the NumPy backend scores at once
+NUMPY_BATCH_ELEMENTS = 1 << 22
+
+SEARCH_STRATEGIES = ("hillclimb", "anneal", "tempering")
+COOLING_SCHEDULES = ("geometric", "linear")
+# the annealing temperatures are multiplied by the number of ciphertext windows per key
+# letter, since score differences between keys grow with the length of the text
+SearchSchedule = collections.namedtuple(
+    "SearchSchedule", ["iterations", "seconds", "start_temperature", "end_temperature", "cooling", "replicas"],
+    defaults=[30000, None, 400.0, 80.0, "geometric", 6])
+# number of swaps between two updates of the temperature and checks of the time budget
+SCHEDULE_UPDATE_INTERVAL = 100
+# a snapshot of a running key search, passed to the progress callback of find_key
+SearchProgress = collections.namedtuple("SearchProgress", ["restarts", "evaluations", "seconds", "best_score"])
+# minimum number of seconds between two progress lines of the command line
+PROGRESS_INTERVAL = 1.0
+# seconds between two progress reports sent from inside a running restart, or while
+# waiting for the restarts of worker processes
+PROGRESS_PULSE_INTERVAL = 0.25
+# number of rounds of swaps between two exchange attempts of the tempering replicas
+TEMPERING_EXCHANGE_INTERVAL = 20
+
+INIT_MODES = ("random", "frequency")
+# with frequency initialization, restarts run in batches that all perturb the best key
+# of the previous batches; a fixed size keeps seeded searches independent of the workers
+PERTURBATION_BATCH = 8
+# number of random swaps applied to the best key to start a perturbed restart
+PERTURBATION_SWAPS = 6
+# letters of the sample the key search runs on for long ciphertexts, and the length of
+# each of its evenly spaced runs
+SAMPLE_SIZE = 5000
+SAMPLE_CHUNK = 500
+# first sample of the growing mode, doubled until the key is stable
+GROWING_SAMPLE_START = 2000
+# a ciphertext letter seen fewer times in the sample is rechecked on the whole text
+SETTLED_LETTER_COUNT = 5
+# share of the sample's score per window the whole text must reach to confirm its key
+SAMPLE_CONFIRMATION_RATIO = 0.8
+
+DICTIONARY_FILE = 'dictionary.txt'
+BATCH_REPORT_FILE = 'break_report.jsonl'
+PROFILE_FILE = 'break.prof'
+# environment variable that switches the run metrics on: "1" or "-" for stderr, else a file path
+STATS_ENV = 'BREAK_STATS'
+# share of dictionary words above which a decryption counts as successful
+VALID_WORD_THRESHOLD = 0.6
+# a run of word characters, apostrophes and hyphens, plus a trailing punctuation mark
+# directly followed by another word; these are the tokens validate_text checks
+VALIDATION_TOKEN = re.compile(r"(\w[\w'-]*(?:[.,!?](?=\w))?)")
+# the characters that continue a token, skipped after a token too long to be a word
+VALIDATION_TOKEN_TAIL = re.compile(r"[\w'-]*")
+REDACTED = "[REDACTED]"
+# n-gram orders a score table can have; windows of shorter n-grams are padded to four
+# characters for the key search
+NGRAM_ORDERS = (2, 3, 4)
+QUADGRAM_ORDER = 4
+SCORE_TABLE_EXTENSIONS = {2: '.bgram', 3: '.tgram', 4: '.qgram'}
+SCORE_TABLE_MAGIC = b'QGRM'
+SCORE_TABLE_VERSION = 3
+# magic, format version, array typecode, n-gram order, entry count, the size, modification
+# time and sha256 of the source dictionary, the length of the UTF-8 alphabet that follows
+# the header and the flags; the scores start at the next multiple of 8 bytes
+SCORE_TABLE_HEADER = struct.Struct('<4sHcBIQq32sHB5x')
+# where the modification time of the source dictionary sits in the header
+SCORE_TABLE_MTIME_OFFSET = struct.calcsize('<4sHcBIQ')
+# flag of tables trained on a corpus, which no dictionary change makes stale
+SCORE_TABLE_TRAINED = 1
+# characters of a corpus file read and counted at a time by `train_score_table`
+TRAIN_CHUNK_SIZE = 1 << 22
+WORD_CACHE_EXTENSION = '.words'
+WORD_CACHE_VERSION = 2
+
 ETAOIN = 'ETAOINSHRDLCUMWFGYPBVKJXQZ'
 LETTERS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
 
 english_alphabet = "abcdefghijklmnopqrstuvwxyz"
 frequency_ordered_alphabet = "etaoinshrdlcumwfgypbvkjxqz"
 
-
-def encrypt_caesar(plaintext, shift):
-    """
-    Encrypts a plaintext using the Caesar cipher with a specified shift.
-
-    Args:
-        plaintext (str): The text to be encrypted.
-        shift (int): The number of positions to shift each letter.
-
-    Returns:
-        str: The encrypted text.
-    """
-    result = ""
-    for char in plaintext:
-        if char.isalpha():
-            shift_base = 65 if char.isupper() else 97
-            result += chr((ord(char) - shift_base - shift) % 26 + shift_base)
-        else:
-            result += char
-    return result
+# relative frequency of each letter of english_alphabet in English text
+ENGLISH_LETTER_FREQUENCIES = [
+    0.08167, 0.01492, 0.02782, 0.04253, 0.12702, 0.02228, 0.02015, 0.06094, 0.06966,
+    0.00153, 0.00772, 0.04025, 0.02406, 0.06749, 0.07507, 0.01929, 0.00095, 0.05987,
+    0.06327, 0.09056, 0.02758, 0.00978, 0.02360, 0.00150, 0.01974, 0.00074,
+]
+# expected frequency of a letter the dictionary never uses, so the chi-squared statistic
+# stays finite and still penalizes decryptions holding it
+MIN_LETTER_FREQUENCY = 0.0001
+# number of ciphertext characters rescored with quadgrams, and how many of the best
+# chi-squared candidates are rescored
+QUADGRAM_CHECK_SAMPLE_SIZE = 2000
+QUADGRAM_CHECK_CANDIDATES = 3
+# index of coincidence of English text and of uniformly random letters; substitution
+# ciphers keep the English value, polyalphabetic ciphers push it towards the random one
+ENGLISH_INDEX_OF_COINCIDENCE = 0.066
+RANDOM_INDEX_OF_COINCIDENCE = 1 / 26
+POLYALPHABETIC_INDEX_OF_COINCIDENCE = 0.05
+# fewest letters for which the index of coincidence is trusted
+INDEX_OF_COINCIDENCE_MIN_LETTERS = 100
+# the best Caesar or Affine key of such a ciphertext has a chi-squared statistic within a
+# few times that of the sorted histogram, while a monoalphabetic one stays 20 or more times
+# above it once it has a few hundred letters
+AFFINE_FIT_RATIO = 8.0
+CipherProfile = collections.namedtuple(
+    "CipherProfile", ["letters", "index_of_coincidence", "shape_statistic", "shift", "shift_statistic",
+                      "affine_key", "affine_statistic", "histogram"])
+# modular inverse of every valid multiplicative Affine key
+AFFINE_INVERSES = {a: pow(a, -1, 26) for a in range(1, 26) if math.gcd(a, 26) == 1}
+# longest key the Vigenère and Beaufort breakers consider, and the fewest letters each key
+# letter must encrypt for its column statistics to mean anything
+MAX_KEY_PERIOD = 30
+KEY_COLUMN_MIN_LETTERS = 10
+# letters of a long ciphertext read to find the key length, and the number of multiples
+# of the longest period over which the coincidences are counted
+KEY_PERIOD_SAMPLE_SIZE = 20000
+KEY_PERIOD_DISTANCES = 4
+# multiples of the key length score as well as the key length, so the smallest periods
+# within this share of the best coincidence rate are the candidates
+KEY_PERIOD_TOLERANCE = 0.9
+KEY_PERIOD_CANDIDATES = 5
+# length of the repeated n-grams of the Kasiski examination
+KASISKI_GRAM_LENGTH = 3
+# key letters per column, ranked by chi-squared, that the quadgram refinement tries, and
+# how many times the best statistic of the column theirs may be
+KEY_COLUMN_CANDIDATES = 4
+KEY_COLUMN_FIT_RATIO = 2.0
+# multiplicative key of each polyalphabetic cipher: a key letter k encrypts x to (a * x + k) % 26
+POLYALPHABETIC_MULTIPLIERS = {"vigenere": 1, "beaufort": 25}
+KeyPeriodAnalysis = collections.namedtuple("KeyPeriodAnalysis", ["candidates", "coincidence", "kasiski"])
 
 
 def map_alphabet(alphabet):
@@ -72,29 +202,35 @@ def map_key_to_alphabet(key, alphabet):
     return key_map
 
 
-def extract_words(dictionary1, alphabet_map):
+def extract_words(dictionary1, alphabet_map, order=QUADGRAM_ORDER):
     """
-    Extracts four-letter sequences from the dictionary, counts their occurrences, and creates an index.
+    Extracts n-letter sequences from the dictionary, counts their occurrences, and creates an index.
+
+    The sequence of letter indices (l1, ..., ln) is counted at the dense index
+    ((l1 * R + l2) * R + ...) * R + ln, R being the length of the alphabet, so the
+    list has exactly R ** n entries.
 
     Args:
         dictionary1 (iterable): The dictionary source.
         alphabet_map (dict): A map of the alphabet.
+        order (int, optional): The length of the sequences. Defaults to 4.
 
     Returns:
         list: A list of word frequencies indexed by computed values.
     """
-    size = 32
-    total_elements = size * size * size * size
-    spells = [0] * total_elements
+    radix = len(alphabet_map)
+    modulus = radix ** (order - 1)
+    spells = [0] * (radix * modulus)
     for line in dictionary1:
-        line = line.strip().lower()
-        if len(line) < 4:
-            continue
-        for i in range(len(line) - 3):
-            spell = line[i:i + 4]
-            if all(char in alphabet_map for char in spell):
-                index1 = (alphabet_map[spell[0]] << 15) + (alphabet_map[spell[1]] << 10) + (
-                            alphabet_map[spell[2]] << 5) + alphabet_map[spell[3]]
+        index1 = run = 0
+        for char in line.strip().lower():
+            letter = alphabet_map.get(char)
+            if letter is None:
+                run = 0
+                continue
+            index1 = index1 % modulus * radix + letter
+            run += 1
+            if run >= order:
                 spells[index1] += 1
     return spells
 
@@ -124,590 +260,3717 @@ def calculate_and_normalize_words(words_avg):
     return words_avg
 
 
-def char_to_number(txt, alphabet):
+class ScoreTableError(ValueError):
     """
-    Converts characters in a string to their corresponding numerical values based on an alphabet.
-
-    Args:
-        txt (str): The text to convert.
-        alphabet (str): The alphabet used for mapping.
-
-    Returns:
-        list: List of numerical values corresponding to characters in the text.
+    A score table cannot be built or used: its dictionary or corpus holds no n-gram of
+    the alphabet, or a table trained on a corpus does not have the alphabet and order
+    asked for.
     """
-    transformmap = {}
-    for char, index in enumerate(alphabet.lower()):
-        transformmap[index] = char
-    result = []
-    for index in txt.lower():
-        if index in transformmap:
-            result.append(transformmap[index])
-    return result
 
 
-def decrypt_bin(key, cipher_bin):
+def score_table_path(dictionary_path, order=QUADGRAM_ORDER, alphabet=english_alphabet):
     """
-    Decrypts a binary cipher using a given key.
+    Returns the default location of the compiled score table for a dictionary.
 
     Args:
-        key (list): The decryption key.
-        cipher_bin (list): The binary representation of the cipher text.
+        dictionary_path (str): Path of the dictionary file.
+        order (int, optional): The n-gram order of the table. Defaults to 4.
+        alphabet (str, optional): The alphabet of the table. Tables of other alphabets
+            than English get a digest of it in their name, so they do not replace
+            each other.
 
     Returns:
-        list: The decrypted binary data.
+        str: Path of the compiled score table next to the dictionary.
     """
-    result = []
-    for i in cipher_bin:
-        result.append(key.index(i))
-    return result
+    base = os.path.splitext(dictionary_path)[0]
+    alphabet = alphabet.lower()
+    if alphabet != english_alphabet:
+        base += '.' + hashlib.sha256(alphabet.encode('utf-8')).hexdigest()[:8]
+    return base + SCORE_TABLE_EXTENSIONS[order]
 
 
-
-def swap_chars(key, index1, index2):
+def dictionary_checksum(dictionary_path):
     """
-    Swaps two characters in the key at the specified indices.
+    Computes the SHA-256 digest of a dictionary file.
 
     Args:
-        key (list): The key list where characters will be swapped.
-        index1 (int): The index of the first character to swap.
-        index2 (int): The index of the second character to swap.
-    """
-    key[index1], key[index2] = key[index2], key[index1]
+        dictionary_path (str): Path of the dictionary file.
 
-def update_plaintext_indices(plaintext, char_positions, char1, index2):
+    Returns:
+        bytes: The raw 32-byte digest.
     """
-    Updates the indices of a character in the plaintext.
+    digest = hashlib.sha256()
+    with open(dictionary_path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.digest()
 
-    Args:
-        plaintext (list): The plaintext list to update.
-        char_positions (list): The positions of characters in the plaintext.
-        char1 (int): The character to update.
-        index2 (int): The new index for the character.
-    """
-    for i in char_positions[char1]:
-        plaintext[i] = index2
 
-def compute_index(fourthword, char):
+def dictionary_signature(dictionary_path):
     """
-    Computes an index based on the fourth word and a character.
+    Describes the current state of a dictionary file for the caches built from it.
 
     Args:
-        fourthword (int): The fourth word value.
-        char (int): The character value.
+        dictionary_path (str): Path of the dictionary file.
 
     Returns:
-        int: The computed index.
+        tuple: The file size, its modification time in nanoseconds and its checksum.
     """
-    limitedwords = fourthword % (2 ** 15)
-    shiftedword = limitedwords * 32
-    result = shiftedword + char
-    return result
-
-def fitness_score(plaintext, words):
-    """
-    Calculates the fitness score of the plaintext based on word frequencies.
+    stat = os.stat(dictionary_path)
+    return stat.st_size, stat.st_mtime_ns, dictionary_checksum(dictionary_path)
 
-    Args:
-        plaintext (list): The plaintext list.
-        words (list): The list of word frequencies.
 
-    Returns:
-        int: The fitness score.
+def cache_is_current(dictionary_path, size, mtime_ns, checksum, refresh=None):
     """
-    score = 0
-    word_index = (plaintext[0] << 10) + (plaintext[1] << 5) + plaintext[2]
-    for char in plaintext[3:]:
-        word_index = compute_index(word_index, char)
-        score += words[word_index]
-    return score
+    Checks whether a cache built from a dictionary still matches it.
 
-def restore_plaintext(plaintext, char_positions, char, index):
-    """
-    Restores the plaintext indices for a character.
+    The size and modification time are compared first; the checksum is only computed
+    when they differ, so a touched but unchanged dictionary keeps its caches. The new
+    modification time is then handed to `refresh` to record in the cache, so the next
+    run does not hash the dictionary again.
 
     Args:
-        plaintext (list): The plaintext list to update.
-        char_positions (list): The positions of characters in the plaintext.
-        char (int): The character to restore.
-        index (int): The index to restore the character to.
+        dictionary_path (str): Path of the dictionary file.
+        size (int): Dictionary size recorded in the cache.
+        mtime_ns (int): Dictionary modification time recorded in the cache.
+        checksum (bytes): Dictionary checksum recorded in the cache.
+        refresh (callable, optional): Records a new modification time in the cache.
+            A cache that cannot be written is still used.
+
+    Returns:
+        bool: True if the cache can be used.
     """
-    update_plaintext_indices(plaintext, char_positions, char, index)
+    try:
+        stat = os.stat(dictionary_path)
+    except OSError:
+        return False
+    if (stat.st_size, stat.st_mtime_ns) == (size, mtime_ns):
+        return True
+    if stat.st_size != size or dictionary_checksum(dictionary_path) != checksum:
+        return False
+    if refresh is not None:
+        try:
+            refresh(stat.st_mtime_ns)
+        except OSError:
+            pass
+    return True
 
 
-def attempt_key_swap(key, i1, i2, plaintext, char_positions, spells):
+def score_table_offset(alphabet_bytes):
     """
-    Attempts to swap two characters in the key and evaluates the fitness score.
+    Computes where the scores of a table file start.
 
     Args:
-        key (list): The key list where characters will be swapped.
-        i1 (int): The index of the first character to swap.
-        i2 (int): The index of the second character to swap.
-        plaintext (list): The plaintext list to update.
-        char_positions (list): The positions of characters in the plaintext.
-        spells (list): The list of word frequencies.
+        alphabet_bytes (int): Length of the UTF-8 alphabet following the header.
 
     Returns:
-        tuple: The temporary matches, first character, and second character.
+        int: The offset of the scores, a multiple of 8 bytes.
     """
-    char1, char2 = key[i1], key[i2]
-    update_plaintext_indices(plaintext, char_positions, char1, i2)
-    update_plaintext_indices(plaintext, char_positions, char2, i1)
-    tempmatches = fitness_score(plaintext, spells)
-    return tempmatches, char1, char2
+    return (SCORE_TABLE_HEADER.size + alphabet_bytes + 7) // 8 * 8
 
-def evaluate_key(temp_matches, max_matches):
+
+def write_score_table(table_path, spells, alphabet, order, signature, flags=0):
     """
-    Evaluates if the temporary matches are greater than the maximum matches.
+    Writes normalized n-gram scores to a binary score table file.
+
+    The file holds a fixed header (magic, version, typecode, n-gram order, entry count,
+    the signature of the source, the length of the alphabet and the flags), the alphabet
+    and the raw table values, so it can be memory-mapped by `read_score_table` without
+    any parsing. It is written to a temporary file first and then moved into place.
 
     Args:
-        temp_matches (int): The temporary matches score.
-        max_matches (int): The maximum matches score.
+        table_path (str): Output path.
+        spells (list): The normalized scores, `len(alphabet) ** order` of them.
+        alphabet (str): The alphabet of the n-grams.
+        order (int): The n-gram order.
+        signature (tuple): The size, modification time and checksum of the source.
+        flags (int, optional): `SCORE_TABLE_TRAINED` for a table trained on a corpus.
 
     Returns:
-        bool: True if temp_matches is greater than max_matches, False otherwise.
+        str: The path of the written table.
     """
-    return temp_matches > max_matches
+    typecode = 'h' if -2 ** 15 <= min(spells) and max(spells) < 2 ** 15 else 'i'
+    table = array.array(typecode, spells)
+    encoded = alphabet.encode('utf-8')
+    header = SCORE_TABLE_HEADER.pack(SCORE_TABLE_MAGIC, SCORE_TABLE_VERSION, typecode.encode(), order,
+                                     len(table), *signature, len(encoded), flags)
+    temp_path = f'{table_path}.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as file:
+        file.write(header)
+        file.write(encoded.ljust(score_table_offset(len(encoded)) - len(header), b'\0'))
+        table.tofile(file)
+    os.replace(temp_path, table_path)
+    return table_path
 
-def key_swap_and_evaluation(key, i, i1, plaintext, char_positions, fourwords, max_score):
+
+def write_score_table_mtime(table_path, mtime_ns):
     """
-    Swaps characters in the key and evaluates the new key.
+    Records a new modification time of the source dictionary in a score table header.
 
     Args:
-        key (list): The key list where characters will be swapped.
-        i (int): The index of the first character to swap.
-        i1 (int): The index of the second character to swap.
-        plaintext (list): The plaintext list to update.
-        char_positions (list): The positions of characters in the plaintext.
-        fourwords (list): The list of word frequencies.
-        max_score (int): The maximum score.
-
-    Returns:
-        tuple: The maximum score and a boolean indicating if a better key was found.
+        table_path (str): Path of the compiled table.
+        mtime_ns (int): The modification time in nanoseconds.
     """
-    temp_matches, char, char1 = attempt_key_swap(key, i, i1, plaintext, char_positions, fourwords)
-    if evaluate_key(temp_matches, max_score):
-        swap_chars(key, i, i1)
-        return temp_matches, True
-    else:
-        restore_plaintext(plaintext, char_positions, char, i)
-        restore_plaintext(plaintext, char_positions, char1, i1)
-        return max_score, False
+    with open(table_path, 'r+b') as file:
+        file.seek(SCORE_TABLE_MTIME_OFFSET)
+        file.write(struct.pack('<q', mtime_ns))
+
 
-def frequency_analysis(key, cipher_bin, char_positions, words, alphabet_len, max_try=0):
+def compile_score_table(dictionary_path=DICTIONARY_FILE, table_path=None, alphabet=english_alphabet,
+                        order=QUADGRAM_ORDER):
     """
-    Performs frequency analysis to find the best key for decryption.
+    Builds the normalized n-gram score table of a dictionary and writes it to a binary file.
 
     Args:
-        key (list): The key list to analyze.
-        cipher_bin (list): The binary representation of the cipher text.
-        char_positions (list): The positions of characters in the plaintext.
-        words (list): The list of word frequencies.
-        alphabet_len (int): The length of the alphabet.
-        max_try (int, optional): The maximum number of tries. Defaults to 0.
+        dictionary_path (str): Path of the dictionary file.
+        table_path (str, optional): Output path. Defaults to the dictionary path with
+            the extension of the order, `.qgram` for quadgrams.
+        alphabet (str, optional): The alphabet of the n-grams. Defaults to English.
+        order (int, optional): The n-gram order, one of `NGRAM_ORDERS`. Defaults to 4.
 
     Returns:
-        int: The maximum score found.
+        str: The path of the written table.
+
+    Raises:
+        ScoreTableError: If no n-gram of the dictionary is made of the alphabet.
     """
-    plaintext = decrypt_bin(key, cipher_bin)
-    found1 = False
-    for i in range(alphabet_len - 1):
-        for j in range(i + 1, alphabet_len):
-            max_try, found_best_key = key_swap_and_evaluation(key, i, j, plaintext, char_positions, words, max_try)
-            if found_best_key:
-                found1 = True
-                break
-    if found1:
-        return frequency_analysis(key, cipher_bin, char_positions, words, alphabet_len, max_try)
-    return max_try
+    table_path = table_path or score_table_path(dictionary_path, order, alphabet)
+    signature = dictionary_signature(dictionary_path)
+    dictionary = load_dictionary(dictionary_path)
+    with stats_phase("extract_words"):
+        spells = extract_words(dictionary, map_alphabet(alphabet.lower()), order)
+    if not any(spells):
+        raise ScoreTableError(f"{dictionary_path} holds no {order}-letter sequence of the alphabet {alphabet!r}")
+    with stats_phase("calculate_and_normalize_words"):
+        spells = calculate_and_normalize_words(spells)
+    return write_score_table(table_path, spells, alphabet.lower(), order, signature)
+
 
-def find_key(ciphertext, alphabet, words):
+def read_score_table(table_path, dictionary_path=None, alphabet=None, order=None):
     """
-    Finds the decryption key for the given ciphertext.
+    Memory-maps a compiled score table.
 
     Args:
-        ciphertext (str): The ciphertext to decrypt.
-        alphabet (str): The alphabet used for the cipher.
-        words (list): The list of word frequencies.
+        table_path (str): Path of the compiled table.
+        dictionary_path (str, optional): The dictionary the table must have been built
+            from. When given, a table built from another version of it is rejected.
+        alphabet (str, optional): The alphabet the table must have, if any.
+        order (int, optional): The n-gram order the table must have, if any.
 
     Returns:
-        str: The decryption key.
-    """
-    cipher_bin = char_to_number(ciphertext, alphabet)
-    num_chars = len(alphabet)
-    char_positions = []
-    for i in range(num_chars):
-        char_positions.append([])
-    for i, j in enumerate(cipher_bin):
-        char_positions[j].append(i)
-    key_len = len(alphabet)
-    curren_max, current_max_shot = 0, 1
-    key = list(range(key_len))
-    final_key = key.copy()
-    for i in range(try_number):
-        random.shuffle(key)
-        result = frequency_analysis(key, cipher_bin, char_positions, words, key_len)
-        if result > curren_max:
-            curren_max = result
-            current_max_shot = 1
-            final_key = key.copy()
-        elif result == curren_max:
-            current_max_shot += 1
-            if current_max_shot == limitnumber:
-                break
-    result = ""
-    for a in final_key:
-        result += alphabet[a]
-    return result
+        NgramTable: The read-only table, or None if the file is missing, stale, of
+        another alphabet or order, or was written by an incompatible version. Tables
+        trained on a corpus are never stale.
+    """
+    try:
+        with open(table_path, 'rb') as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if len(mapped) < SCORE_TABLE_HEADER.size:
+        return None
+    magic, version, typecode, table_order, count, size, mtime_ns, checksum, alphabet_bytes, flags = \
+        SCORE_TABLE_HEADER.unpack_from(mapped)
+    if magic != SCORE_TABLE_MAGIC or version != SCORE_TABLE_VERSION or table_order not in NGRAM_ORDERS:
+        return None
+    try:
+        table_alphabet = bytes(mapped[SCORE_TABLE_HEADER.size:SCORE_TABLE_HEADER.size + alphabet_bytes]).decode('utf-8')
+    except UnicodeDecodeError:
+        return None
+    if (alphabet is not None and table_alphabet != alphabet.lower()) or (order is not None and table_order != order):
+        return None
+    trained = bool(flags & SCORE_TABLE_TRAINED)
+    if dictionary_path is not None and not trained and not cache_is_current(
+            dictionary_path, size, mtime_ns, checksum, lambda current: write_score_table_mtime(table_path, current)):
+        return None
+    scores = memoryview(mapped)[score_table_offset(alphabet_bytes):].cast(typecode.decode())
+    if len(scores) != count or count != len(table_alphabet) ** table_order:
+        return None
+    return NgramTable(scores, table_alphabet, table_order, trained)
 
-def key_mapping(decryption_key, alphabet):
+
+def load_score_table(dictionary_path=DICTIONARY_FILE, table_path=None, alphabet=None, order=None):
     """
-    Maps the decryption key to the alphabet.
+    Loads an n-gram score table, compiling it first if it is missing or stale.
 
     Args:
-        decryption_key (str): The decryption key.
-        alphabet (str): The alphabet used for the cipher.
+        dictionary_path (str): Path of the dictionary file.
+        table_path (str, optional): Path of the compiled table. Defaults to the
+            dictionary path with the extension of the order.
+        alphabet (str, optional): The alphabet the table must have. Any alphabet is
+            accepted if not given, and English is compiled.
+        order (int, optional): The n-gram order the table must have. Any order is
+            accepted if not given, and quadgrams are compiled.
 
     Returns:
-        dict: A dictionary mapping each character in the alphabet to the decryption key.
+        NgramTable: The normalized n-gram scores.
 
     Raises:
-        ValueError: If the decryption key length does not match the alphabet length.
+        ScoreTableError: If the table was trained on a corpus for another alphabet or order,
+            which compiling the dictionary would overwrite.
     """
-    if len(decryption_key) != len(alphabet):
-        raise ValueError("The decryption key and the alphabet must have the same length.")
-    mapping = {}
-    for original_char, mapped_char in zip(alphabet, decryption_key):
-        mapping[original_char] = mapped_char
-    return mapping
+    table_path = table_path or score_table_path(dictionary_path, order or QUADGRAM_ORDER, alphabet or english_alphabet)
+    table = read_score_table(table_path, dictionary_path, alphabet, order)
+    if table is None:
+        existing = read_score_table(table_path)
+        if existing is not None and existing.trained:
+            raise ScoreTableError(f"{table_path} was trained for the alphabet {existing.alphabet!r} and order "
+                                  f"{existing.order}; train another table or pass another --table")
+        compile_score_table(dictionary_path, table_path, alphabet or english_alphabet, order or QUADGRAM_ORDER)
+        table = read_score_table(table_path)
+    return table
 
-def monoalphabetic_decrypt(ciphered_text, find_key1):
+
+def collect_corpus_files(sources):
     """
-    Decrypts the given ciphered text using the Monoalphabetic cipher technique.
+    Expands the sources of a training corpus into file paths.
 
     Args:
-        ciphered_text (str): The text to be decrypted.
-        find_key1 (dict): The key alphabet for the Monoalphabetic cipher.
+        sources (list): File paths, directories (every file below them) or glob patterns.
 
     Returns:
-        str: The decrypted text.
-    """
-    decrypted_text = []
-    for char in ciphered_text:
-        if char.isalpha():
-            if char.isupper():
-                decrypted_text.append(find_key1[char.lower()].upper())
-            else:
-                decrypted_text.append(find_key1[char])
+        list: The file paths, in the order they were given and sorted within directories.
+    """
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            for root, directories, files in os.walk(source):
+                directories.sort()
+                paths.extend(os.path.join(root, name) for name in sorted(files))
+        elif glob.has_magic(source):
+            paths.extend(sorted(glob.glob(source)))
         else:
-            decrypted_text.append(char)
-    return ''.join(decrypted_text)
-
+            paths.append(source)
+    return paths
 
 
-def extract_potential_words(decoded_text):
+def open_corpus_file(path):
     """
-    Extracts potential words from the decoded text.
+    Opens a corpus file as UTF-8 text, decompressing it if its name ends in `.gz`.
 
     Args:
-        decoded_text (str): The decoded text.
+        path (str): Path of the file.
 
     Returns:
-        list: A list of potential words.
+        io.TextIOBase: The open file. Undecodable bytes read as replacement characters.
     """
-    words = re.findall(r'\b[a-zA-Z]+\b', decoded_text)
-    return words
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, 'r', encoding='utf-8', errors='replace')
 
-def load_dictionary():
-    """
-    Loads the dictionary from a file.
 
-    Returns:
-        set: A set of dictionary words.
+def corpus_letters(paths, alphabet, order=QUADGRAM_ORDER, chunk_size=TRAIN_CHUNK_SIZE):
     """
-    with open('dictionary.txt', 'r') as file:
-        dictionary_words = set(word.strip().lower() for word in file)
-    return dictionary_words
+    Streams the letters of a corpus as letter indices, one chunk at a time.
 
-
-def extract_longest_word(text):
-    """
-    Extracts the longest word from the text.
+    Every other character is dropped, as it is from a ciphertext, so the n-grams run
+    across word boundaries. Each chunk starts with the last `order - 1` letters of the
+    chunk before it in the same file, so the n-grams spanning two chunks are counted
+    once; no n-gram spans two files.
 
     Args:
-        text (str): The text to extract the longest word from.
+        paths (list): Paths of the corpus files.
+        alphabet (str): The lowercase alphabet.
+        order (int, optional): The n-gram order. Defaults to 4.
+        chunk_size (int, optional): Characters read at a time.
 
-    Returns:
-        str: The longest word, or None if no word is found.
+    Yields:
+        bytes: The letter indices of the next chunk.
     """
-    words = re.findall(r'\b[a-zA-Z]+\b', text)
-    return max(words, key=len) if words else None
-
+    for path in paths:
+        carried = b''
+        with open_corpus_file(path) as file:
+            for text in iter(lambda: file.read(chunk_size), ''):
+                letters = carried + char_to_number(text, alphabet)
+                if len(letters) >= order:
+                    yield letters
+                carried = letters[-(order - 1):]
 
 
-def decrypt_caesar(ciphertext, dictionary):
+def count_ngram_windows(letters, radix, order=QUADGRAM_ORDER):
     """
-    Decrypts the given ciphertext using the Caesar cipher technique.
+    Counts the n-grams of a chunk of letter indices.
 
     Args:
-        ciphertext (str): The text to be decrypted.
-        dictionary (set): The set of dictionary words.
+        letters (bytes): The letter indices.
+        radix (int): The length of the alphabet.
+        order (int, optional): The n-gram order. Defaults to 4.
 
     Returns:
-        str: The decrypted text, or None if no valid decryption is found.
+        tuple: The dense table index of every distinct n-gram and its count, as two
+        arrays of the same length.
     """
-    dictionary = load_dictionary()
-    first_word = extract_longest_word(ciphertext)
-    if not first_word:
-        print("No valid word found in ciphertext.")
-        return None
+    indices = array.array('q')
+    counts = array.array('q')
+    for window, count in collections.Counter(zip(*(letters[offset:] for offset in range(order)))).items():
+        index = 0
+        for letter in window:
+            index = index * radix + letter
+        indices.append(index)
+        counts.append(count)
+    return indices, counts
 
-    for shift in range(26):
-        decrypted_word = encrypt_caesar(first_word, shift)
-        if decrypted_word.lower() in dictionary:
-            print(f"Shift {shift}: '{decrypted_word}' is a valid word. Decrypting the entire text...")
-            decrypted_text = encrypt_caesar(ciphertext, shift).strip()
-            print(decrypted_text)
-            return decrypted_text
 
-    print("No valid decryption found.")
-    return None
+def train_score_table(sources, table_path, alphabet=english_alphabet, order=QUADGRAM_ORDER, workers=1,
+                      chunk_size=TRAIN_CHUNK_SIZE):
+    """
+    Trains a normalized n-gram score table on a plaintext corpus and writes it to a file.
 
+    The corpus is read one chunk at a time and every chunk is counted on its own, in a
+    pool of worker processes when there are several. The partial counts are merged into
+    one array of `len(alphabet) ** order` totals, and at most two chunks per worker are
+    in flight, so memory stays bounded however large the corpus is. The table is marked
+    as trained: the dictionary checks of later runs accept it as it is.
 
+    Args:
+        sources (list): Corpus files, directories or glob patterns; `.gz` files are
+            decompressed while they are read.
+        table_path (str): Output path.
+        alphabet (str, optional): The alphabet of the n-grams. Defaults to English.
+        order (int, optional): The n-gram order, one of `NGRAM_ORDERS`. Defaults to 4.
+        workers (int, optional): Number of processes counting chunks. Defaults to 1.
+        chunk_size (int, optional): Characters read and counted at a time.
 
+    Returns:
+        str: The path of the written table.
 
+    Raises:
+        ScoreTableError: If the corpus holds no file or no n-gram of the alphabet.
+    """
+    paths = collect_corpus_files(sources)
+    if not paths:
+        raise ScoreTableError("the corpus holds no file")
+    alphabet = alphabet.lower()
+    radix = len(alphabet)
+    totals = array.array('q', bytes(8 * radix ** order))
+
+    def merge(counted):
+        for index, count in zip(*counted):
+            totals[index] += count
+
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+    pending = collections.deque()
+    try:
+        with stats_phase("count_ngrams"):
+            for letters in corpus_letters(paths, alphabet, order, chunk_size):
+                if pool is None:
+                    merge(count_ngram_windows(letters, radix, order))
+                    continue
+                pending.append(pool.apply_async(count_ngram_windows, (letters, radix, order)))
+                if len(pending) >= 2 * workers:
+                    merge(pending.popleft().get())
+            while pending:
+                merge(pending.popleft().get())
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+    if not any(totals):
+        raise ScoreTableError(f"the corpus holds no {order}-letter sequence of the alphabet {alphabet!r}")
+    # the signature records the corpus size, its newest file and a digest of the counts
+    stats = [os.stat(path) for path in paths]
+    signature = (sum(stat.st_size for stat in stats), max(stat.st_mtime_ns for stat in stats),
+                 hashlib.sha256(totals).digest())
+    with stats_phase("calculate_and_normalize_words"):
+        spells = calculate_and_normalize_words(totals.tolist())
+    return write_score_table(table_path, spells, alphabet, order, signature, SCORE_TABLE_TRAINED)
+
+
+def word_cache_path(dictionary_path):
+    """
+    Returns the location of the parsed-dictionary cache for a dictionary.
 
+    Args:
+        dictionary_path (str): Path of the dictionary file.
 
+    Returns:
+        str: Path of the cache next to the dictionary.
+    """
+    return os.path.splitext(dictionary_path)[0] + WORD_CACHE_EXTENSION
 
 
-def validate_text(input_text, dictionary):
+def count_letter_frequencies(words, alphabet=english_alphabet):
     """
-    Validates the input text by redacting words that are not found in the provided dictionary.
+    Computes the relative frequency of each letter over a set of words.
 
     Args:
-        input_text (str): The text to be validated.
-        dictionary (set): A set of valid dictionary words.
+        words (iterable): The words to count.
+        alphabet (str, optional): The letters to count.
 
     Returns:
-        str: The validated text with non-dictionary words redacted.
+        list: The relative frequency of each letter of the alphabet, or the English
+        letter frequencies if the words hold none of its letters.
     """
-    def replace_match(match):
-        word = match.group(0).strip('.,!?')
-        if word.lower() not in dictionary and word.isalpha():
-            return "[REDACTED]" + match.group(0)[len(word):]
-        return match.group(0)
+    counts = collections.Counter()
+    for word in words:
+        counts.update(word)
+    total = sum(counts[letter] for letter in alphabet)
+    if not total:
+        return list(ENGLISH_LETTER_FREQUENCIES)
+    return [counts[letter] / total for letter in alphabet]
 
-    return re.sub(r"\b\w+['\w-]*[.,!?]?\b", replace_match, input_text)
 
-
-def mod_inverse(a, m):
+def compile_word_cache(dictionary_path=DICTIONARY_FILE, cache_path=None):
     """
-    Finds the modular inverse of a with respect to m.
+    Parses a dictionary and caches its word set and letter frequencies on disk.
+
+    The cache is one JSON header line (version, size, modification time and checksum
+    of the dictionary, and the letter frequencies) followed by the normalized words,
+    one per line, which is much faster to load than the raw dictionary.
 
     Args:
-        a (int): The number to find the modular inverse of.
-        m (int): The modulus.
+        dictionary_path (str): Path of the dictionary file.
+        cache_path (str, optional): Output path. Defaults to the dictionary path with a
+            `.words` extension.
 
     Returns:
-        int: The modular inverse, or None if no inverse exists.
+        tuple: The word set and the letter frequencies.
     """
-    for x in range(1, m):
-        if (a * x) % m == 1:
-            return x
-    return None
+    cache_path = cache_path or word_cache_path(dictionary_path)
+    size, mtime_ns, checksum = dictionary_signature(dictionary_path)
+    words = frozenset(load_dictionary(dictionary_path))
+    frequencies = count_letter_frequencies(words)
+    header = {"version": WORD_CACHE_VERSION, "size": size, "mtime_ns": mtime_ns,
+              "sha256": checksum.hex(), "letter_frequencies": frequencies}
+    write_word_cache(cache_path, header, sorted(words))
+    return words, frequencies
 
-def coprime_with_26(a):
+
+def write_word_cache(cache_path, header, ordered):
     """
-    Checks if a is coprime with 26.
+    Writes a parsed-dictionary cache to a temporary file and moves it into place.
 
     Args:
-        a (int): The number to check.
-
-    Returns:
-        bool: True if a is coprime with 26, False otherwise.
+        cache_path (str): Output path.
+        header (dict): The header of the cache.
+        ordered (list): The words in sorted order.
     """
-    return mod_inverse(a, 26) is not None
+    temp_path = f'{cache_path}.{os.getpid()}.tmp'
+    with open(temp_path, 'w') as file:
+        file.write(json.dumps(header) + "\n")
+        file.write("\n".join(ordered))
+    os.replace(temp_path, cache_path)
+
 
-def decrypt_affine_single_word(ciphertext):
+def read_word_cache(cache_path, dictionary_path):
     """
-    Decrypts the given ciphertext using the Affine cipher technique by brute-forcing the key.
+    Reads a parsed-dictionary cache if it still matches the dictionary.
 
     Args:
-        ciphertext (str): The text to be decrypted.
+        cache_path (str): Path of the cache.
+        dictionary_path (str): Path of the dictionary file.
 
     Returns:
-        str: The decrypted text, or None if no valid decryption is found.
+        tuple: The word set and the letter frequencies, or None if the cache is
+        missing, stale or was written by an incompatible version.
+    """
+    touched = []
+    try:
+        with open(cache_path, 'r') as file:
+            header = json.loads(file.readline())
+            if header.get("version") != WORD_CACHE_VERSION:
+                return None
+            if not cache_is_current(dictionary_path, header["size"], header["mtime_ns"],
+                                    bytes.fromhex(header["sha256"]), touched.append):
+                return None
+            ordered = file.read().split("\n")
+            words = frozenset(ordered)
+    except (OSError, ValueError, KeyError):
+        return None
+    if touched:
+        try:
+            write_word_cache(cache_path, dict(header, mtime_ns=touched[0]), ordered)
+        except OSError:
+            pass
+    return words, header["letter_frequencies"]
+
+
+class NgramTable:
     """
-    dictionary = load_dictionary()
-    words = extract_first_two_words(ciphertext)
+    The scores of every n-gram of an alphabet, which the key search and the fitness
+    scores are computed against.
 
-    for a in range(1, 26):
-        if coprime_with_26(a):
-            for b in range(26):
-                a_inv = mod_inverse(a, 26)
-                if a_inv is None:
-                    continue
+    The n-gram of letter indices (l1, ..., ln) has its score at the dense index
+    ((l1 * R + l2) * R + ...) * R + ln of `scores`, R being the length of the alphabet,
+    so the table holds exactly R ** n entries. The scorers read `scores` directly.
+    """
+
+    def __init__(self, scores, alphabet=english_alphabet, order=QUADGRAM_ORDER, trained=False):
+        """
+        Wraps a sequence of scores.
+
+        Args:
+            scores (memoryview): The score of every n-gram, or any indexable sequence.
+            alphabet (str, optional): The lowercase alphabet of the n-grams.
+            order (int, optional): The n-gram order, one of `NGRAM_ORDERS`.
+            trained (bool, optional): Whether the scores were trained on a corpus rather
+                than compiled from the dictionary.
+
+        Raises:
+            ValueError: If the order is not supported or the number of scores does not
+                match the alphabet and order.
+        """
+        if order not in NGRAM_ORDERS:
+            raise ValueError(f"n-gram order must be one of {', '.join(map(str, NGRAM_ORDERS))}")
+        if len(scores) != len(alphabet) ** order:
+            raise ValueError(f"a table of {len(alphabet)} letters and order {order} needs "
+                             f"{len(alphabet) ** order} scores, not {len(scores)}")
+        self.scores = scores
+        self.alphabet = alphabet
+        self.order = order
+        self.radix = len(alphabet)
+        self.trained = trained
+
+    def __len__(self):
+        return len(self.scores)
+
+    def with_scores(self, scores):
+        """
+        Creates a table of the same alphabet and order over another copy of the scores.
 
-                decrypted_words = []
-                for word in words:
-                    decrypted_word = ""
-                    for char in word:
-                        if char.isalpha():
-                            shift_base = 65 if char.isupper() else 97
-                            decrypted_word += chr((a_inv * (ord(char) - shift_base - b) % 26) + shift_base)
-                        else:
-                            decrypted_word += char
+        Args:
+            scores (memoryview): The scores, such as a NumPy array or shared memory.
 
-                    decrypted_words.append(decrypted_word)
+        Returns:
+            NgramTable: The new table.
+        """
+        return NgramTable(scores, self.alphabet, self.order, self.trained)
 
-                if all(decrypted_word.lower() in dictionary for decrypted_word in decrypted_words):
-                    return decrypt_affine_with_keys(ciphertext, a, b)
 
-    return None
+class LanguageModel:
+    """
+    The dictionary words, letter frequencies and n-gram score table the breakers
+    score against.
 
-def extract_first_two_words(ciphertext):
+    Each part is loaded the first time it is used and then kept, so one model can be
+    handed to every breaker of a run. Parsed dictionaries and score tables are cached
+    on disk next to the dictionary and reused as long as it is unchanged.
     """
-    Extracts the first two words from the ciphertext.
 
-    Args:
-        ciphertext (str): The ciphertext to extract words from.
+    def __init__(self, dictionary_path=DICTIONARY_FILE, table_path=None, cache_path=None, alphabet=None,
+                 order=None):
+        """
+        Creates a model without loading anything yet.
+
+        Args:
+            dictionary_path (str, optional): Path of the dictionary file.
+            table_path (str, optional): Path of the compiled score table. Defaults to the
+                dictionary path with the extension of the order, `.qgram` for quadgrams.
+            cache_path (str, optional): Path of the parsed-dictionary cache. Defaults to
+                the dictionary path with a `.words` extension.
+            alphabet (str, optional): The alphabet the score table must have. Without
+                one any table is used, and an English one is compiled if needed.
+            order (int, optional): The n-gram order the score table must have. Without
+                one any table is used, and a quadgram one is compiled if needed.
+        """
+        self.dictionary_path = dictionary_path
+        self.table_path = table_path or score_table_path(dictionary_path, order or QUADGRAM_ORDER,
+                                                         alphabet or english_alphabet)
+        self.cache_path = cache_path or word_cache_path(dictionary_path)
+        self.table_alphabet = alphabet
+        self.order = order
+        self._words = None
+        self._letter_frequencies = None
+        self._ngrams = None
+
+    def _load_words(self):
+        """
+        Loads the word set and letter frequencies, from the cache when possible.
+        """
+        with stats_phase("load_words"):
+            cached = read_word_cache(self.cache_path, self.dictionary_path)
+            if cached is None:
+                cached = compile_word_cache(self.dictionary_path, self.cache_path)
+        self._words, self._letter_frequencies = cached
+
+    @property
+    def words(self):
+        """
+        frozenset: The lowercase dictionary words.
+        """
+        if self._words is None:
+            self._load_words()
+        return self._words
 
-    Returns:
-        list: A list of the first two words.
-    """
-    words = ciphertext.split()
-    return words[:2] if len(words) >= 2 else words
+    @property
+    def letter_frequencies(self):
+        """
+        list: The relative frequency of each letter of the English alphabet.
+        """
+        if self._letter_frequencies is None:
+            self._load_words()
+        return self._letter_frequencies
 
-def decrypt_affine_with_keys(ciphertext, a, b):
+    @property
+    def ngrams(self):
+        """
+        NgramTable: The normalized n-gram scores.
+        """
+        if self._ngrams is None:
+            with stats_phase("load_score_table"):
+                self._ngrams = load_score_table(self.dictionary_path, self.table_path, self.table_alphabet,
+                                                self.order)
+        return self._ngrams
+
+    @property
+    def alphabet(self):
+        """
+        str: The alphabet of the score table, which the monoalphabetic key permutes.
+        """
+        return self.ngrams.alphabet
+
+    def load(self):
+        """
+        Loads every part of the model now rather than on first use.
+
+        Returns:
+            LanguageModel: The model itself.
+        """
+        self.words
+        self.ngrams
+        return self
+
+    def compile(self):
+        """
+        Rebuilds both on-disk caches from the dictionary and loads them.
+        """
+        compile_score_table(self.dictionary_path, self.table_path, self.table_alphabet or english_alphabet,
+                            self.order or QUADGRAM_ORDER)
+        self._words, self._letter_frequencies = compile_word_cache(self.dictionary_path, self.cache_path)
+        self._ngrams = read_score_table(self.table_path)
+
+
+@functools.lru_cache(maxsize=None)
+def letter_index_table(alphabet):
     """
-    Decrypts the given ciphertext using the Affine cipher technique with specified keys.
+    Builds the `bytes.translate` arguments that turn ASCII text into letter indices.
 
     Args:
-        ciphertext (str): The text to be decrypted.
-        a (int): The multiplicative key.
-        b (int): The additive key.
+        alphabet (str): The lowercase alphabet.
 
     Returns:
-        str: The decrypted text, or None if no valid decryption is found.
+        tuple: The 256-byte translation table and the bytes to delete, or None if the
+        alphabet is not plain ASCII.
     """
-    a_inv = mod_inverse(a, 26)
-    if a_inv is None:
+    if not alphabet.isascii():
         return None
+    table = bytearray(256)
+    for index, char in enumerate(alphabet):
+        table[ord(char)] = index
+    delete = bytes(byte for byte in range(128) if chr(byte) not in alphabet)
+    return bytes(table), delete
 
-    result = ""
-    for char in ciphertext:
-        if char.isalpha():
-            shift_base = 65 if char.isupper() else 97
-            result += chr((a_inv * (ord(char) - shift_base - b) % 26) + shift_base)
-        else:
-            result += char
-
-    return result
 
-def decrypt_affine(ciphertext):
+def char_to_number(txt, alphabet):
     """
-    Decrypts the given ciphertext using the Affine cipher technique by brute-forcing the key.
+    Converts characters in a string to their corresponding numerical values based on an alphabet.
+
+    The text is held as one byte per letter. For ASCII alphabets the conversion is a
+    single `bytes.translate` that also drops every other character.
 
     Args:
-        ciphertext (str): The text to be decrypted.
+        txt (str): The text to convert.
+        alphabet (str): The alphabet used for mapping, of at most 256 characters.
 
     Returns:
-        str: The decrypted text, or None if no valid decryption is found.
+        bytes: The numerical values corresponding to characters in the text.
     """
-    return decrypt_affine_single_word(ciphertext)
-
+    alphabet = alphabet.lower()
+    table = letter_index_table(alphabet)
+    if table is not None:
+        # lowercasing first keeps the letters that only lowercase to ASCII, like the Kelvin sign
+        return txt.lower().encode('ascii', 'ignore').translate(*table)
+    transformmap = {char: index for index, char in enumerate(alphabet)}
+    return bytes(transformmap[char] for char in txt.lower() if char in transformmap)
 
 
-def break_mono(ciphertext, key_alphabet_map):
+@functools.lru_cache(maxsize=None)
+def letter_byte_table(alphabet):
     """
-    Decrypts the given ciphertext using the Monoalphabetic cipher technique.
+    Builds the `bytes.translate` arguments that turn the raw bytes of a UTF-8 file into
+    letter indices.
+
+    Unlike `letter_index_table`, uppercase letters are folded here, and every byte that
+    is not a letter of the alphabet is dropped, including the bytes of non-ASCII
+    characters.
 
     Args:
-        ciphertext (str): The text to be decrypted.
-        key_alphabet_map (dict): The key alphabet map for the Monoalphabetic cipher.
+        alphabet (str): The lowercase alphabet.
 
     Returns:
-        str: The decrypted text.
+        tuple: The 256-byte translation table and the bytes to delete, or None if the
+        alphabet is not plain ASCII.
     """
-    decoded_text = monoalphabetic_decrypt(ciphertext, key_alphabet_map)
-    return decoded_text
+    if not alphabet.isascii():
+        return None
+    table = bytearray(256)
+    for index, char in enumerate(alphabet):
+        table[ord(char)] = table[ord(char.upper())] = index
+    kept = {ord(char) for char in alphabet} | {ord(char.upper()) for char in alphabet}
+    delete = bytes(byte for byte in range(256) if byte not in kept)
+    return bytes(table), delete
 
-def write_output_file(mode, text):
+
+def read_letter_indices(data, alphabet, chunk_size=CHUNK_SIZE):
     """
-    Writes the decrypted text to an output file.
+    Converts the UTF-8 bytes of a ciphertext, such as a memory-mapped file, to letter
+    indices, like `char_to_number` does for a string.
+
+    For ASCII alphabets the bytes are translated one chunk at a time, so the only copy
+    of the text that is built is the buffer of letter indices. Other alphabets are
+    decoded one chunk at a time.
 
     Args:
-        mode (str): The mode of decryption (e.g., "caesar", "affine", "mono").
+        data (bytes): The bytes of the ciphertext, or an mmap of them.
+        alphabet (str): The alphabet used for mapping.
+        chunk_size (int, optional): Bytes converted at a time.
+
+    Returns:
+        bytearray: The letter indices.
+    """
+    alphabet = alphabet.lower()
+    table = letter_byte_table(alphabet)
+    letters = bytearray()
+    if table is not None:
+        for start in range(0, len(data), chunk_size):
+            letters += data[start:start + chunk_size].translate(*table)
+        return letters
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    for start in range(0, len(data), chunk_size):
+        letters += char_to_number(decoder.decode(data[start:start + chunk_size]), alphabet)
+    letters += char_to_number(decoder.decode(b'', final=True), alphabet)
+    return letters
+
+
+def decrypt_bin(key, cipher_bin):
+    """
+    Decrypts a binary cipher using a given key.
+
+    Args:
+        key (list): The decryption key.
+        cipher_bin (bytes): The binary representation of the cipher text.
+
+    Returns:
+        bytes: The decrypted binary data.
+    """
+    mapping = invert_key(key)
+    return bytes(cipher_bin).translate(bytes(mapping) + bytes(range(len(mapping), 256)))
+
+
+
+def swap_chars(key, index1, index2):
+    """
+    Swaps two characters in the key at the specified indices.
+
+    Args:
+        key (list): The key list where characters will be swapped.
+        index1 (int): The index of the first character to swap.
+        index2 (int): The index of the second character to swap.
+    """
+    key[index1], key[index2] = key[index2], key[index1]
+
+def invert_key(key):
+    """
+    Builds the ciphertext-to-plaintext mapping of a key.
+
+    Args:
+        key (list): The key list, mapping plaintext indices to ciphertext characters.
+
+    Returns:
+        list: A list mapping each ciphertext character to its plaintext index. One
+        extra last entry maps the padding character of windows shorter than four
+        letters (see `group_quadgram_windows`) to 0.
+    """
+    mapping = [0] * (len(key) + 1)
+    for index, char in enumerate(key):
+        mapping[char] = index
+    return mapping
+
+def compute_index(previous, char, radix, modulus):
+    """
+    Computes the table index of an n-gram from the index of the n-gram before it.
+
+    Args:
+        previous (int): The index of the previous n-gram.
+        char (int): The character value that ends the new n-gram.
+        radix (int): The length of the alphabet.
+        modulus (int): `radix ** (order - 1)`, which drops the first character.
+
+    Returns:
+        int: The computed index.
+    """
+    return previous % modulus * radix + char
+
+def fitness_score(plaintext, words):
+    """
+    Calculates the fitness score of the plaintext based on word frequencies.
+
+    Args:
+        plaintext (list): The plaintext list, of at least the table's order.
+        words (NgramTable): The n-gram score table.
+
+    Returns:
+        int: The fitness score.
+    """
+    scores, radix, order = words.scores, words.radix, words.order
+    modulus = radix ** (order - 1)
+    score = 0
+    word_index = 0
+    for char in plaintext[:order - 1]:
+        word_index = word_index * radix + char
+    for char in plaintext[order - 1:]:
+        word_index = compute_index(word_index, char, radix, modulus)
+        score += scores[word_index]
+    return score
+
+def group_quadgram_windows(cipher_bin, alphabet_len, order=QUADGRAM_ORDER):
+    """
+    Groups the n-gram windows of the ciphertext by their characters.
+
+    Identical windows are merged into a single entry carrying their count, so a
+    window that repeats thousands of times in a long ciphertext is scored once. Every
+    entry has four characters: shorter windows are padded in front with the character
+    `alphabet_len`, which the mappings of `invert_key` send to 0, so a padded window's
+    dense table index is that of its own letters and the scorers need not know the order.
+
+    Args:
+        cipher_bin (bytes): The binary representation of the cipher text.
+        alphabet_len (int): The length of the alphabet.
+        order (int, optional): The n-gram order of the score table. Defaults to 4.
+
+    Returns:
+        tuple: A list of every distinct window as (c1, c2, c3, c4, count), and a list
+        holding, for each ciphertext character, the windows that contain it.
+    """
+    view = memoryview(cipher_bin)
+    counts = collections.Counter(zip(*(view[offset:] for offset in range(order))))
+    padding = (alphabet_len,) * (QUADGRAM_ORDER - order)
+    quadgrams = []
+    char_windows = [[] for _ in range(alphabet_len)]
+    for window, count in counts.items():
+        entry = padding + window + (count,)
+        quadgrams.append(entry)
+        for char in set(window):
+            char_windows[char].append(entry)
+    return quadgrams, char_windows
+
+def quadgram_fitness(quadgrams, mapping, words):
+    """
+    Calculates the fitness score of a decryption from the grouped ciphertext windows.
+
+    Args:
+        quadgrams (list): The distinct ciphertext windows with their counts.
+        mapping (list): The ciphertext-to-plaintext mapping.
+        words (NgramTable): The n-gram score table.
+
+    Returns:
+        int: The fitness score, equal to `fitness_score` of the decrypted plaintext.
+    """
+    if _run_stats["enabled"]:
+        count_quadgram_lookups(quadgrams, mapping, words)
+    scores, radix = words.scores, words.radix
+    score = 0
+    for a, b, c, d, count in quadgrams:
+        score += count * scores[((mapping[a] * radix + mapping[b]) * radix + mapping[c]) * radix + mapping[d]]
+    return score
+
+def count_quadgram_lookups(quadgrams, mapping, words):
+    """
+    Counts a full scoring of a key and which of its score table lookups find a score.
+
+    Only called while run metrics are collected, so the scoring itself stays as fast.
+
+    Args:
+        quadgrams (list): The distinct ciphertext windows with their counts.
+        mapping (list): The ciphertext-to-plaintext mapping.
+        words (NgramTable): The n-gram score table.
+    """
+    scores, radix = words.scores, words.radix
+    hits = 0
+    for a, b, c, d, _ in quadgrams:
+        if scores[((mapping[a] * radix + mapping[b]) * radix + mapping[c]) * radix + mapping[d]]:
+            hits += 1
+    _search_counters["rescored"] += 1
+    _search_counters["quadgram_hits"] += hits
+    _search_counters["quadgram_misses"] += len(quadgrams) - hits
+
+def count_swap_lookups(mapping, char_windows, char1, char2, words):
+    """
+    Counts which of the score table lookups of `score_swap_delta` find a score.
+
+    Only called while run metrics are collected, so the swaps themselves stay as fast.
+
+    Args:
+        mapping (list): The current ciphertext-to-plaintext mapping.
+        char_windows (list): The windows containing each ciphertext character.
+        char1 (int): The first ciphertext character.
+        char2 (int): The second ciphertext character.
+        words (NgramTable): The n-gram score table.
+    """
+    scores, radix = words.scores, words.radix
+    swapped = mapping[:]
+    swapped[char1], swapped[char2] = mapping[char2], mapping[char1]
+    windows = char_windows[char1] + [window for window in char_windows[char2] if char1 not in window[:4]]
+    hits = 0
+    for a, b, c, d, _ in windows:
+        for plain in (mapping, swapped):
+            if scores[((plain[a] * radix + plain[b]) * radix + plain[c]) * radix + plain[d]]:
+                hits += 1
+    _search_counters["quadgram_hits"] += hits
+    _search_counters["quadgram_misses"] += 2 * len(windows) - hits
+
+def score_swap_delta(mapping, char_windows, char1, char2, words):
+    """
+    Computes how the fitness score changes if two ciphertext characters exchange
+    their plaintext letters.
+
+    Only the windows that contain one of the two characters are rescored, and a
+    window containing both of them is counted once.
+
+    Args:
+        mapping (list): The current ciphertext-to-plaintext mapping.
+        char_windows (list): The windows containing each ciphertext character.
+        char1 (int): The first ciphertext character.
+        char2 (int): The second ciphertext character.
+        words (NgramTable): The n-gram score table.
+
+    Returns:
+        int: The score of the swapped decryption minus the current score.
+    """
+    scores, radix = words.scores, words.radix
+    swapped = mapping[:]
+    swapped[char1], swapped[char2] = mapping[char2], mapping[char1]
+    delta = 0
+    for a, b, c, d, count in char_windows[char1]:
+        delta += count * (scores[((swapped[a] * radix + swapped[b]) * radix + swapped[c]) * radix + swapped[d]]
+                          - scores[((mapping[a] * radix + mapping[b]) * radix + mapping[c]) * radix + mapping[d]])
+    for a, b, c, d, count in char_windows[char2]:
+        if a != char1 and b != char1 and c != char1 and d != char1:
+            delta += count * (scores[((swapped[a] * radix + swapped[b]) * radix + swapped[c]) * radix + swapped[d]]
+                              - scores[((mapping[a] * radix + mapping[b]) * radix + mapping[c]) * radix + mapping[d]])
+    return delta
+
+# work done by this process, so restarts can report it: swap evaluations and accepted
+# swaps, plus full key scorings and the score table lookups of scorings and swaps that
+# find a score (hits) or not (misses) while metrics are collected
+_search_counters = {"evaluations": 0, "accepted": 0, "rescored": 0, "quadgram_hits": 0, "quadgram_misses": 0}
+
+# opt-in metrics of the run: wall time per phase and counts of the key search
+_run_stats = {"enabled": False, "phases": collections.Counter(), "counts": collections.Counter()}
+
+
+def enable_stats(enabled=True):
+    """
+    Switches the collection of run metrics on or off, discarding what was recorded.
+
+    Args:
+        enabled (bool, optional): Whether to collect metrics. Defaults to True.
+    """
+    _run_stats.update(enabled=enabled, phases=collections.Counter(), counts=collections.Counter())
+
+
+@contextlib.contextmanager
+def stats_phase(name):
+    """
+    Adds the wall time of a block to a phase of the run metrics, if they are collected.
+
+    Args:
+        name (str): The name of the phase.
+    """
+    if not _run_stats["enabled"]:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _run_stats["phases"][name] += time.perf_counter() - start
+
+
+def record_restart(search, backend, work):
+    """
+    Adds the work of one restart to the run metrics.
+
+    The restart's seconds go to the phase of its search function; with several workers
+    they add up to more than the wall time of the search.
+
+    Args:
+        search (str): The search strategy.
+        backend (str): The search backend.
+        work (dict): The counters returned by `random_restart`.
+    """
+    if search == "anneal":
+        phase = "simulated_annealing"
+    elif search == "tempering":
+        phase = "parallel_tempering"
+    else:
+        phase = "numpy_frequency_analysis" if backend == "numpy" else "frequency_analysis"
+    _run_stats["phases"][phase] += work["seconds"]
+    _run_stats["counts"].update(restarts=1, swaps_attempted=work["evaluations"], swaps_accepted=work["accepted"],
+                                score_evaluations=work["rescored"], quadgram_hits=work["quadgram_hits"],
+                                quadgram_misses=work["quadgram_misses"])
+
+
+def stats_report():
+    """
+    Returns the run metrics.
+
+    Returns:
+        dict: The seconds spent in each phase and the counts of the key search.
+    """
+    return {"phases": {name: round(seconds, 6) for name, seconds in _run_stats["phases"].items()},
+            "counts": dict(_run_stats["counts"])}
+
+
+def write_stats(destination):
+    """
+    Writes the run metrics as JSON.
+
+    Args:
+        destination (str): A file path, or "-" (or "1") for stderr.
+    """
+    if destination in ("-", "1"):
+        json.dump(stats_report(), sys.stderr)
+        sys.stderr.write("\n")
+        return
+    with open(destination, 'w') as file:
+        json.dump(stats_report(), file, indent=2)
+
+
+def deadline_passed(deadline):
+    """
+    Checks whether a deadline of the key search has passed.
+
+    Args:
+        deadline (float): A `time.monotonic()` value, or None for no deadline.
+
+    Returns:
+        bool: True if the deadline is set and has passed.
+    """
+    return deadline is not None and time.monotonic() >= deadline
+
+
+# the progress report of the running key search, called by `search_pulse` when it is due
+_progress_pulse = {"report": None, "due": 0.0}
+
+
+@contextlib.contextmanager
+def progress_pulse(report):
+    """
+    Has `search_pulse` call a progress report at most every `PROGRESS_PULSE_INTERVAL`.
+
+    Args:
+        report (callable): Called without arguments while the key search runs.
+    """
+    previous = dict(_progress_pulse)
+    _progress_pulse.update(report=report, due=time.monotonic() + PROGRESS_PULSE_INTERVAL)
+    try:
+        yield
+    finally:
+        _progress_pulse.update(previous)
+
+
+def search_pulse(deadline=None):
+    """
+    Marks a point inside a key search: reports progress if it is due and checks the deadline.
+
+    The search loops call it every few swaps, so progress is reported and the deadline
+    kept even while a single restart runs for a long time.
+
+    Args:
+        deadline (float, optional): A `time.monotonic()` value, or None for no deadline.
+
+    Returns:
+        bool: True if the deadline is set and has passed.
+    """
+    now = time.monotonic()
+    if _progress_pulse["report"] is not None and now >= _progress_pulse["due"]:
+        _progress_pulse["due"] = now + PROGRESS_PULSE_INTERVAL
+        _progress_pulse["report"]()
+    return deadline is not None and now >= deadline
+
+def attempt_key_swap(key, i1, i2, mapping, char_windows, spells):
+    """
+    Evaluates swapping two characters in the key without modifying it.
+
+    Args:
+        key (list): The key list where characters would be swapped.
+        i1 (int): The index of the first character to swap.
+        i2 (int): The index of the second character to swap.
+        mapping (list): The current ciphertext-to-plaintext mapping.
+        char_windows (list): The windows containing each ciphertext character.
+        spells (NgramTable): The n-gram score table.
+
+    Returns:
+        int: The change in fitness score the swap would cause.
+    """
+    _search_counters["evaluations"] += 1
+    if _run_stats["enabled"]:
+        count_swap_lookups(mapping, char_windows, key[i1], key[i2], spells)
+    return score_swap_delta(mapping, char_windows, key[i1], key[i2], spells)
+
+def evaluate_key(temp_matches, max_matches):
+    """
+    Evaluates if the temporary matches are greater than the maximum matches.
+
+    Args:
+        temp_matches (int): The temporary matches score.
+        max_matches (int): The maximum matches score.
+
+    Returns:
+        bool: True if temp_matches is greater than max_matches, False otherwise.
+    """
+    return temp_matches > max_matches
+
+def key_swap_and_evaluation(key, i, i1, mapping, char_windows, fourwords, score):
+    """
+    Swaps characters in the key if doing so improves the score.
+
+    Nothing is written for a rejected swap, so there is nothing to restore.
+
+    Args:
+        key (list): The key list where characters will be swapped.
+        i (int): The index of the first character to swap.
+        i1 (int): The index of the second character to swap.
+        mapping (list): The ciphertext-to-plaintext mapping, kept in sync with the key.
+        char_windows (list): The windows containing each ciphertext character.
+        fourwords (NgramTable): The n-gram score table.
+        score (int): The fitness score of the current key.
+
+    Returns:
+        tuple: The new score and a boolean indicating if a better key was found.
+    """
+    temp_matches = score + attempt_key_swap(key, i, i1, mapping, char_windows, fourwords)
+    if evaluate_key(temp_matches, score):
+        _search_counters["accepted"] += 1
+        swap_chars(mapping, key[i], key[i1])
+        swap_chars(key, i, i1)
+        return temp_matches, True
+    return score, False
+
+def frequency_analysis(key, quadgrams, char_windows, words, alphabet_len, deadline=None):
+    """
+    Performs frequency analysis to find the best key for decryption.
+
+    The score of the current key is computed once and then kept as a running total
+    that each accepted swap updates with its delta.
+
+    Args:
+        key (list): The key list to analyze.
+        quadgrams (list): The distinct ciphertext windows with their counts.
+        char_windows (list): The windows containing each ciphertext character.
+        words (NgramTable): The n-gram score table.
+        alphabet_len (int): The length of the alphabet.
+        deadline (float, optional): `time.monotonic()` value at which to stop climbing,
+            even before reaching a local optimum. It is checked every row of swaps.
+
+    Returns:
+        int: The maximum score found.
+    """
+    mapping = invert_key(key)
+    score = quadgram_fitness(quadgrams, mapping, words)
+    found1 = True
+    while found1:
+        found1 = False
+        for i in range(alphabet_len - 1):
+            if search_pulse(deadline):
+                return score
+            for j in range(i + 1, alphabet_len):
+                score, found_best_key = key_swap_and_evaluation(key, i, j, mapping, char_windows, words, score)
+                if found_best_key:
+                    found1 = True
+                    break
+    return score
+
+def temperature_scale(quadgrams, alphabet_len):
+    """
+    Computes the factor that adapts the annealing temperatures to a ciphertext.
+
+    Args:
+        quadgrams (list): The distinct ciphertext windows with their counts.
+        alphabet_len (int): The length of the alphabet.
+
+    Returns:
+        float: The number of ciphertext windows per key letter, at least 1.
+    """
+    return max(1.0, sum(entry[4] for entry in quadgrams) / alphabet_len)
+
+def schedule_temperature(schedule, progress, scale):
+    """
+    Computes the temperature of an annealing run.
+
+    Args:
+        schedule (SearchSchedule): The search schedule.
+        progress (float): How much of the budget is used, from 0 to 1.
+        scale (float): The temperature scale of the ciphertext.
+
+    Returns:
+        float: The temperature, going from the start to the end temperature.
+    """
+    start, end = schedule.start_temperature, schedule.end_temperature
+    if schedule.cooling == "linear":
+        return scale * (start + (end - start) * progress)
+    return scale * start * (end / start) ** progress
+
+def schedule_progress(schedule, step, started, deadline=None):
+    """
+    Measures how much of the iteration or time budget of a run is used.
+
+    Args:
+        schedule (SearchSchedule): The search schedule.
+        step (int): The number of swaps tried so far.
+        started (float): The `time.monotonic()` value at the start of the run.
+        deadline (float, optional): `time.monotonic()` value that ends the whole search.
+
+    Returns:
+        float: The larger of the used shares of both budgets; 1 or more means it is spent.
+    """
+    if search_pulse(deadline):
+        return 1.0
+    progress = step / schedule.iterations
+    if schedule.seconds:
+        progress = max(progress, (time.monotonic() - started) / schedule.seconds)
+    return progress
+
+def random_swap(rng, alphabet_len):
+    """
+    Picks two distinct key positions.
+
+    Args:
+        rng (random.Random): The random generator.
+        alphabet_len (int): The length of the alphabet.
+
+    Returns:
+        tuple: The two positions.
+    """
+    i = rng.randrange(alphabet_len)
+    j = rng.randrange(alphabet_len - 1)
+    return i, j + (j >= i)
+
+def accept_swap(delta, temperature, rng):
+    """
+    Decides with the Metropolis rule whether a swap is kept.
+
+    Args:
+        delta (int): The change in fitness score the swap causes.
+        temperature (float): The current temperature.
+        rng (random.Random): The random generator.
+
+    Returns:
+        bool: True for every improvement, and for a worse key with probability
+        exp(delta / temperature).
+    """
+    return delta >= 0 or rng.random() < math.exp(delta / temperature)
+
+def simulated_annealing(key, quadgrams, char_windows, words, alphabet_len, rng, schedule, deadline=None):
+    """
+    Searches for the best key by simulated annealing.
+
+    Random swaps are kept whenever they improve the score, and worse ones with a
+    probability that shrinks as the temperature cools, which lets the search leave
+    the local optima a hill-climb gets stuck in. The best key seen is finally
+    hill-climbed to its local optimum.
+
+    Args:
+        key (list): The starting key, replaced in place by the best key found.
+        quadgrams (list): The distinct ciphertext windows with their counts.
+        char_windows (list): The windows containing each ciphertext character.
+        words (NgramTable): The n-gram score table.
+        alphabet_len (int): The length of the alphabet.
+        rng (random.Random): The random generator.
+        schedule (SearchSchedule): The iteration and time budget and the temperatures.
+        deadline (float, optional): `time.monotonic()` value at which to stop.
+
+    Returns:
+        int: The maximum score found.
+    """
+    mapping = invert_key(key)
+    score = best_score = quadgram_fitness(quadgrams, mapping, words)
+    best_key = key[:]
+    scale = temperature_scale(quadgrams, alphabet_len)
+    started = time.monotonic()
+    for step in range(schedule.iterations):
+        if step % SCHEDULE_UPDATE_INTERVAL == 0:
+            progress = schedule_progress(schedule, step, started, deadline)
+            if progress >= 1:
+                break
+            temperature = schedule_temperature(schedule, progress, scale)
+        i, j = random_swap(rng, alphabet_len)
+        delta = attempt_key_swap(key, i, j, mapping, char_windows, words)
+        if accept_swap(delta, temperature, rng):
+            _search_counters["accepted"] += 1
+            swap_chars(mapping, key[i], key[j])
+            swap_chars(key, i, j)
+            score += delta
+            if score > best_score:
+                best_score, best_key = score, key[:]
+    key[:] = best_key
+    return frequency_analysis(key, quadgrams, char_windows, words, alphabet_len, deadline)
+
+def parallel_tempering(key, quadgrams, char_windows, words, alphabet_len, rng, schedule, deadline=None):
+    """
+    Searches for the best key by parallel tempering.
+
+    Several replicas of the search run at fixed temperatures spread geometrically
+    between the start and end temperature, each trying one swap per round. Every few
+    rounds neighbouring replicas may exchange their keys, so good keys found by the hot
+    replicas sink to the cold ones that refine them. The best key seen is finally
+    hill-climbed to its local optimum.
+
+    Args:
+        key (list): The starting key of the coldest replica, replaced in place by the
+            best key found.
+        quadgrams (list): The distinct ciphertext windows with their counts.
+        char_windows (list): The windows containing each ciphertext character.
+        words (NgramTable): The n-gram score table.
+        alphabet_len (int): The length of the alphabet.
+        rng (random.Random): The random generator.
+        schedule (SearchSchedule): The iteration and time budget, shared by all
+            replicas, and the temperatures.
+        deadline (float, optional): `time.monotonic()` value at which to stop.
+
+    Returns:
+        int: The maximum score found.
+    """
+    replicas = max(2, schedule.replicas)
+    scale = temperature_scale(quadgrams, alphabet_len)
+    start, end = schedule.start_temperature, schedule.end_temperature
+    temperatures = [scale * end * (start / end) ** (level / (replicas - 1)) for level in range(replicas)]
+    keys = [key[:]]
+    for _ in range(replicas - 1):
+        keys.append(rng.sample(range(alphabet_len), alphabet_len))
+    mappings = [invert_key(replica) for replica in keys]
+    scores = [quadgram_fitness(quadgrams, mapping, words) for mapping in mappings]
+    best_score = max(scores)
+    best_key = keys[scores.index(best_score)][:]
+    started = time.monotonic()
+    for round_number in range(schedule.iterations // replicas):
+        if round_number % SCHEDULE_UPDATE_INTERVAL == 0 and \
+                schedule_progress(schedule, round_number * replicas, started, deadline) >= 1:
+            break
+        for level in range(replicas):
+            replica, mapping = keys[level], mappings[level]
+            i, j = random_swap(rng, alphabet_len)
+            delta = attempt_key_swap(replica, i, j, mapping, char_windows, words)
+            if accept_swap(delta, temperatures[level], rng):
+                _search_counters["accepted"] += 1
+                swap_chars(mapping, replica[i], replica[j])
+                swap_chars(replica, i, j)
+                scores[level] += delta
+                if scores[level] > best_score:
+                    best_score, best_key = scores[level], replica[:]
+        if round_number % TEMPERING_EXCHANGE_INTERVAL == 0:
+            for level in range(replicas - 1):
+                # the probability of exchanging the keys of two replicas with the Metropolis rule
+                exponent = (scores[level + 1] - scores[level]) * (1 / temperatures[level] - 1 / temperatures[level + 1])
+                if exponent >= 0 or rng.random() < math.exp(exponent):
+                    keys[level], keys[level + 1] = keys[level + 1], keys[level]
+                    mappings[level], mappings[level + 1] = mappings[level + 1], mappings[level]
+                    scores[level], scores[level + 1] = scores[level + 1], scores[level]
+    key[:] = best_key
+    return frequency_analysis(key, quadgrams, char_windows, words, alphabet_len, deadline)
+
+def numpy_cipher_array(cipher_bin):
+    """
+    Views the binary representation of a ciphertext as a NumPy array, without copying it.
+
+    Args:
+        cipher_bin (bytes): The binary representation of the cipher text.
+
+    Returns:
+        numpy.ndarray: The character indices as a uint8 array.
+    """
+    return np.frombuffer(cipher_bin, dtype=np.uint8)
+
+def numpy_ngram_indices(plaintext, radix, order=QUADGRAM_ORDER):
+    """
+    Computes the score table index of every n-gram window in one pass.
+
+    Args:
+        plaintext (numpy.ndarray): The plaintext character indices.
+        radix (int): The length of the alphabet.
+        order (int, optional): The n-gram order. Defaults to 4.
+
+    Returns:
+        numpy.ndarray: The table index of each window, as int64.
+    """
+    plaintext = plaintext.astype(np.int64)
+    windows = len(plaintext) - order + 1
+    indices = plaintext[:windows].copy()
+    for offset in range(1, order):
+        indices = indices * radix + plaintext[offset:offset + windows]
+    return indices
+
+def numpy_window_indices(plain, radix):
+    """
+    Computes the score table index of padded four-character windows.
+
+    Args:
+        plain (numpy.ndarray): Plaintext windows, with their four characters on the last axis.
+        radix (int): The length of the alphabet.
+
+    Returns:
+        numpy.ndarray: The table index of each window.
+    """
+    return ((plain[..., 0] * radix + plain[..., 1]) * radix + plain[..., 2]) * radix + plain[..., 3]
+
+def numpy_group_windows(cipher_bin, alphabet_len, order=QUADGRAM_ORDER):
+    """
+    Groups the n-gram windows of the ciphertext, like `group_quadgram_windows`.
+
+    Args:
+        cipher_bin (bytes): The binary representation of the cipher text.
+        alphabet_len (int): The length of the alphabet.
+        order (int, optional): The n-gram order of the score table. Defaults to 4.
+
+    Returns:
+        tuple: A (windows, 4) array of the distinct windows' characters, padded in front
+        like `group_quadgram_windows`, and an array of how often each of them occurs.
+    """
+    packed, counts = np.unique(numpy_ngram_indices(numpy_cipher_array(cipher_bin), alphabet_len, order),
+                               return_counts=True)
+    columns = [np.full(len(packed), alphabet_len, dtype=np.int64)] * (QUADGRAM_ORDER - order)
+    columns += [packed // alphabet_len ** (order - 1 - offset) % alphabet_len for offset in range(order)]
+    return np.stack(columns, axis=1), counts
+
+def numpy_score_keys(quadgrams, mappings, words):
+    """
+    Scores many candidate keys as one batched operation.
+
+    Args:
+        quadgrams (tuple): The distinct windows and their counts from `numpy_group_windows`.
+        mappings (numpy.ndarray): One ciphertext-to-plaintext mapping per row.
+        words (NgramTable): The n-gram score table, over a NumPy array.
+
+    Returns:
+        numpy.ndarray: The fitness score of each candidate.
+    """
+    windows, counts = quadgrams
+    scores = np.empty(len(mappings), dtype=np.int64)
+    step = max(1, NUMPY_BATCH_ELEMENTS // max(1, len(windows)))
+    for start in range(0, len(mappings), step):
+        plain = mappings[start:start + step][:, windows]
+        looked_up = words.scores[numpy_window_indices(plain, words.radix)]
+        if _run_stats["enabled"]:
+            hits = int(np.count_nonzero(looked_up))
+            _search_counters["quadgram_hits"] += hits
+            _search_counters["quadgram_misses"] += looked_up.size - hits
+        scores[start:start + step] = looked_up.astype(np.int64) @ counts
+    return scores
+
+def numpy_frequency_analysis(key, quadgrams, words, deadline=None):
+    """
+    Performs frequency analysis with the NumPy backend.
+
+    Every pass scores all the swaps of two key characters in one batch and applies
+    the best one, until no swap improves the score.
+
+    Args:
+        key (list): The key list to analyze, updated in place.
+        quadgrams (tuple): The distinct windows and their counts from `numpy_group_windows`.
+        words (NgramTable): The n-gram score table, over a NumPy array.
+        deadline (float, optional): `time.monotonic()` value at which to stop climbing.
+
+    Returns:
+        int: The maximum score found.
+    """
+    first, second = np.triu_indices(len(key), 1)
+    rows = np.arange(len(first))
+    mapping = np.array(invert_key(key), dtype=np.int32)
+    score = int(numpy_score_keys(quadgrams, mapping[np.newaxis], words)[0])
+    if _run_stats["enabled"]:
+        _search_counters["rescored"] += 1
+    while not search_pulse(deadline):
+        _search_counters["evaluations"] += len(first)
+        candidates = np.tile(mapping, (len(first), 1))
+        candidates[rows, first] = mapping[second]
+        candidates[rows, second] = mapping[first]
+        scores = numpy_score_keys(quadgrams, candidates, words)
+        best = int(scores.argmax())
+        if scores[best] <= score:
+            break
+        score = int(scores[best])
+        mapping = candidates[best]
+        _search_counters["accepted"] += 1
+    for char, index in enumerate(mapping[:len(key)]):
+        key[index] = char
+    return score
+
+
+def frequency_seeded_key(cipher_bin, alphabet):
+    """
+    Builds a key that maps the ciphertext letters, in order of frequency, to ETAOIN.
+
+    Characters of the alphabet that are not English letters come after Z, in their
+    alphabet order.
+
+    Args:
+        cipher_bin (bytes): The binary representation of the cipher text.
+        alphabet (str): The alphabet used for the cipher.
+
+    Returns:
+        list: The key list, mapping plaintext indices to ciphertext characters.
+    """
+    alphabet = alphabet.lower()
+    counts = collections.Counter(cipher_bin)
+    # ties keep alphabetical order, so the seed does not depend on the text's order
+    ranked = sorted(range(len(alphabet)), key=lambda char: -counts[char])
+    frequency_rank = {letter: rank for rank, letter in enumerate(frequency_ordered_alphabet)}
+    expected = sorted(range(len(alphabet)), key=lambda index: frequency_rank.get(alphabet[index], len(frequency_rank)))
+    key = [0] * len(alphabet)
+    for rank, index in enumerate(expected):
+        key[index] = ranked[rank]
+    return key
+
+def perturb_key(key, rng, swaps=PERTURBATION_SWAPS):
+    """
+    Applies a few random swaps to a copy of a key.
+
+    Args:
+        key (list): The key list to start from.
+        rng (random.Random): The random generator.
+        swaps (int, optional): Number of swaps.
+
+    Returns:
+        list: The perturbed key.
+    """
+    key = key[:]
+    for _ in range(swaps):
+        i, j = random_swap(rng, len(key))
+        swap_chars(key, i, j)
+    return key
+
+def random_restart(restart, quadgrams, char_windows, words, key_len, seed=None, backend="python",
+                   search="hillclimb", schedule=None, start_key=None, deadline=None):
+    """
+    Runs the key search once from a random key, or from a perturbation of a given key.
+
+    Args:
+        restart (int): The number of the restart, used to derive its seed.
+        quadgrams (list): The distinct ciphertext windows with their counts.
+        char_windows (list): The windows containing each ciphertext character.
+        words (NgramTable): The n-gram score table.
+        key_len (int): The length of the key.
+        seed (int, optional): Base seed. When given, every restart shuffles with its own
+            generator, so the result does not depend on how restarts are distributed.
+        backend (str, optional): "python", or "numpy" to climb with batched NumPy scoring.
+        search (str, optional): "hillclimb", "anneal" or "tempering".
+        schedule (SearchSchedule, optional): Budget and temperatures of the annealing
+            searches.
+        start_key (list, optional): Key to perturb instead of shuffling a new one. The
+            first restart starts from it unchanged.
+        deadline (float, optional): `time.monotonic()` value at which to stop the search,
+            returning the key reached so far.
+
+    Returns:
+        tuple: The score reached, the key that reached it and the work it took: its
+        seconds and the change of every counter of `_search_counters`.
+    """
+    counters = dict(_search_counters)
+    started = time.perf_counter()
+    shuffler = random if seed is None else random.Random(f"{seed}:{restart}")
+    if start_key is None:
+        key = list(range(key_len))
+        shuffler.shuffle(key)
+    elif restart == 0:
+        key = start_key[:]
+    else:
+        key = perturb_key(start_key, shuffler)
+    if search == "anneal":
+        score = simulated_annealing(key, quadgrams, char_windows, words, key_len, shuffler, schedule, deadline)
+    elif search == "tempering":
+        score = parallel_tempering(key, quadgrams, char_windows, words, key_len, shuffler, schedule, deadline)
+    elif backend == "numpy":
+        score = numpy_frequency_analysis(key, quadgrams, words, deadline)
+    else:
+        score = frequency_analysis(key, quadgrams, char_windows, words, key_len, deadline)
+    work = {name: _search_counters[name] - counters[name] for name in counters}
+    work["seconds"] = time.perf_counter() - started
+    return score, key, work
+
+
+def share_score_table(words):
+    """
+    Copies a score table into shared memory so worker processes can read it in place.
+
+    Args:
+        words (NgramTable): The n-gram score table.
+
+    Returns:
+        tuple: The shared memory block, the table's item format and its size in bytes.
+    """
+    try:
+        table = memoryview(words.scores)
+    except TypeError:
+        table = memoryview(array.array('i', words.scores))
+    shared = shared_memory.SharedMemory(create=True, size=table.nbytes)
+    shared.buf[:table.nbytes] = table.cast('B')
+    return shared, table.format, table.nbytes
+
+
+_restart_worker = {}
+
+
+def init_restart_worker(shared_name, table_format, table_bytes, table_alphabet, table_order, quadgrams, char_windows,
+                        key_len, seed, backend, search, schedule, deadline, stats=False):
+    """
+    Initializes a worker process of the parallel key search.
+
+    Args:
+        shared_name (str): Name of the shared memory block holding the score table.
+        table_format (str): Item format of the score table.
+        table_bytes (int): Size of the score table in bytes.
+        table_alphabet (str): Alphabet of the score table.
+        table_order (int): N-gram order of the score table.
+        quadgrams (list): The distinct ciphertext windows with their counts.
+        char_windows (list): The windows containing each ciphertext character.
+        key_len (int): The length of the key.
+        seed (int): Base seed, or None.
+        backend (str): The search backend.
+        search (str): The search strategy.
+        schedule (SearchSchedule): Budget and temperatures of the annealing searches.
+        deadline (float): `time.monotonic()` value that ends the search, or None.
+        stats (bool, optional): Whether run metrics are collected.
+    """
+    enable_stats(stats)
+    # a forked worker inherits the parent's progress report, which it must not call
+    _progress_pulse.update(report=None)
+    shared = shared_memory.SharedMemory(name=shared_name)
+    scores = shared.buf[:table_bytes].cast(table_format)
+    words = NgramTable(np.asarray(scores) if backend == "numpy" else scores, table_alphabet, table_order)
+    _restart_worker.update(shared=shared, words=words, quadgrams=quadgrams, char_windows=char_windows,
+                           key_len=key_len, seed=seed, backend=backend, search=search, schedule=schedule,
+                           deadline=deadline)
+    random.seed()
+
+
+def run_restart_worker(task):
+    """
+    Runs one restart inside a worker process.
+
+    Args:
+        task (tuple): The number of the restart and the key it perturbs, or None.
+
+    Returns:
+        tuple: The score reached, the key that reached it and the work it took.
+    """
+    state = _restart_worker
+    restart, start_key = task
+    return random_restart(restart, state['quadgrams'], state['char_windows'], state['words'],
+                          state['key_len'], state['seed'], state['backend'], state['search'], state['schedule'],
+                          start_key, state['deadline'])
+
+
+def restart_tasks(start_key=None):
+    """
+    Yields the batches of restarts to run, as (restart, start key) pairs.
+
+    Without a start key every restart shuffles its own key and all of them form one
+    batch. Otherwise the first restart uses the start key and later batches of
+    `PERTURBATION_BATCH` restarts perturb the best key found before them; the generator
+    expects that key to be sent back after each batch.
+
+    Args:
+        start_key (list, optional): The key of the first restart.
+
+    Yields:
+        list: The tasks of the next batch.
+    """
+    if start_key is None:
+        yield [(restart, None) for restart in range(try_number)]
+        return
+    best_key = yield [(0, start_key)]
+    for first in range(1, try_number, PERTURBATION_BATCH):
+        best_key = yield [(restart, best_key) for restart in range(first, min(first + PERTURBATION_BATCH, try_number))]
+
+
+def pool_results(results, deadline=None):
+    """
+    Yields the results of a pool's `imap` until they run out or a deadline passes.
+
+    While it waits, progress is reported through `search_pulse`.
+
+    Args:
+        results (multiprocessing.pool.IMapIterator): The pending results.
+        deadline (float, optional): `time.monotonic()` value after which waiting stops.
+
+    Yields:
+        The results, in order.
+    """
+    while True:
+        timeout = PROGRESS_PULSE_INTERVAL
+        if deadline is not None:
+            timeout = min(timeout, max(0.0, deadline - time.monotonic()))
+        try:
+            result = results.next(timeout)
+        except StopIteration:
+            return
+        except multiprocessing.TimeoutError:
+            if search_pulse(deadline):
+                return
+            continue
+        yield result
+
+
+def restart_results(quadgrams, char_windows, words, key_len, workers=1, seed=None, backend="python",
+                    search="hillclimb", schedule=None, start_key=None, deadline=None):
+    """
+    Yields the outcome of each restart, in restart order.
+
+    With more than one worker the restarts run in a process pool that reads the score
+    table from shared memory. Results are still consumed in order, so the caller's
+    stopping rule sees exactly the sequence a single process would produce. Closing the
+    generator stops the pool. Past the deadline the running restarts return what they
+    reached so far, and no further restart is started.
+
+    Args:
+        quadgrams (list): The distinct ciphertext windows with their counts.
+        char_windows (list): The windows containing each ciphertext character.
+        words (NgramTable): The n-gram score table.
+        key_len (int): The length of the key.
+        workers (int, optional): Number of worker processes. Defaults to 1.
+        seed (int, optional): Base seed for reproducible restarts.
+        backend (str, optional): The search backend. Defaults to "python".
+        search (str, optional): The search strategy. Defaults to "hillclimb".
+        schedule (SearchSchedule, optional): Budget and temperatures of the annealing
+            searches.
+        start_key (list, optional): Key of the first restart; later restarts then perturb
+            the best key found so far instead of shuffling new ones.
+        deadline (float, optional): `time.monotonic()` value that ends the search.
+
+    Yields:
+        tuple: The score reached, the key that reached it and the work it took.
+    """
+    pool = shared = None
+    if workers > 1:
+        shared, table_format, table_bytes = share_score_table(words)
+        initargs = (shared.name, table_format, table_bytes, words.alphabet, words.order, quadgrams, char_windows,
+                    key_len, seed, backend, search, schedule, deadline, _run_stats["enabled"])
+        pool = multiprocessing.Pool(workers, init_restart_worker, initargs)
+    try:
+        best_score, best_key = None, start_key
+        batches = restart_tasks(start_key)
+        batch = next(batches)
+        while True:
+            if pool is None:
+                results = (random_restart(restart, quadgrams, char_windows, words, key_len, seed, backend,
+                                          search, schedule, task_key, deadline)
+                           for restart, task_key in batch if not deadline_passed(deadline))
+            else:
+                results = pool_results(pool.imap(run_restart_worker, batch), deadline)
+            for score, key, work in results:
+                if best_score is None or score > best_score:
+                    best_score, best_key = score, key
+                yield score, key, work
+            if deadline_passed(deadline):
+                return
+            try:
+                batch = batches.send(best_key)
+            except StopIteration:
+                return
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+            shared.close()
+            shared.unlink()
+
+
+class TopKeys:
+    """
+    The best distinct keys a breaker found, with their scores.
+
+    The keys are kept in a min-heap of at most `size` entries, so offering a key costs
+    O(log size) and one that does not beat the worst key kept is turned away at once.
+    A set of the kept keys drops repeats by their hash, so keys must be hashable, such
+    as tuples, strings or ints. Of keys with equal scores, the first one offered ranks
+    first.
+    """
+
+    def __init__(self, size):
+        """
+        Creates an empty collection.
+
+        Args:
+            size (int): The number of keys to keep.
+
+        Raises:
+            ValueError: If the size is not positive.
+        """
+        if size < 1:
+            raise ValueError("at least one key must be kept")
+        self.size = size
+        self._heap = []
+        self._keys = set()
+        self._offered = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def add(self, score, key):
+        """
+        Offers a key.
+
+        Args:
+            score (int): The score of the key, higher is better.
+            key: The key.
+
+        Returns:
+            bool: True if the key is kept.
+        """
+        if key in self._keys:
+            return False
+        self._offered += 1
+        # the offer number breaks ties, so keys themselves are never compared
+        entry = (score, -self._offered, key)
+        if len(self._heap) < self.size:
+            heapq.heappush(self._heap, entry)
+        elif entry > self._heap[0]:
+            self._keys.discard(heapq.heapreplace(self._heap, entry)[2])
+        else:
+            return False
+        self._keys.add(key)
+        return True
+
+    def ranked(self):
+        """
+        Lists the kept keys.
+
+        Returns:
+            list: (score, key) pairs, best first.
+        """
+        return [(score, key) for score, _, key in sorted(self._heap, reverse=True)]
+
+    def clear(self):
+        """
+        Drops every key.
+        """
+        self._heap.clear()
+        self._keys.clear()
+
+    def relabel(self, convert):
+        """
+        Replaces every key by another form of it, keeping the scores and the ranking.
+
+        Args:
+            convert (callable): Function returning the new form of a key.
+        """
+        ranked = self.ranked()
+        self.clear()
+        for score, key in ranked:
+            self.add(score, convert(key))
+
+
+def search_key(cipher_bin, alphabet, words, workers=1, seed=None, backend="python", search="hillclimb",
+               schedule=None, init="random", deadline=None, on_improvement=None, on_progress=None, top=None):
+    """
+    Runs the restarted key search on a ciphertext converted to letter indices.
+
+    Restarts run until the best score has been reached `limitnumber` times, the
+    restarts run out or the deadline passes. The arguments are those of `find_key`.
+
+    Args:
+        cipher_bin (bytes): The binary representation of the cipher text.
+        alphabet (str): The alphabet used for the cipher.
+        words (NgramTable): The n-gram score table.
+        top (TopKeys, optional): Receives the key of every restart as a tuple of
+            ciphertext characters, with its score.
+
+    Returns:
+        list: The key list, mapping plaintext indices to ciphertext characters.
+    """
+    key_len = len(alphabet)
+    schedule = schedule or SearchSchedule()
+    if backend == "numpy" and (np is None or search != "hillclimb"):
+        backend = "python"
+    if backend == "numpy":
+        quadgrams, char_windows = numpy_group_windows(cipher_bin, key_len, words.order), None
+        words = words.with_scores(np.asarray(words.scores))
+    else:
+        quadgrams, char_windows = group_quadgram_windows(cipher_bin, key_len, words.order)
+    curren_max, current_max_shot = 0, 1
+    final_key = list(range(key_len))
+    start_key = frequency_seeded_key(cipher_bin, alphabet) if init == "frequency" else None
+    started = time.monotonic()
+    restarts = evaluations = 0
+    counted = _search_counters["evaluations"]
+
+    def report():
+        # in this process the counter also holds the swaps of the running restart
+        running = max(evaluations, _search_counters["evaluations"] - counted)
+        on_progress(SearchProgress(restarts, running, time.monotonic() - started, curren_max))
+
+    pulse = progress_pulse(report) if on_progress is not None else contextlib.nullcontext()
+    results = restart_results(quadgrams, char_windows, words, key_len, workers, seed, backend, search, schedule,
+                              start_key, deadline)
+    try:
+        with pulse:
+            for result, key, work in results:
+                restarts += 1
+                evaluations += work["evaluations"]
+                if _run_stats["enabled"]:
+                    record_restart(search, backend, work)
+                if top is not None:
+                    top.add(int(result), tuple(key))
+                if on_progress is not None:
+                    on_progress(SearchProgress(restarts, evaluations, time.monotonic() - started,
+                                               max(result, curren_max)))
+                if result > curren_max:
+                    curren_max = result
+                    current_max_shot = 1
+                    final_key = key
+                    if on_improvement is not None:
+                        on_improvement(result, "".join(alphabet[a] for a in key))
+                elif result == curren_max:
+                    current_max_shot += 1
+                    if current_max_shot == limitnumber:
+                        break
+    finally:
+        results.close()
+    return final_key
+
+
+def sample_letters(cipher_bin, size, chunk=SAMPLE_CHUNK):
+    """
+    Takes evenly spaced runs of letters from a ciphertext.
+
+    Runs of consecutive letters keep almost all of their quadgrams, and spreading them
+    over the whole text keeps the sample representative of it.
+
+    Args:
+        cipher_bin (bytes): The binary representation of the cipher text.
+        size (int): Number of letters to take.
+        chunk (int, optional): Length of each run.
+
+    Returns:
+        bytes: The sample, or the whole ciphertext if it is not longer than `size`.
+    """
+    if len(cipher_bin) <= size:
+        return cipher_bin
+    runs = max(1, size // chunk)
+    chunk = size // runs
+    stride = len(cipher_bin) // runs
+    return b"".join(cipher_bin[run * stride:run * stride + chunk] for run in range(runs))
+
+
+def sampled_key_search(cipher_bin, alphabet, words, sample, grow_sample=False, on_progress=None, top=None,
+                       **options):
+    """
+    Searches for the key on a sample of a long ciphertext and confirms it on all of it.
+
+    The key search cost grows with the number of distinct quadgrams of the text, but a
+    few thousand letters already settle a substitution key. The search runs on a sample
+    of `sample` letters; when growing, the sample doubles until two successive keys
+    decrypt it identically or it covers the whole text. The key is then verified on the
+    full ciphertext, and the other keys of the last sample are rescored on it.
+
+    Args:
+        cipher_bin (bytes): The binary representation of the cipher text.
+        alphabet (str): The alphabet used for the cipher.
+        words (NgramTable): The n-gram score table.
+        sample (int): Number of letters of the (first) sample.
+        grow_sample (bool, optional): Whether to double the sample until the key is stable.
+        on_progress (callable, optional): Called with a `SearchProgress` after every
+            restart and while one runs, counting the restarts of all samples.
+        top (TopKeys, optional): Receives the verified key and the best other keys of
+            the last sample, as tuples, with their scores on the whole ciphertext.
+        **options: The other keyword arguments of `search_key`.
+
+    Returns:
+        list: The key list, mapping plaintext indices to ciphertext characters.
+    """
+    started = time.monotonic()
+    finished = latest = SearchProgress(0, 0, 0.0, 0)
+
+    def report(progress):
+        nonlocal latest
+        latest = SearchProgress(finished.restarts + progress.restarts, finished.evaluations + progress.evaluations,
+                                time.monotonic() - started, progress.best_score)
+        if on_progress is not None:
+            on_progress(latest)
+
+    size, key = sample, None
+    while True:
+        part = sample_letters(cipher_bin, size)
+        if top is not None:
+            top.clear()
+        previous, key = key, search_key(part, alphabet, words, on_progress=report, top=top, **options)
+        finished = latest
+        if (not grow_sample or len(part) == len(cipher_bin) or deadline_passed(options.get('deadline'))
+                or (previous is not None and decrypt_bin(key, part) == decrypt_bin(previous, part))):
+            break
+        size *= 2
+    key = verify_key(cipher_bin, part, key, words, options.get('deadline'))
+    if top is not None:
+        found = [tuple(key)] + [candidate for _, candidate in top.ranked()]
+        top.clear()
+        quadgrams, _ = group_quadgram_windows(cipher_bin, len(key), words.order)
+        for candidate in found:
+            top.add(quadgram_fitness(quadgrams, invert_key(candidate), words), candidate)
+    return key
+
+
+def climb_letters(key, chars, quadgrams, char_windows, words, deadline=None):
+    """
+    Hill-climbs a key with only the swaps that move some given ciphertext characters.
+
+    Args:
+        key (list): The key list to improve, updated in place.
+        chars (list): The ciphertext characters whose plaintext letters may change.
+        quadgrams (list): The distinct ciphertext windows with their counts.
+        char_windows (list): The windows containing each ciphertext character.
+        words (NgramTable): The n-gram score table.
+        deadline (float, optional): `time.monotonic()` value at which to stop climbing.
+
+    Returns:
+        int: The score of the key.
+    """
+    mapping = invert_key(key)
+    score = quadgram_fitness(quadgrams, mapping, words)
+    found = True
+    while found:
+        found = False
+        for char in chars:
+            if search_pulse(deadline):
+                return score
+            for j in range(len(key)):
+                i = mapping[char]
+                if i != j:
+                    score, improved = key_swap_and_evaluation(key, i, j, mapping, char_windows, words, score)
+                    found = found or improved
+    return score
+
+
+def verify_key(cipher_bin, part, key, words, deadline=None):
+    """
+    Confirms a key found on a sample against the whole ciphertext.
+
+    Letters the sample held too rarely to settle are hill-climbed on all the windows of
+    the text, with only the swaps that move them. The key's score per window on the
+    whole text is then compared with the sample's. A sample that did not represent
+    the text falls short, and the key is then climbed with every swap on the whole text.
+
+    Args:
+        cipher_bin (bytes): The binary representation of the cipher text.
+        part (bytes): The sample the key was found on.
+        key (list): The key found on the sample.
+        words (NgramTable): The n-gram score table.
+        deadline (float, optional): `time.monotonic()` value after which nothing is changed.
+
+    Returns:
+        list: The confirmed (possibly corrected) key.
+    """
+    key = key[:]
+    with stats_phase("verify_key"):
+        in_sample, in_text = collections.Counter(part), collections.Counter(cipher_bin)
+        unsettled = [char for char in in_text if in_sample[char] < SETTLED_LETTER_COUNT]
+        quadgrams, char_windows = group_quadgram_windows(cipher_bin, len(key), words.order)
+        score = climb_letters(key, unsettled, quadgrams, char_windows, words, deadline)
+        sample_quadgrams, _ = group_quadgram_windows(part, len(key), words.order)
+        sample_score = quadgram_fitness(sample_quadgrams, invert_key(key), words)
+        windows = len(cipher_bin) - words.order + 1
+        if score / windows < SAMPLE_CONFIRMATION_RATIO * sample_score / max(1, len(part) - words.order + 1):
+            frequency_analysis(key, quadgrams, char_windows, words, len(key), deadline)
+    return key
+
+
+def find_key(ciphertext, alphabet, words, workers=1, seed=None, backend="python", search="hillclimb",
+             schedule=None, init="random", deadline=None, on_improvement=None, on_progress=None,
+             sample=None, grow_sample=False, top=None):
+    """
+    Finds the decryption key for the given ciphertext.
+
+    Args:
+        ciphertext (str): The ciphertext to decrypt, or its letter indices as returned by
+            `char_to_number` or `read_letter_indices`.
+        alphabet (str): The alphabet used for the cipher.
+        words (NgramTable): The n-gram score table.
+        workers (int, optional): Number of processes running restarts. Defaults to 1.
+        seed (int, optional): Seed that makes the search reproducible, whatever the
+            number of workers.
+        backend (str, optional): "python", or "numpy" to score all swaps of a key in one
+            batch. Falls back to "python" when NumPy is not installed.
+        search (str, optional): "hillclimb" to climb from every restart, or "anneal" or
+            "tempering" to run simulated annealing or parallel tempering, which need far
+            fewer restarts on short ciphertexts. These always use the python backend.
+        schedule (SearchSchedule, optional): Budget and temperatures of the annealing
+            searches. Defaults to `SearchSchedule()`.
+        init (str, optional): "random" to start every restart from a shuffled key, or
+            "frequency" to start from the key matching the ciphertext letter frequencies
+            to ETAOIN and then perturb the best key found so far.
+        deadline (float, optional): `time.monotonic()` value at which the search stops and
+            returns the best key found so far, whether or not it has converged.
+        on_improvement (callable, optional): Called as on_improvement(score, key) each
+            time a better key is found.
+        on_progress (callable, optional): Called with a `SearchProgress` after every
+            restart, and every `PROGRESS_PULSE_INTERVAL` seconds while restarts run.
+        sample (int, optional): Search on a sample of this many letters spread over a
+            longer ciphertext, then confirm the key on the whole of it.
+        grow_sample (bool, optional): Double the sample after each search until two
+            successive keys decrypt it the same way, starting from `sample` letters or
+            `GROWING_SAMPLE_START`.
+        top (TopKeys, optional): Receives the best distinct keys of the restarts, as
+            decryption keys like the one returned, with their scores on the whole
+            ciphertext.
+
+    Returns:
+        str: The decryption key.
+
+    Raises:
+        ValueError: If the alphabet is not the alphabet of the score table.
+    """
+    if alphabet.lower() != words.alphabet:
+        raise ValueError("the key alphabet must be the alphabet of the score table")
+    cipher_bin = char_to_number(ciphertext, alphabet) if isinstance(ciphertext, str) else ciphertext
+    options = dict(workers=workers, seed=seed, backend=backend, search=search, schedule=schedule, init=init,
+                   deadline=deadline, on_improvement=on_improvement, on_progress=on_progress, top=top)
+    if grow_sample and not sample:
+        sample = GROWING_SAMPLE_START
+    if sample and len(cipher_bin) > sample:
+        final_key = sampled_key_search(cipher_bin, alphabet, words, sample, grow_sample, **options)
+    else:
+        final_key = search_key(cipher_bin, alphabet, words, **options)
+    result = ""
+    for a in final_key:
+        result += alphabet[a]
+    if top is not None:
+        top.relabel(lambda key: "".join(alphabet[a] for a in key))
+    return result
+
+def key_mapping(decryption_key, alphabet):
+    """
+    Maps the decryption key to the alphabet.
+
+    Args:
+        decryption_key (str): The decryption key.
+        alphabet (str): The alphabet used for the cipher.
+
+    Returns:
+        dict: A dictionary mapping each character in the alphabet to the decryption key.
+
+    Raises:
+        ValueError: If the decryption key length does not match the alphabet length.
+    """
+    if len(decryption_key) != len(alphabet):
+        raise ValueError("The decryption key and the alphabet must have the same length.")
+    mapping = {}
+    for original_char, mapped_char in zip(alphabet, decryption_key):
+        mapping[original_char] = mapped_char
+    return mapping
+
+def monoalphabetic_decrypt(ciphered_text, find_key1):
+    """
+    Decrypts the given ciphered text using the Monoalphabetic cipher technique.
+
+    Args:
+        ciphered_text (str): The text to be decrypted.
+        find_key1 (dict): The key alphabet for the Monoalphabetic cipher.
+
+    Returns:
+        str: The decrypted text.
+    """
+    def convert(char):
+        lower = char.lower()
+        if lower in find_key1:
+            return find_key1[lower].upper() if char.isupper() else find_key1[lower]
+        return char
+    return ciphered_text.translate(TranslationTable(convert))
+
+
+def monoalphabetic_decrypt_chunks(data, find_key1, chunk_size=CHUNK_SIZE):
+    """
+    Decrypts the UTF-8 bytes of a ciphertext, such as a memory-mapped file, one chunk
+    at a time.
+
+    Line endings are normalized to newlines as when the file is read as text.
+
+    Args:
+        data (bytes): The bytes of the ciphertext, or an mmap of them.
+        find_key1 (dict): The key alphabet for the Monoalphabetic cipher.
+        chunk_size (int, optional): Bytes decrypted at a time.
+
+    Yields:
+        str: The decrypted text of the next chunk.
+    """
+    decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder('utf-8')(), translate=True)
+    for start in range(0, len(data), chunk_size):
+        yield monoalphabetic_decrypt(decoder.decode(data[start:start + chunk_size]), find_key1)
+    yield monoalphabetic_decrypt(decoder.decode(b'', final=True), find_key1)
+
+
+
+def extract_potential_words(decoded_text):
+    """
+    Extracts potential words from the decoded text.
+
+    Args:
+        decoded_text (str): The decoded text.
+
+    Returns:
+        list: A list of potential words.
+    """
+    words = re.findall(r'\b[a-zA-Z]+\b', decoded_text)
+    return words
+
+def load_dictionary(path=DICTIONARY_FILE):
+    """
+    Loads the dictionary from a file.
+
+    Args:
+        path (str, optional): Path of the dictionary file. Defaults to `dictionary.txt`.
+
+    Returns:
+        set: A set of dictionary words.
+    """
+    with open(path, 'r') as file:
+        dictionary_words = set(word.strip().lower() for word in file)
+    return dictionary_words
+
+
+def extract_longest_word(text):
+    """
+    Extracts the longest word from the text.
+
+    Args:
+        text (str): The text to extract the longest word from.
+
+    Returns:
+        str: The longest word, or None if no word is found.
+    """
+    words = re.findall(r'\b[a-zA-Z]+\b', text)
+    return max(words, key=len) if words else None
+
+
+
+def letter_histogram(text):
+    """
+    Counts the letters of a text, ignoring case, in a single pass.
+
+    Args:
+        text (str): The text to count.
+
+    Returns:
+        list: The count of each letter of the English alphabet.
+    """
+    counts = collections.Counter(text)
+    return [counts[lower] + counts[upper] for lower, upper in zip(string.ascii_lowercase, string.ascii_uppercase)]
+
+
+def chi_squared(histogram, shift, a=1, frequencies=ENGLISH_LETTER_FREQUENCIES):
+    """
+    Measures how far a ciphertext histogram, mapped back through a key, is from English.
+
+    The key encrypts plaintext letter x to ciphertext letter (a * x + shift) % 26, which
+    covers both the Caesar (a = 1) and the Affine cipher.
+
+    Args:
+        histogram (list): The letter counts of the ciphertext.
+        shift (int): The additive key, i.e. the shift that decrypts with `encrypt_caesar`.
+        a (int, optional): The multiplicative key. Defaults to 1.
+        frequencies (list, optional): The expected letter frequencies.
+
+    Returns:
+        float: The chi-squared statistic; lower is closer to English.
+    """
+    total = sum(histogram)
+    statistic = 0.0
+    for letter, frequency in enumerate(frequencies):
+        expected = total * max(frequency, MIN_LETTER_FREQUENCY)
+        observed = histogram[(a * letter + shift) % 26]
+        statistic += (observed - expected) ** 2 / expected
+    return statistic
+
+
+def index_of_coincidence(histogram):
+    """
+    Computes the probability that two letters drawn from a text are the same.
+
+    Args:
+        histogram (list): The letter counts of the text.
+
+    Returns:
+        float: The index of coincidence, 0.0 for fewer than two letters.
+    """
+    total = sum(histogram)
+    if total < 2:
+        return 0.0
+    return sum(count * (count - 1) for count in histogram) / (total * (total - 1))
+
+
+def shape_statistic(histogram, frequencies=ENGLISH_LETTER_FREQUENCIES):
+    """
+    Measures how far the shape of a histogram is from English, whatever letters it uses.
+
+    The counts and the expected frequencies are both sorted before the chi-squared
+    statistic is taken, which is the lowest statistic any substitution key can reach.
+
+    Args:
+        histogram (list): The letter counts of the ciphertext.
+        frequencies (list, optional): The expected letter frequencies.
+
+    Returns:
+        float: The chi-squared statistic of the sorted histogram.
+    """
+    total = sum(histogram)
+    expected_counts = [total * max(frequency, MIN_LETTER_FREQUENCY) for frequency in sorted(frequencies, reverse=True)]
+    return sum((observed - expected) ** 2 / expected
+               for observed, expected in zip(sorted(histogram, reverse=True), expected_counts))
+
+
+def cipher_profile(ciphertext, model=None):
+    """
+    Computes the statistics that tell the ciphers apart, from one pass over the text.
+
+    The letter histogram gives the index of coincidence and the shape statistic, and is
+    then matched against English under all 312 Affine keys, the 26 with a = 1 being the
+    Caesar shifts.
+
+    Args:
+        ciphertext (str): The text to examine.
+        model (LanguageModel, optional): Model supplying the letter frequencies.
+
+    Returns:
+        CipherProfile: The statistics, or None if the ciphertext holds no letters.
+    """
+    histogram = letter_histogram(ciphertext)
+    if not any(histogram):
+        return None
+    frequencies = ENGLISH_LETTER_FREQUENCIES if model is None else model.letter_frequencies
+    statistics = {(a, b): chi_squared(histogram, b, a, frequencies) for a in AFFINE_INVERSES for b in range(26)}
+    shift = min(range(26), key=lambda b: statistics[1, b])
+    affine_key = min(statistics, key=statistics.get)
+    return CipherProfile(sum(histogram), index_of_coincidence(histogram), shape_statistic(histogram, frequencies),
+                         shift, statistics[1, shift], affine_key, statistics[affine_key], histogram)
+
+
+def profile_fits(profile, statistic):
+    """
+    Checks whether a key's statistic is close enough to the shape statistic to be the key.
+
+    A histogram flattened by several alphabets is close to every key, so it fits none.
+
+    Args:
+        profile (CipherProfile): The ciphertext statistics.
+        statistic (float): The chi-squared statistic of the best key of a cipher.
+
+    Returns:
+        bool: True if the histogram looks like a rotation or Affine map of English.
+    """
+    return not looks_polyalphabetic(profile) and statistic <= AFFINE_FIT_RATIO * max(profile.shape_statistic, 1.0)
+
+
+def looks_polyalphabetic(profile):
+    """
+    Checks whether the letters are too evenly spread for a single substitution alphabet.
+
+    Args:
+        profile (CipherProfile): The ciphertext statistics.
+
+    Returns:
+        bool: True if the text is long enough and its index of coincidence is low.
+    """
+    return (profile.letters >= INDEX_OF_COINCIDENCE_MIN_LETTERS
+            and profile.index_of_coincidence < POLYALPHABETIC_INDEX_OF_COINCIDENCE)
+
+
+def describe_profile(profile):
+    """
+    Describes the ciphertext statistics in one sentence per finding.
+
+    Args:
+        profile (CipherProfile): The ciphertext statistics.
+
+    Returns:
+        str: The description.
+    """
+    lines = [f"{profile.letters} letters, index of coincidence {profile.index_of_coincidence:.4f} "
+             f"(English {ENGLISH_INDEX_OF_COINCIDENCE}, random {RANDOM_INDEX_OF_COINCIDENCE:.4f})."]
+    if looks_polyalphabetic(profile):
+        lines.append("The letters are spread too evenly for a single substitution alphabet.")
+    if profile_fits(profile, profile.shift_statistic):
+        lines.append(f"The histogram is a rotation of English (shift {profile.shift}).")
+    elif profile_fits(profile, profile.affine_statistic):
+        lines.append(f"The histogram is an Affine map of English (a={profile.affine_key[0]}, b={profile.affine_key[1]}).")
+    else:
+        lines.append("The histogram is neither a rotation nor an Affine map of English.")
+    return "\n".join(lines)
+
+
+def rank_candidates(ciphertext, statistics, decrypt, words=None, sample_size=QUADGRAM_CHECK_SAMPLE_SIZE):
+    """
+    Ranks candidate keys by their chi-squared statistics.
+
+    When a score table is given, the best few candidates are also decrypted on a sample
+    of the ciphertext and reordered by quadgram fitness, which settles near ties.
+
+    Args:
+        ciphertext (str): The text to be decrypted.
+        statistics (dict): The chi-squared statistic of each candidate key.
+        decrypt (callable): Function decrypting a text with a key, as decrypt(text, key).
+        words (NgramTable, optional): The n-gram score table for the quadgram check.
+        sample_size (int, optional): Number of ciphertext characters in the quadgram check.
+
+    Returns:
+        list: (key, confidence) pairs, best first. The confidence is the relative
+        likelihood of the key among all candidates, derived from its statistic.
+    """
+    best = min(statistics.values())
+    likelihoods = {key: math.exp((best - statistic) / 2) for key, statistic in statistics.items()}
+    total = sum(likelihoods.values())
+    ranked = sorted(((key, likelihood / total) for key, likelihood in likelihoods.items()),
+                    key=lambda candidate: candidate[1], reverse=True)
+    if words is not None:
+        sample = ciphertext[:sample_size]
+        head = sorted(ranked[:QUADGRAM_CHECK_CANDIDATES],
+                      key=lambda candidate: text_fitness(decrypt(sample, candidate[0]), words), reverse=True)
+        ranked[:QUADGRAM_CHECK_CANDIDATES] = head
+    return ranked
+
+
+def offer_ranked_keys(top, ranked, ciphertext, decrypt, words, sample_size=QUADGRAM_CHECK_SAMPLE_SIZE):
+    """
+    Offers the best keys of a ranking, scored by the n-gram fitness of their decryption
+    of a sample of the ciphertext.
+
+    Args:
+        top (TopKeys): Receives the keys.
+        ranked (list): (key, confidence) pairs, best first.
+        ciphertext (str): The text to be decrypted.
+        decrypt (callable): Function decrypting a text with a key, as decrypt(text, key).
+        words (NgramTable): The n-gram score table.
+        sample_size (int, optional): Number of ciphertext characters decrypted.
+    """
+    sample = ciphertext[:sample_size]
+    for key, _ in ranked[:top.size]:
+        top.add(text_fitness(decrypt(sample, key), words), key)
+
+
+def describe_top_keys(top):
+    """
+    Describes the best keys found, one line per key.
+
+    Args:
+        top (TopKeys): The keys.
+
+    Returns:
+        str: The numbered keys with their scores, best first.
+    """
+    return "\n".join(f"{rank}. {key}: score {score}" for rank, (score, key) in enumerate(top.ranked(), 1))
+
+
+def rank_caesar_shifts(ciphertext, model=None, sample_size=QUADGRAM_CHECK_SAMPLE_SIZE, histogram=None):
+    """
+    Ranks all 26 Caesar shifts by how English the decryption looks.
+
+    The ciphertext is read once to build its letter histogram; each shift is then scored
+    by rotating the histogram against English letter frequencies (chi-squared), with an
+    optional quadgram check of the best shifts.
+
+    Args:
+        ciphertext (str): The text to be decrypted.
+        model (LanguageModel, optional): Model supplying the letter frequencies and the
+            quadgram check. Without one, standard English frequencies are used and the
+            quadgram check is skipped.
+        sample_size (int, optional): Number of ciphertext characters in the quadgram check.
+        histogram (list, optional): The letter histogram of the ciphertext, if it was
+            already counted.
+
+    Returns:
+        list: (shift, confidence) pairs, best first, or an empty list if the ciphertext
+        holds no letters.
+    """
+    histogram = histogram or letter_histogram(ciphertext)
+    if not any(histogram):
+        return []
+    frequencies, words = model_statistics(model)
+    statistics = {shift: chi_squared(histogram, shift, 1, frequencies) for shift in range(26)}
+    return rank_candidates(ciphertext, statistics, encrypt_caesar, words, sample_size)
+
+
+def decrypt_caesar(ciphertext, model, top=None):
+    """
+    Decrypts the given ciphertext using the Caesar cipher technique.
+
+    Args:
+        ciphertext (str): The text to be decrypted.
+        model (LanguageModel): The language model to score decryptions with.
+        top (TopKeys, optional): Receives the best shifts with their scores.
+
+    Returns:
+        str: The decrypted text, or None if no valid decryption is found.
+    """
+    ranked = rank_caesar_shifts(ciphertext, model)
+    if not ranked:
+        print("No valid word found in ciphertext.")
+        return None
+    if top is not None:
+        offer_ranked_keys(top, ranked, ciphertext, encrypt_caesar, model.ngrams)
+
+    shift, confidence = ranked[0]
+    decrypted_text = encrypt_caesar(ciphertext, shift).strip()
+    print(f"Shift {shift}: confidence {confidence:.2%}. Decrypting the entire text...")
+    print(decrypted_text)
+    return decrypted_text
+
+
+def model_statistics(model):
+    """
+    Picks the letter frequencies and score table the key rankings use.
+
+    Args:
+        model (LanguageModel): The language model, or None.
+
+    Returns:
+        tuple: The letter frequencies and the quadgram score table (None without a model).
+    """
+    if model is None:
+        return ENGLISH_LETTER_FREQUENCIES, None
+    return model.letter_frequencies, model.ngrams
+
+
+def dictionary_hit_ratio(text, dictionary):
+    """
+    Computes the share of the words of a text that are dictionary words.
+
+    Args:
+        text (str): The text to check.
+        dictionary (set): The set of dictionary words.
+
+    Returns:
+        float: The ratio of dictionary words, 0.0 for a text without words.
+    """
+    return redact_text(text, dictionary)[1]
+
+
+def redact_text(input_text, dictionary):
+    """
+    Redacts the words of a text that are not in the dictionary and measures how many are.
+
+    The text is split into tokens once; each distinct token is then looked up a single
+    time, however often it occurs, and the redacted text is joined back from the pieces.
+    Only purely alphabetic words are checked: tokens with digits, underscores,
+    apostrophes or inner hyphens are kept as they are and not counted.
+
+    Args:
+        input_text (str): The text to be validated.
+        dictionary (set): A set of valid dictionary words.
+
+    Returns:
+        tuple: The validated text with non-dictionary words redacted, and the ratio of
+        checked words found in the dictionary (0.0 for a text without words).
+    """
+    validated, found, checked = redact_counts(input_text, dictionary)
+    return validated, (found / checked if checked else 0.0)
+
+
+def redact_counts(input_text, dictionary):
+    """
+    Redacts the words of a text that are not in the dictionary, like `redact_text`,
+    and counts the words checked and found.
+
+    Args:
+        input_text (str): The text to be validated.
+        dictionary (set): A set of valid dictionary words.
+
+    Returns:
+        tuple: The validated text, the number of checked words found in the dictionary
+        and the number of checked words.
+    """
+    with stats_phase("validate_text"):
+        pieces = VALIDATION_TOKEN.split(input_text)
+        tokens = pieces[1::2]
+        replacements = {}
+        checked = found = 0
+        for token, count in collections.Counter(tokens).items():
+            replacements[token] = token
+            # a token ends in punctuation only when another word follows it directly
+            word = token[:-1] if token[-1] in '.,!?' else token.rstrip("'-")
+            if not word.isalpha():
+                continue
+            checked += count
+            if word.lower() in dictionary:
+                found += count
+            else:
+                replacements[token] = REDACTED + token[len(word):]
+        pieces[1::2] = map(replacements.__getitem__, tokens)
+        return ''.join(pieces), found, checked
+
+
+def write_validated_chunks(chunks, path, dictionary):
+    """
+    Redacts a text that arrives in chunks and writes it to a file as it goes.
+
+    Each chunk is cut after its last whitespace character, which no token spans, and
+    the rest is carried over to the next chunk. The file so gets the text `redact_text`
+    would give for the whole of it, while only about one chunk is held in memory.
+    When the carried text grows longer than the longest dictionary word, it is cut
+    before its last token instead. A last token that is itself longer is written right
+    away, as an unknown word or, when it is no word at all, as it is, and the rest of
+    it is skipped or copied in the next chunks.
+
+    Args:
+        chunks (iterable): The pieces of the text, in order.
+        path (str): The output file.
+        dictionary (set): A set of valid dictionary words.
+
+    Returns:
+        float: The ratio of checked words found in the dictionary.
+    """
+    found = checked = 0
+    carried = ''
+    longest = max(map(len, dictionary), default=0)
+    # how the rest of a token too long for a dictionary word is written: None outside
+    # of one, "redacted" to skip it or "unchecked" to copy it
+    overlong = None
+    with open(path, 'w') as file:
+        for chunk in chunks:
+            text = carried + chunk
+            if overlong:
+                end = VALIDATION_TOKEN_TAIL.match(text).end()
+                if overlong == "unchecked":
+                    file.write(text[:end])
+                text = text[end:]
+                overlong = overlong if not text else None
+            cut = max(text.rfind(char) for char in string.whitespace) + 1
+            last = None
+            if len(text) - cut > longest:
+                for last in VALIDATION_TOKEN.finditer(text, cut):
+                    pass
+                # a token can only go on into the next chunk when it ends the text,
+                # perhaps but for the punctuation mark it takes when a word follows
+                if last is None or text[last.end():] not in ('', '.', ',', '!', '?'):
+                    cut, last = len(text), None
+                else:
+                    cut = last.start()
+            validated, chunk_found, chunk_checked = redact_counts(text[:cut], dictionary)
+            file.write(validated)
+            found, checked, carried = found + chunk_found, checked + chunk_checked, text[cut:]
+            if last is not None and last.end() - last.start() > longest:
+                carried = text[last.end():]
+                if last.group().rstrip("'-").isalpha():
+                    file.write(REDACTED)
+                    checked, overlong = checked + 1, "redacted"
+                else:
+                    file.write(last.group())
+                    overlong = "unchecked"
+        validated, chunk_found, chunk_checked = redact_counts(carried, dictionary)
+        file.write(validated)
+    found, checked = found + chunk_found, checked + chunk_checked
+    return found / checked if checked else 0.0
+
+
+def validate_text(input_text, dictionary):
+    """
+    Validates the input text by redacting words that are not found in the provided dictionary.
+
+    Args:
+        input_text (str): The text to be validated.
+        dictionary (set): A set of valid dictionary words.
+
+    Returns:
+        str: The validated text with non-dictionary words redacted.
+    """
+    return redact_text(input_text, dictionary)[0]
+
+
+def mod_inverse(a, m):
+    """
+    Finds the modular inverse of a with respect to m.
+
+    Args:
+        a (int): The number to find the modular inverse of.
+        m (int): The modulus.
+
+    Returns:
+        int: The modular inverse, or None if no inverse exists.
+    """
+    for x in range(1, m):
+        if (a * x) % m == 1:
+            return x
+    return None
+
+def coprime_with_26(a):
+    """
+    Checks if a is coprime with 26.
+
+    Args:
+        a (int): The number to check.
+
+    Returns:
+        bool: True if a is coprime with 26, False otherwise.
+    """
+    return mod_inverse(a, 26) is not None
+
+def rank_affine_keys(ciphertext, model=None, sample_size=QUADGRAM_CHECK_SAMPLE_SIZE, histogram=None):
+    """
+    Ranks all 312 Affine keys by how English the decryption looks.
+
+    Every key is scored against the same letter histogram of the ciphertext, so the
+    ciphertext is read once whatever its first words are; the best keys can also be
+    checked with quadgram scoring on a sample.
+
+    Args:
+        ciphertext (str): The text to be decrypted.
+        model (LanguageModel, optional): Model supplying the letter frequencies and the
+            quadgram check. Without one, standard English frequencies are used and the
+            quadgram check is skipped.
+        sample_size (int, optional): Number of ciphertext characters in the quadgram check.
+        histogram (list, optional): The letter histogram of the ciphertext, if it was
+            already counted.
+
+    Returns:
+        list: ((a, b), confidence) pairs, best first, or an empty list if the ciphertext
+        holds no letters.
+    """
+    histogram = histogram or letter_histogram(ciphertext)
+    if not any(histogram):
+        return []
+    frequencies, words = model_statistics(model)
+    statistics = {(a, b): chi_squared(histogram, b, a, frequencies) for a in AFFINE_INVERSES for b in range(26)}
+    return rank_candidates(ciphertext, statistics, lambda text, key: decrypt_affine_with_keys(text, *key),
+                           words, sample_size)
+
+def decrypt_affine_with_keys(ciphertext, a, b):
+    """
+    Decrypts the given ciphertext using the Affine cipher technique with specified keys.
+
+    Args:
+        ciphertext (str): The text to be decrypted.
+        a (int): The multiplicative key.
+        b (int): The additive key.
+
+    Returns:
+        str: The decrypted text, or None if no valid decryption is found.
+    """
+    a_inv = AFFINE_INVERSES.get(a % 26)
+    if a_inv is None:
+        return None
+
+    return ciphertext.translate(affine_decryption_table(a_inv, b))
+
+def decrypt_affine(ciphertext, model, top=None):
+    """
+    Decrypts the given ciphertext using the Affine cipher technique by ranking every key.
+
+    Args:
+        ciphertext (str): The text to be decrypted.
+        model (LanguageModel): The language model to score decryptions with.
+        top (TopKeys, optional): Receives the best (a, b) keys with their scores.
+
+    Returns:
+        str: The decrypted text, or None if no valid decryption is found.
+    """
+    ranked = rank_affine_keys(ciphertext, model)
+    if not ranked:
+        return None
+    if top is not None:
+        offer_ranked_keys(top, ranked, ciphertext, lambda text, key: decrypt_affine_with_keys(text, *key),
+                          model.ngrams)
+    (a, b), confidence = ranked[0]
+    print(f"Key a={a}, b={b}: confidence {confidence:.2%}.")
+    return decrypt_affine_with_keys(ciphertext, a, b)
+
+
+
+def coincidence_counts(letters, max_distance):
+    """
+    Counts, for every distance up to a bound, the letter pairs that far apart that match.
+
+    The text is compared with itself shifted by each distance as two big integers, one
+    byte per letter, so a matching pair becomes a zero byte of their XOR and the count
+    runs at C speed; no Python code runs per letter.
+
+    Args:
+        letters (bytes): The letter indices of the text.
+        max_distance (int): The longest distance to count.
+
+    Returns:
+        list: The number of matching pairs at each distance, index 0 unused.
+    """
+    counts = [0]
+    for distance in range(1, max_distance + 1):
+        width = len(letters) - distance
+        head = int.from_bytes(letters[:width], 'big')
+        tail = int.from_bytes(letters[distance:], 'big')
+        counts.append((head ^ tail).to_bytes(width, 'big').count(0))
+    return counts
+
+
+def kasiski_votes(letters, max_period, gram_length=KASISKI_GRAM_LENGTH):
+    """
+    Counts, for every candidate period, the repeated n-grams whose distance it divides.
+
+    One pass over the text remembers where each n-gram was last seen; the distance to
+    that occurrence votes for all its divisors up to the longest period.
+
+    Args:
+        letters (bytes): The letter indices of the text.
+        max_period (int): The longest period to vote for.
+        gram_length (int, optional): Length of the repeated n-grams.
+
+    Returns:
+        tuple: The votes of each period, index 0 and 1 unused, and the number of repeats.
+    """
+    votes = [0] * (max_period + 1)
+    last_seen = {}
+    repeats = 0
+    for position in range(len(letters) - gram_length + 1):
+        gram = letters[position:position + gram_length]
+        previous = last_seen.get(gram)
+        last_seen[gram] = position
+        if previous is None:
+            continue
+        repeats += 1
+        distance = position - previous
+        for period in range(2, min(distance, max_period) + 1):
+            if distance % period == 0:
+                votes[period] += 1
+    return votes, repeats
+
+
+def key_period_analysis(letters, max_period=MAX_KEY_PERIOD):
+    """
+    Estimates the key length of a polyalphabetic ciphertext.
+
+    The letters of one key column match with the English index of coincidence, and all
+    pairs at a multiple of the key length lie in the same column, so the coincidence
+    rate of each period is pooled over the distances it divides. The smallest periods
+    within `KEY_PERIOD_TOLERANCE` of the best rate are the candidates; the best rate is
+    taken one standard deviation low, as long periods pool few distances. Multiples of
+    a candidate that match no better than it are left out, since multiples of the key
+    length score as well as the key itself. The Kasiski favourite, the period whose
+    votes most exceed the share that chance repeats would give it, is added.
+
+    Args:
+        letters (bytes): The letter indices of the ciphertext.
+        max_period (int, optional): The longest period to consider.
+
+    Returns:
+        KeyPeriodAnalysis: The candidate periods, best guess first, the pooled
+        coincidence rate of each period and the Kasiski votes of each period.
+    """
+    letters = letters[:KEY_PERIOD_SAMPLE_SIZE]
+    max_period = max(1, min(max_period, len(letters) // KEY_COLUMN_MIN_LETTERS))
+    counts = coincidence_counts(letters, min(KEY_PERIOD_DISTANCES * max_period, len(letters) - 1))
+    coincidence = [0.0]
+    best = 0.0
+    for period in range(1, max_period + 1):
+        distances = range(period, len(counts), period)
+        pairs = sum(len(letters) - distance for distance in distances)
+        rate = sum(counts[distance] for distance in distances) / pairs if pairs else 0.0
+        coincidence.append(rate)
+        # long periods pool few distances, so their rate is only trusted down to one
+        # standard deviation below it when it sets the bar for the others
+        best = max(best, rate - math.sqrt(rate / pairs) if pairs else 0.0)
+    candidates = []
+    for period in range(1, max_period + 1):
+        # a multiple of a candidate that matches no better only repeats its key
+        if coincidence[period] >= KEY_PERIOD_TOLERANCE * best and all(
+                period % other or KEY_PERIOD_TOLERANCE * coincidence[period] > coincidence[other]
+                for other in candidates):
+            candidates.append(period)
+    candidates = candidates[:KEY_PERIOD_CANDIDATES]
+    kasiski, repeats = kasiski_votes(letters, max_period)
+    if repeats:
+        favourite = max(range(2, max_period + 1), key=lambda period: kasiski[period] - repeats / period, default=None)
+        if favourite is not None and favourite not in candidates:
+            candidates.append(favourite)
+    return KeyPeriodAnalysis(candidates, coincidence, kasiski)
+
+
+def column_tables(a, alphabet=english_alphabet):
+    """
+    Builds the `bytes.translate` tables that decrypt letter indices under each key letter.
+
+    A key letter k encrypts plaintext letter x to (a * x + k) % 26, a = 1 being the
+    Vigenère and a = 25 the Beaufort cipher.
+
+    Args:
+        a (int): The multiplicative key of the cipher.
+        alphabet (str, optional): The alphabet of the decrypted indices, which must
+            hold the English letters; that of the score table they are scored with.
+
+    Returns:
+        list: The 256-byte table of each key letter.
+    """
+    a_inv = AFFINE_INVERSES[a]
+    positions = [alphabet.index(letter) for letter in english_alphabet]
+    return [bytes(positions[a_inv * (letter - shift) % 26] for letter in range(26)) + bytes(230)
+            for shift in range(26)]
+
+
+def decrypt_columns(letters, shifts, tables):
+    """
+    Decrypts letter indices with one key letter per column.
+
+    Args:
+        letters (bytes): The letter indices of the ciphertext.
+        shifts (list): The key letter of each column.
+        tables (list): The tables of `column_tables`.
+
+    Returns:
+        bytearray: The letter indices of the plaintext.
+    """
+    plaintext = bytearray(len(letters))
+    period = len(shifts)
+    for column, shift in enumerate(shifts):
+        plaintext[column::period] = letters[column::period].translate(tables[shift])
+    return plaintext
+
+
+def rank_column_shifts(letters, period, a, frequencies=ENGLISH_LETTER_FREQUENCIES):
+    """
+    Ranks the key letters of every column, each column being a Caesar or Affine ciphertext.
+
+    Every column is scored with the same chi-squared statistic as the Caesar shifts. A
+    column only keeps the letters within `KEY_COLUMN_FIT_RATIO` of its best statistic,
+    so long columns usually settle on one letter.
+
+    Args:
+        letters (bytes): The letter indices of the ciphertext.
+        period (int): The key length.
+        a (int): The multiplicative key of the cipher, 1 for Vigenère, 25 for Beaufort.
+        frequencies (list, optional): The expected letter frequencies.
+
+    Returns:
+        list: The candidate key letters of each column, best first.
+    """
+    ranked_columns = []
+    for column in range(period):
+        counts = collections.Counter(letters[column::period])
+        histogram = [counts[letter] for letter in range(26)]
+        statistics = {shift: chi_squared(histogram, shift, a, frequencies) for shift in range(26)}
+        ranked = sorted(statistics, key=statistics.get)[:KEY_COLUMN_CANDIDATES]
+        ranked_columns.append([shift for shift in ranked
+                               if statistics[shift] <= KEY_COLUMN_FIT_RATIO * statistics[ranked[0]]])
+    return ranked_columns
+
+
+def refine_key_shifts(sample, ranked_columns, tables, words, top=None):
+    """
+    Refines a key with the quadgram score table, one column at a time.
+
+    Each column in turn tries its other candidate letters on the sample and keeps the
+    one that improves the fitness, until a full round changes nothing.
+
+    Args:
+        sample (bytes): The letter indices of a ciphertext sample.
+        ranked_columns (list): The candidate key letters of each column, best first.
+        tables (list): The tables of `column_tables`.
+        words (NgramTable): The n-gram score table.
+        top (TopKeys, optional): Receives every key word tried with its fitness.
+
+    Returns:
+        tuple: The key letters and the fitness of the sample decryption.
+    """
+    shifts = [ranked[0] for ranked in ranked_columns]
+    best = fitness_score(decrypt_columns(sample, shifts, tables), words)
+    improved = True
+    while improved:
+        improved = False
+        for column, ranked in enumerate(ranked_columns):
+            for shift in ranked:
+                if shift == shifts[column]:
+                    continue
+                trial = shifts[:column] + [shift] + shifts[column + 1:]
+                score = fitness_score(decrypt_columns(sample, trial, tables), words)
+                if top is not None:
+                    top.add(score, "".join(LETTERS[letter] for letter in trial))
+                if score > best:
+                    shifts, best, improved = trial, score, True
+    return shifts, best
+
+
+def break_polyalphabetic(ciphertext, cipher, model, max_period=MAX_KEY_PERIOD, top=None):
+    """
+    Breaks a Vigenère or Beaufort ciphertext.
+
+    The best key letters of every candidate key length of `key_period_analysis` decrypt
+    a sample, and the key length whose decryption has the best quadgram fitness has its
+    key refined by `refine_key_shifts`.
+
+    Args:
+        ciphertext (str): The text to be decrypted.
+        cipher (str): "vigenere" or "beaufort".
+        model (LanguageModel): The language model to score decryptions with.
+        max_period (int, optional): The longest key length to consider.
+        top (TopKeys, optional): Receives the best key word of every key length and the
+            key words tried while refining, scored by the fitness of the sample.
+
+    Returns:
+        tuple: The key word, the decrypted text and the `KeyPeriodAnalysis`, or None if
+        the ciphertext holds too few letters.
+    """
+    letters = char_to_number(ciphertext, english_alphabet)
+    if len(letters) < 2 * KEY_COLUMN_MIN_LETTERS:
+        return None
+    with stats_phase("key_period_analysis"):
+        analysis = key_period_analysis(letters, max_period)
+    frequencies, words = model_statistics(model)
+    a = POLYALPHABETIC_MULTIPLIERS[cipher]
+    tables = column_tables(a, words.alphabet)
+    sample = letters[:QUADGRAM_CHECK_SAMPLE_SIZE]
+    with stats_phase("recover_key"):
+        candidates = [rank_column_shifts(letters, period, a, frequencies) for period in analysis.candidates]
+        fitness = [fitness_score(decrypt_columns(sample, [shifts[0] for shifts in ranked], tables), words)
+                   for ranked in candidates]
+        ranked_columns = candidates[fitness.index(max(fitness))]
+        if top is not None:
+            for ranked, score in zip(candidates, fitness):
+                top.add(score, "".join(LETTERS[shifts[0]] for shifts in ranked))
+        shifts, _ = refine_key_shifts(sample, ranked_columns, tables, words, top)
+    key = "".join(LETTERS[shift] for shift in shifts)
+    decrypt = decrypt_vigenere if cipher == "vigenere" else decrypt_beaufort
+    return key, decrypt(ciphertext, key), analysis
+
+
+def describe_key_period(analysis):
+    """
+    Describes the evidence for the key length of a polyalphabetic ciphertext.
+
+    Args:
+        analysis (KeyPeriodAnalysis): The result of `key_period_analysis`.
+
+    Returns:
+        str: One line per candidate period.
+    """
+    return "\n".join(f"Period {period}: index of coincidence {analysis.coincidence[period]:.4f}, "
+                     f"{analysis.kasiski[period] if period > 1 else 0} Kasiski repeats"
+                     for period in analysis.candidates)
+
+
+def decrypt_polyalphabetic(ciphertext, cipher, model, top=None):
+    """
+    Decrypts the given ciphertext using the Vigenère or Beaufort cipher technique by
+    detecting the key length and recovering the key.
+
+    Args:
+        ciphertext (str): The text to be decrypted.
+        cipher (str): "vigenere" or "beaufort".
+        model (LanguageModel): The language model to score decryptions with.
+        top (TopKeys, optional): Receives the best key words with their scores.
+
+    Returns:
+        str: The decrypted text, or None if the ciphertext is too short.
+    """
+    broken = break_polyalphabetic(ciphertext, cipher, model, top=top)
+    if broken is None:
+        print("Too few letters in ciphertext to find the key length.")
+        return None
+    key, plaintext, analysis = broken
+    print(describe_key_period(analysis))
+    print(f"Key {key} (length {len(key)}).")
+    return plaintext
+
+
+def break_mono(ciphertext, key_alphabet_map):
+    """
+    Decrypts the given ciphertext using the Monoalphabetic cipher technique.
+
+    Args:
+        ciphertext (str): The text to be decrypted.
+        key_alphabet_map (dict): The key alphabet map for the Monoalphabetic cipher.
+
+    Returns:
+        str: The decrypted text.
+    """
+    decoded_text = monoalphabetic_decrypt(ciphertext, key_alphabet_map)
+    return decoded_text
+
+def text_fitness(text, words):
+    """
+    Calculates the n-gram fitness score of a text.
+
+    Args:
+        text (str): The text to score.
+        words (NgramTable): The n-gram score table.
+
+    Returns:
+        int: The fitness score, 0 for texts shorter than one n-gram.
+    """
+    plaintext = char_to_number(text, words.alphabet)
+    if len(plaintext) < words.order:
+        return 0
+    return fitness_score(plaintext, words)
+
+def break_ciphertext(ciphertext, cipher, model, search_options=None, profile=None, top=None):
+    """
+    Breaks a ciphertext without printing anything.
+
+    With the "auto" cipher the ciphertext statistics are computed first. The cheap Caesar
+    and Affine attacks only run if the histogram fits a rotation or Affine map of
+    English, the Vigenère and Beaufort breakers only if the index of coincidence is too
+    low for one alphabet, and their result is only kept if enough of it is made of
+    dictionary words; otherwise the monoalphabetic key search runs.
+
+    Args:
+        ciphertext (str): The text to be decrypted.
+        cipher (str): "caesar", "affine", "mono", "vigenere", "beaufort" or "auto".
+        model (LanguageModel): The language model to score decryptions with.
+        search_options (dict, optional): Keyword arguments of `find_key` for the
+            monoalphabetic key search, such as seed, backend, search, schedule, init
+            and deadline.
+        profile (CipherProfile, optional): The statistics of the ciphertext from
+            `cipher_profile`, if they were already computed.
+        top (TopKeys, optional): Receives the best distinct keys of the breaker whose
+            result is returned, in the form of the returned key, with their scores.
+
+    Returns:
+        tuple: The cipher, the key and the decrypted text, or None if breaking failed.
+    """
+    histogram = None
+    if top is not None:
+        top.clear()
+    if cipher == "auto":
+        if profile is None:
+            with stats_phase("cipher_profile"):
+                profile = cipher_profile(ciphertext, model)
+        if profile is None:
+            return None
+        histogram = profile.histogram
+    if cipher == "caesar" or (cipher == "auto" and profile_fits(profile, profile.shift_statistic)):
+        with stats_phase("rank_caesar_shifts"):
+            ranked = rank_caesar_shifts(ciphertext, model, histogram=histogram)
+        if ranked:
+            shift = ranked[0][0]
+            plaintext = encrypt_caesar(ciphertext, shift)
+            if cipher == "caesar" or dictionary_hit_ratio(plaintext, model.words) >= VALID_WORD_THRESHOLD:
+                if top is not None:
+                    offer_ranked_keys(top, ranked, ciphertext, encrypt_caesar, model.ngrams)
+                return "caesar", shift, plaintext
+    if cipher == "affine" or (cipher == "auto" and profile_fits(profile, profile.affine_statistic)):
+        with stats_phase("rank_affine_keys"):
+            ranked = rank_affine_keys(ciphertext, model, histogram=histogram)
+        if ranked:
+            key = ranked[0][0]
+            plaintext = decrypt_affine_with_keys(ciphertext, *key)
+            if cipher == "affine" or dictionary_hit_ratio(plaintext, model.words) >= VALID_WORD_THRESHOLD:
+                if top is not None:
+                    offer_ranked_keys(top, ranked, ciphertext,
+                                      lambda text, candidate: decrypt_affine_with_keys(text, *candidate), model.ngrams)
+                return "affine", list(key), plaintext
+    if cipher in POLYALPHABETIC_MULTIPLIERS or (cipher == "auto" and looks_polyalphabetic(profile)):
+        names = [cipher] if cipher in POLYALPHABETIC_MULTIPLIERS else list(POLYALPHABETIC_MULTIPLIERS)
+        broken = []
+        found = {name: None if top is None else TopKeys(top.size) for name in names}
+        for name in names:
+            with stats_phase("break_polyalphabetic"):
+                result = break_polyalphabetic(ciphertext, name, model, top=found[name])
+            if result is not None:
+                key, plaintext, _ = result
+                broken.append((text_fitness(plaintext[:QUADGRAM_CHECK_SAMPLE_SIZE], model.ngrams), name, key,
+                               plaintext))
+        if broken:
+            _, name, key, plaintext = max(broken)
+            if cipher != "auto" or dictionary_hit_ratio(plaintext, model.words) >= VALID_WORD_THRESHOLD:
+                if top is not None:
+                    for score, candidate in found[name].ranked():
+                        top.add(score, candidate)
+                return name, key, plaintext
+    if cipher in ("mono", "auto"):
+        ngrams = model.ngrams
+        with stats_phase("find_key"):
+            key = find_key(ciphertext, ngrams.alphabet, ngrams, top=top, **(search_options or {}))
+        with stats_phase("break_mono"):
+            plaintext = break_mono(ciphertext, key_mapping(ngrams.alphabet, key))
+        if top is not None:
+            top.relabel(str.upper)
+        return "mono", key.upper(), plaintext
+    return None
+
+def collect_batch_files(sources, manifest=None):
+    """
+    Expands the ciphertext sources of a batch into file paths.
+
+    Args:
+        sources (list): File paths, directories (all files directly inside them) or glob
+            patterns.
+        manifest (str, optional): A file listing one ciphertext path per line.
+
+    Returns:
+        list: The file paths, in the order they were given.
+    """
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            paths.extend(sorted(entry.path for entry in os.scandir(source) if entry.is_file()))
+        elif glob.has_magic(source):
+            paths.extend(sorted(glob.glob(source)))
+        else:
+            paths.append(source)
+    if manifest:
+        with open(manifest, 'r') as file:
+            paths.extend(line.strip() for line in file if line.strip())
+    return paths
+
+
+_batch_worker = {}
+
+
+def init_batch_worker(dictionary_path, table_path, cipher, search_options, time_limit, output_dir, top=None,
+                      stats=False):
+    """
+    Creates the language model every file a process will break is scored with.
+
+    Args:
+        dictionary_path (str): Path of the dictionary file.
+        table_path (str): Path of the compiled score table, or None for the default.
+        cipher (str): The cipher to break, or "auto".
+        search_options (dict): Keyword arguments of `find_key`, or None.
+        time_limit (float): Seconds the key search may spend on each file, or None.
+        output_dir (str): Directory receiving the decryptions, or None.
+        top (int, optional): Number of best keys to report for each file.
+        stats (bool, optional): Whether run metrics are collected for each file.
+    """
+    _batch_worker.update(stats=stats, model=LanguageModel(dictionary_path, table_path), cipher=cipher,
+                         search_options=search_options or {}, time_limit=time_limit, output_dir=output_dir, top=top)
+
+
+def run_batch_item(path):
+    """
+    Breaks one file of a batch.
+
+    Args:
+        path (str): Path of the ciphertext file.
+
+    Returns:
+        dict: The report record: file, cipher, key, score, share of dictionary words and
+        elapsed seconds, plus the best keys with their scores when they are asked for and
+        an error message if the file could not be processed. While run metrics are collected,
+        the metrics of the file are returned under "stats" for the parent process to merge.
+    """
+    state = _batch_worker
+    enable_stats(state['stats'])
+    record = {"file": path, "cipher": None, "key": None, "score": None, "words": None}
+    start = time.perf_counter()
+    try:
+        with open(path, 'r') as file:
+            ciphertext = file.read()
+        search_options = state['search_options']
+        if state['time_limit']:
+            search_options = dict(search_options, deadline=time.monotonic() + state['time_limit'])
+        top = TopKeys(state['top']) if state['top'] else None
+        broken = break_ciphertext(ciphertext, state['cipher'], state['model'], search_options, top=top)
+        if broken is not None:
+            record["cipher"], record["key"], plaintext = broken
+            if top is not None:
+                record["candidates"] = [{"key": key, "score": score} for score, key in top.ranked()]
+            record["score"] = text_fitness(plaintext, state['model'].ngrams)
+            validated, ratio = redact_text(plaintext, state['model'].words)
+            record["words"] = round(ratio, 4)
+            if state['output_dir']:
+                output_path = os.path.join(state['output_dir'], f"break_{os.path.basename(path)}")
+                with open(output_path, 'w') as file:
+                    file.write(validated)
+    except (OSError, UnicodeDecodeError) as error:
+        record["error"] = str(error)
+    record["seconds"] = round(time.perf_counter() - start, 6)
+    if state['stats']:
+        record["stats"] = (_run_stats["phases"], _run_stats["counts"])
+    return record
+
+
+def run_batch(paths, report_path, dictionary_path=DICTIONARY_FILE, table_path=None, cipher="auto",
+              workers=1, search_options=None, time_limit=None, output_dir=None, alphabet=None, order=None, top=None):
+    """
+    Breaks many ciphertext files and writes one JSON line per file to a report.
+
+    Args:
+        paths (list): Paths of the ciphertext files.
+        report_path (str): Path of the JSONL report.
+        dictionary_path (str, optional): Path of the dictionary file.
+        table_path (str, optional): Path of the compiled score table.
+        cipher (str, optional): The cipher to break, or "auto". Defaults to "auto".
+        workers (int, optional): Number of processes breaking files. Defaults to 1.
+        search_options (dict, optional): Keyword arguments of `find_key` for the
+            monoalphabetic key search.
+        time_limit (float, optional): Seconds the key search may spend on each file.
+        output_dir (str, optional): Directory receiving the validated decryptions.
+        alphabet (str, optional): The alphabet the score table must have.
+        order (int, optional): The n-gram order the score table must have.
+        top (int, optional): Number of best distinct keys to report for each file.
+
+    Returns:
+        int: The number of files that were broken.
+    """
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    # build the on-disk caches once up front instead of racing to build them in every worker
+    model = LanguageModel(dictionary_path, table_path, alphabet=alphabet, order=order).load()
+    initargs = (dictionary_path, model.table_path, cipher, search_options, time_limit, output_dir, top,
+                _run_stats["enabled"])
+    # every file is measured on its own, in whichever process breaks it, and added to the run's metrics here
+    phases, counts = _run_stats["phases"], _run_stats["counts"]
+    broken = 0
+    with open(report_path, 'w') as report:
+        if workers <= 1:
+            init_batch_worker(*initargs)
+            records = map(run_batch_item, paths)
+            pool = None
+        else:
+            pool = multiprocessing.Pool(workers, init_batch_worker, initargs)
+            records = pool.imap(run_batch_item, paths)
+        try:
+            for record in records:
+                if "stats" in record:
+                    item_phases, item_counts = record.pop("stats")
+                    phases.update(item_phases)
+                    counts.update(item_counts)
+                report.write(json.dumps(record) + "\n")
+                broken += record["cipher"] is not None
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+            _run_stats.update(phases=phases, counts=counts)
+    return broken
+
+def report_validation(text, model):
+    """
+    Redacts the non-dictionary words of a decryption and prints how many words are valid.
+
+    Args:
+        text (str): The decrypted text.
+        model (LanguageModel): The language model holding the dictionary.
+
+    Returns:
+        str: The validated text.
+    """
+    validated, ratio = redact_text(text, model.words)
+    print(f"{ratio:.0%} of the words are dictionary words.")
+    return validated
+
+def progress_printer(interval=PROGRESS_INTERVAL):
+    """
+    Creates a progress callback for `find_key` that prints at most one line per interval.
+
+    Args:
+        interval (float, optional): Minimum number of seconds between two lines.
+
+    Returns:
+        callable: The callback, taking a `SearchProgress`.
+    """
+    printed = None
+
+    def report(progress):
+        nonlocal printed
+        if printed is not None and progress.seconds - printed < interval:
+            return
+        printed = progress.seconds
+        seconds = max(progress.seconds, 1e-9)
+        print(f"{progress.seconds:.1f}s: {progress.restarts} restarts ({progress.restarts / seconds:.1f}/s), "
+              f"{progress.evaluations / seconds:.0f} evaluations/s, best score {progress.best_score}", flush=True)
+
+    return report
+
+def write_output_file(mode, text):
+    """
+    Writes the decrypted text to an output file.
+
+    Args:
+        mode (str): The mode of decryption (e.g., "caesar", "affine", "mono").
         text (str): The decrypted text to write.
     """
-    with open(f'break_{mode}.txt', 'w') as file:
+    with stats_phase("write_output"), open(f'break_{mode}.txt', 'w') as file:
         file.write(text)
 
+@contextlib.contextmanager
+def mapped_file(path):
+    """
+    Memory-maps a file for reading.
+
+    Args:
+        path (str): Path of the file.
+
+    Yields:
+        mmap.mmap: The read-only mapping, or empty bytes for an empty file, which
+        cannot be mapped.
+    """
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+def break_mono_file(args, model, search_options, top=None):
+    """
+    Breaks a monoalphabetic ciphertext file for the command line and writes the
+    validated decryption to `break_mono.txt`.
+
+    The file is memory-mapped rather than read into a string. The key search runs on
+    the letter indices taken straight from the mapped bytes, and the decryption is
+    translated, redacted and written one chunk at a time, so besides the mapping only
+    the letter indices, at most one byte per character, are held in memory.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+        model (LanguageModel): The language model to score decryptions with.
+        search_options (dict): Keyword arguments of `find_key`.
+        top (TopKeys, optional): Receives the best keys found.
+    """
+    spells1 = model.ngrams
+
+    if args.backend == "numpy" and np is None:
+        print("NumPy is not installed, using the python backend.")
+    deadline = on_progress = None
+    if args.time_limit:
+        deadline = time.monotonic() + args.time_limit
+        on_progress = progress_printer()
+    with mapped_file(args.file) as mapped:
+        with stats_phase("read_input"):
+            cipher_bin = read_letter_indices(mapped, spells1.alphabet)
+        with stats_phase("find_key"):
+            final_key1 = find_key(cipher_bin, spells1.alphabet, spells1, args.workers, deadline=deadline,
+                                  on_progress=on_progress, top=top, **search_options)
+        if top is not None:
+            top.relabel(str.upper)
+        del cipher_bin
+        key_alphabet_map = key_mapping(spells1.alphabet, final_key1)
+        words = model.words
+        with stats_phase("break_mono"):
+            ratio = write_validated_chunks(monoalphabetic_decrypt_chunks(mapped, key_alphabet_map), 'break_mono.txt',
+                                           words)
+    print(f"{ratio:.0%} of the words are dictionary words.")
+
 def main():
     """
         The main function that parses command-line arguments to encrypt or decrypt
-        text using Caesar, Affine, or Monoalphabetic ciphers. It reads the input file,
+        text using Caesar, Affine, Monoalphabetic, Vigenère or Beaufort ciphers. It reads the input file,
         applies the appropriate decryption method based on the selected cipher, and
         writes the output to a file.
 
         Command-line Arguments:
-            cipher (str): The cipher technique to use. Can be "caesar", "affine", or "mono".
+            cipher (str): The cipher technique to use. Can be "caesar", "affine", "mono", "vigenere",
+                "beaufort" or "auto".
             file (str): The name or path of the input file containing the text to be processed.
 
         Steps:
             1. Parse command-line arguments to determine the cipher type and input file.
             2. Read the content from the specified input file.
-            3. Load the dictionary and map the English alphabet.
+            3. Create the language model, which loads the dictionary words, letter frequencies and
+               n-gram score table the first time a breaker needs them.
             4. Based on the chosen cipher, execute the following:
-                - For "caesar": Use `decrypt_caesar` to decrypt the text, validate the result, and write to a file.
-                - For "affine": Use `decrypt_affine` to decrypt the text, validate the result, and write to a file.
-                - For "mono": Read the dictionary file, extract and normalize words, find the decryption key,
-                  map the key alphabet, decrypt using `break_mono`, validate the result, and write to a file.
+                - For "caesar": Use `decrypt_caesar` to rank all shifts by letter statistics, validate the
+                  result, and write to a file.
+                - For "affine": Use `decrypt_affine` to rank all 312 keys by letter statistics, validate the
+                  result, and write to a file.
+                - For "mono": Use `break_mono_file`, which memory-maps the file instead of reading it, finds
+                  the decryption key with the n-gram score table of the model, and decrypts, validates and
+                  writes the result one chunk at a time.
+                - For "vigenere" and "beaufort": Use `decrypt_polyalphabetic` to find the key length from the
+                  coincidences and Kasiski repeats, recover every key letter by its column statistics and
+                  refine the key with quadgrams, validate the result, and write to a file.
+                - For "auto": Compute the index of coincidence and check whether the letter histogram
+                  is a rotation or Affine map of English, try the matching cheap attack (or the Vigenère and
+                  Beaufort breakers when the index of coincidence is low), and fall back to
+                  the monoalphabetic key search when its result is not made of dictionary words.
             5. Output files are named based on the cipher used.
 
+        The "compile" command only builds the n-gram score table and the parsed word
+        cache from the dictionary and stores them next to it, so later runs can load them
+        instead of parsing the dictionary again.
+        The "train" command builds the score table from a plaintext corpus instead, so
+        it also counts the n-grams across word boundaries and weighs them by their use.
+        The "batch" command breaks many files with one dictionary and score table and
+        writes a JSONL report.
+        With --stats (or the BREAK_STATS environment variable) the run metrics are
+        written as JSON at the end, and with --profile the command runs under cProfile.
+
         Returns:
             None
         """
-    parser = argparse.ArgumentParser(description="Encrypt or decrypt using Caesar, Affine, or Monoalphabetic ciphers.")
-    parser.add_argument("cipher", choices=["caesar", "affine", "mono"], help="Cipher technique to use")
-    parser.add_argument("file", help="Input file name/path")
+    parser = argparse.ArgumentParser(description="Encrypt or decrypt using Caesar, Affine, Monoalphabetic, Vigenère or Beaufort ciphers.")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("-d", "--dictionary", default=DICTIONARY_FILE, help="Dictionary file name/path")
+    common.add_argument("-t", "--table", help="Compiled score table path (defaults to the dictionary path with a .qgram "
+                                              "extension, .tgram or .bgram for trigrams or bigrams)")
+    common.add_argument("--order", type=int, choices=NGRAM_ORDERS,
+                        help="N-gram order of the score table (any order of an existing --table, else 4)")
+    common.add_argument("--alphabet",
+                        help="Alphabet of the score table and the monoalphabetic key (any alphabet of an existing "
+                             "--table, else a-z)")
+    common.add_argument("--stats", nargs="?", const="-", metavar="PATH",
+                        help=f"Write per-phase times and key search counts as JSON to PATH, or to stderr without "
+                             f"one (also enabled by the {STATS_ENV} environment variable)")
+    common.add_argument("--profile", nargs="?", const=PROFILE_FILE, metavar="PATH",
+                        help=f"Run under cProfile and dump the statistics to PATH (default {PROFILE_FILE})")
+    search = argparse.ArgumentParser(add_help=False)
+    search.add_argument("--workers", type=int, default=1, help="Number of worker processes")
+    search.add_argument("--seed", type=int, help="Seed for a reproducible key search")
+    search.add_argument("--backend", choices=["python", "numpy"], default="python",
+                        help="Scoring backend for the key search (numpy falls back to python if missing)")
+    search.add_argument("--search", choices=SEARCH_STRATEGIES, default="hillclimb",
+                        help="Key search strategy: restarted hill-climbing, simulated annealing or parallel tempering")
+    search.add_argument("--iterations", type=int, default=SearchSchedule().iterations,
+                        help="Swaps tried by one annealing or tempering run")
+    search.add_argument("--run-seconds", type=float, help="Time budget of one annealing or tempering run")
+    search.add_argument("--start-temperature", type=float, default=SearchSchedule().start_temperature,
+                        help="Initial (hottest) temperature, per ciphertext window of a key letter")
+    search.add_argument("--end-temperature", type=float, default=SearchSchedule().end_temperature,
+                        help="Final (coldest) temperature, per ciphertext window of a key letter")
+    search.add_argument("--cooling", choices=COOLING_SCHEDULES, default="geometric", help="Annealing cooling schedule")
+    search.add_argument("--replicas", type=int, default=SearchSchedule().replicas,
+                        help="Number of parallel tempering replicas")
+    search.add_argument("--init", choices=INIT_MODES, default="random",
+                        help="Start every restart from a random key, or from the ETAOIN frequency match and then "
+                             "from perturbations of the best key")
+    search.add_argument("--sample", type=int, nargs="?", const=SAMPLE_SIZE, metavar="LETTERS",
+                        help=f"Search on a sample of a long ciphertext (default {SAMPLE_SIZE} letters) and verify "
+                             f"the key on the whole text")
+    search.add_argument("--grow-sample", action="store_true",
+                        help=f"Start from a small sample (--sample or {GROWING_SAMPLE_START} letters) and double it "
+                             f"until the key is stable, then verify it on the whole text")
+    search.add_argument("--time-limit", type=float,
+                        help="Seconds the key search may run before returning its best key (per file in batch); "
+                             "prints progress lines")
+    ranking = argparse.ArgumentParser(add_help=False)
+    ranking.add_argument("--top", type=int, metavar="K", help="Also list the K best distinct keys found, with their scores")
+    subparsers = parser.add_subparsers(dest="command", required=True, help="Cipher technique to use")
+    for cipher in ("caesar", "affine", "mono", "vigenere", "beaufort"):
+        parents = [common, search, ranking] if cipher == "mono" else [common, ranking]
+        cipher_parser = subparsers.add_parser(cipher, parents=parents, help=f"Break a ciphertext encrypted with the {cipher} cipher")
+        cipher_parser.add_argument("file", help="Input file name/path")
+    auto_parser = subparsers.add_parser("auto", parents=[common, search, ranking],
+                                        help="Detect the cipher from the letter statistics and break it")
+    auto_parser.add_argument("file", help="Input file name/path")
+    subparsers.add_parser("compile", parents=[common], help="Precompile the n-gram score table and word cache")
+    train_parser = subparsers.add_parser("train", parents=[common],
+                                         help="Train the n-gram score table on a plaintext corpus")
+    train_parser.add_argument("corpus", nargs="+", help="Corpus files (.gz ones are decompressed), directories or "
+                                                        "glob patterns")
+    train_parser.add_argument("--workers", type=int, default=1, help="Number of worker processes counting the corpus")
+    batch_parser = subparsers.add_parser("batch", parents=[common, search, ranking],
+                                         help="Break many ciphertext files in one run")
+    batch_parser.add_argument("sources", nargs="*", help="Ciphertext files, directories or glob patterns")
+    batch_parser.add_argument("-m", "--manifest", help="File listing one ciphertext path per line")
+    batch_parser.add_argument("-c", "--cipher", choices=["caesar", "affine", "mono", "vigenere", "beaufort", "auto"],
+                              default="auto",
+                              help="Cipher of the files, or auto to detect it")
+    batch_parser.add_argument("-r", "--report", default=BATCH_REPORT_FILE, help="JSONL report path")
+    batch_parser.add_argument("-o", "--output-dir", help="Directory to write each decryption to")
 
     args = parser.parse_args()
+    stats = args.stats or os.environ.get(STATS_ENV)
+    if stats:
+        enable_stats()
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler is not None:
+        profiler.enable()
+    try:
+        run_command(args, parser)
+    except ScoreTableError as error:
+        parser.error(str(error))
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+        if stats:
+            write_stats(stats)
+
+
+def run_command(args, parser):
+    """
+    Runs the command selected on the command line.
 
-    with open(args.file, 'r') as f:
-        ciphertext = f.read()
-
-        dictionary = load_dictionary()
-        alphabet_map = map_alphabet(english_alphabet)
-        spells1 = extract_words(dictionary, alphabet_map)
-
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+        parser (argparse.ArgumentParser): The parser, to report invalid arguments.
+    """
+    if "search" in args:
+        if args.iterations < 1 or args.start_temperature <= 0 or args.end_temperature <= 0:
+            parser.error("--iterations and the temperatures must be positive")
+        if args.time_limit is not None and args.time_limit <= 0:
+            parser.error("--time-limit must be positive")
+        if args.sample is not None and args.sample < 4:
+            parser.error("--sample must be at least 4 letters")
+        schedule = SearchSchedule(args.iterations, args.run_seconds, args.start_temperature, args.end_temperature,
+                                  args.cooling, args.replicas)
+        search_options = dict(seed=args.seed, backend=args.backend, search=args.search, schedule=schedule,
+                              init=args.init, sample=args.sample, grow_sample=args.grow_sample)
+
+    if args.alphabet is not None and not (2 <= len(set(args.alphabet.lower())) == len(args.alphabet) < 256):
+        parser.error("--alphabet must hold 2 to 255 distinct characters")
+    top = None
+    if getattr(args, "top", None) is not None:
+        if args.top < 1:
+            parser.error("--top must be at least 1")
+        top = TopKeys(args.top)
+    model = LanguageModel(args.dictionary, args.table, alphabet=args.alphabet, order=args.order)
+
+    if args.command == "compile":
+        model.compile()
+        print(f"Score table written to {model.table_path}, word cache to {model.cache_path}")
+        return
+
+    if args.command == "train":
+        try:
+            train_score_table(args.corpus, model.table_path, args.alphabet or english_alphabet,
+                              args.order or QUADGRAM_ORDER, args.workers)
+        except OSError as error:
+            parser.error(str(error))
+        print(f"Score table trained and written to {model.table_path}")
+        return
+
+    if args.command == "batch":
+        paths = collect_batch_files(args.sources, args.manifest)
+        if not paths:
+            parser.error("batch needs at least one ciphertext file")
+        broken = run_batch(paths, args.report, args.dictionary, args.table, args.cipher, args.workers,
+                           search_options, args.time_limit, args.output_dir, args.alphabet, args.order, args.top)
+        print(f"Broke {broken} of {len(paths)} files, report written to {args.report}")
+        return
+
+    if args.command == "mono":
+        break_mono_file(args, model, search_options, top)
+    else:
+        with stats_phase("read_input"), open(args.file, 'r') as f:
+            ciphertext = f.read()
 
-    if args.cipher == "caesar":
-        decrypted_text = decrypt_caesar(ciphertext, dictionary)
+    if args.command == "caesar":
+        with stats_phase("decrypt_caesar"):
+            decrypted_text = decrypt_caesar(ciphertext, model, top)
         if decrypted_text:
-            result2 = validate_text(decrypted_text, dictionary)
+            result2 = report_validation(decrypted_text, model)
             if result2:
                 write_output_file("caesar", result2)
 
-    elif args.cipher == "affine":
-        decryption = decrypt_affine(ciphertext)
+    elif args.command == "affine":
+        with stats_phase("decrypt_affine"):
+            decryption = decrypt_affine(ciphertext, model, top)
         if decryption:
-            result3 = validate_text(decryption, dictionary)
+            result3 = report_validation(decryption, model)
             if result3:
                 write_output_file("affine", result3)
 
-    elif args.cipher == "mono":
-        dictionary = load_dictionary()
-        # dictionary = dictionary_fh.read()
-        alphabet_map = map_alphabet(english_alphabet)
-        spells1 = extract_words(dictionary, alphabet_map)
-        spells1 = calculate_and_normalize_words(spells1)
-
-        final_key1 = find_key(ciphertext, english_alphabet, spells1)
-        key_alphabet_map = key_mapping(english_alphabet, final_key1)
-        plain_text = break_mono(ciphertext, key_alphabet_map)
-        result5 = validate_text(plain_text, dictionary)
-        if result5:
-            write_output_file("mono", result5)
-
-
-main()
\ No newline at end of file
+    elif args.command in POLYALPHABETIC_MULTIPLIERS:
+        with stats_phase("decrypt_polyalphabetic"):
+            decryption = decrypt_polyalphabetic(ciphertext, args.command, model, top)
+        if decryption:
+            result4 = report_validation(decryption, model)
+            if result4:
+                write_output_file(args.command, result4)
+
+    elif args.command == "auto":
+        with stats_phase("cipher_profile"):
+            profile = cipher_profile(ciphertext, model)
+        if profile is None:
+            print("No letters found in ciphertext.")
+            return
+        print(describe_profile(profile))
+        search_options = dict(search_options, workers=args.workers)
+        if args.time_limit:
+            search_options.update(deadline=time.monotonic() + args.time_limit, on_progress=progress_printer())
+        cipher, key, plain_text = break_ciphertext(ciphertext, "auto", model, search_options, profile, top)
+        print(f"Broken as {cipher} with key {key}.")
+        result6 = report_validation(plain_text, model)
+        if result6:
+            write_output_file(cipher, result6)
+
+    if top:
+        print("Best keys found:")
+        print(describe_top_keys(top))
+
+
+if __name__ == "__main__":
+    main()
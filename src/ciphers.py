@@ -1,5 +1,231 @@
 import sys
 import argparse
+import functools
+import math
+import re
+import string
+
+TABLE_CACHE_SIZE = 256
+CHUNK_SIZE = 1 << 20
+CIPHERS = ("caesar", "affine", "mono", "vigenere", "beaufort")
+# runs of the letters a polyalphabetic key is applied to; anything else keeps its place
+LETTER_RUNS = re.compile(r'([A-Za-z]+)')
+
+
+class TranslationTable(dict):
+    """
+    A `str.translate` table that holds the 52 ASCII letters and fills in anything else
+    on demand.
+
+    Characters outside the prebuilt entries are converted once with the cipher's
+    per-character function and remembered, so translating with the table gives exactly
+    what a character-by-character loop over that function would.
+    """
+
+    def __init__(self, convert):
+        """
+        Builds the table.
+
+        Args:
+            convert (callable): Function mapping one character to its substitute.
+        """
+        super().__init__()
+        self.convert = convert
+        for char in string.ascii_letters:
+            self[ord(char)] = convert(char)
+
+    def __missing__(self, code):
+        """
+        Converts and caches a character that is not in the table yet.
+
+        Args:
+            code (int): The code point being translated.
+
+        Returns:
+            str: The substitute for the character.
+
+        Raises:
+            ValueError: If the cipher cannot convert the character. `str.translate` would
+                silently keep the character on a LookupError, so it is not let through.
+        """
+        try:
+            result = self.convert(chr(code))
+        except LookupError as error:
+            raise ValueError(f"Cannot translate character {chr(code)!r}") from error
+        self[code] = result
+        return result
+
+
+@functools.lru_cache(maxsize=TABLE_CACHE_SIZE)
+def caesar_table(shift):
+    """
+    Builds the translation table of the Caesar cipher for a shift.
+
+    Args:
+        shift (int): The number of positions to shift each character.
+
+    Returns:
+        TranslationTable: The cached translation table.
+    """
+    def convert(char):
+        if char.isalpha():
+            shift_base = 65 if char.isupper() else 97
+            return chr((ord(char) - shift_base - shift) % 26 + shift_base)
+        return char
+    return TranslationTable(convert)
+
+
+@functools.lru_cache(maxsize=TABLE_CACHE_SIZE)
+def affine_table(a, b):
+    """
+    Builds the translation table of the Affine cipher for a key.
+
+    Args:
+        a (int): The multiplicative key.
+        b (int): The additive key.
+
+    Returns:
+        TranslationTable: The cached translation table.
+    """
+    def convert(char):
+        if char.isalpha():
+            shift_base = 65 if char.isupper() else 97
+            return chr(((a * (ord(char) - shift_base) + b) % 26) + shift_base)
+        return char
+    return TranslationTable(convert)
+
+
+@functools.lru_cache(maxsize=TABLE_CACHE_SIZE)
+def affine_decryption_table(a_inv, b):
+    """
+    Builds the translation table that decrypts the Affine cipher.
+
+    Args:
+        a_inv (int): The modular inverse of the multiplicative key.
+        b (int): The additive key.
+
+    Returns:
+        TranslationTable: The cached translation table.
+    """
+    def convert(char):
+        if char.isalpha():
+            shift_base = 65 if char.isupper() else 97
+            return chr((a_inv * (ord(char) - shift_base - b) % 26) + shift_base)
+        return char
+    return TranslationTable(convert)
+
+
+@functools.lru_cache(maxsize=TABLE_CACHE_SIZE)
+def mono_table(key):
+    """
+    Builds the translation table of the Monoalphabetic cipher for a key alphabet.
+
+    Args:
+        key (str): The key alphabet for the Monoalphabetic cipher.
+
+    Returns:
+        TranslationTable: The cached translation table.
+    """
+    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    key_map = {alphabet[i]: key[i].upper() for i in range(26)}
+
+    def convert(char):
+        if char.isalpha():
+            return key_map[char.upper()] if char.isupper() else key_map[char.upper()].lower()
+        return char
+    return TranslationTable(convert)
+
+
+class KeyCycle:
+    """
+    Translates the letters of a text with a cycle of tables, one per key letter.
+
+    The n-th letter of the text is translated with table n modulo the key length;
+    characters that are not ASCII letters are kept and do not advance the key. The
+    position in the cycle carries over from one call to the next, so a long text can
+    be translated in chunks.
+    """
+
+    def __init__(self, tables):
+        """
+        Creates the cycle at its first table.
+
+        Args:
+            tables (list): One translation table per key letter.
+        """
+        self.tables = tables
+        self.offset = 0
+
+    def translate(self, text):
+        """
+        Translates the next piece of a text.
+
+        Every key letter's letters are gathered with one slice and translated at once,
+        so the work per character does not depend on the key length.
+
+        Args:
+            text (str): The text to translate.
+
+        Returns:
+            str: The translated text.
+        """
+        runs = LETTER_RUNS.split(text)
+        letters = "".join(runs[1::2])
+        period = len(self.tables)
+        translated = list(letters)
+        for column, table in enumerate(self.tables):
+            start = (column - self.offset) % period
+            translated[start::period] = letters[start::period].translate(table)
+        self.offset = (self.offset + len(letters)) % period
+        translated = "".join(translated)
+        position = 0
+        for index in range(1, len(runs), 2):
+            length = len(runs[index])
+            runs[index] = translated[position:position + length]
+            position += length
+        return "".join(runs)
+
+
+def key_shifts(key):
+    """
+    Converts a key word into the shift of each of its letters.
+
+    Args:
+        key (str): The key word.
+
+    Returns:
+        list: The shifts, 0 for A up to 25 for Z.
+    """
+    return [ord(char) - 65 for char in key.upper()]
+
+
+def vigenere_cycle(key, mode):
+    """
+    Builds the key cycle of the Vigenère cipher, which adds each key letter to a letter.
+
+    Args:
+        key (str): The key word.
+        mode (str): "e" for encryption, "d" for decryption.
+
+    Returns:
+        KeyCycle: The key cycle.
+    """
+    return KeyCycle([affine_table(1, shift if mode == "e" else -shift % 26) for shift in key_shifts(key)])
+
+
+def beaufort_cycle(key):
+    """
+    Builds the key cycle of the Beaufort cipher, which subtracts each letter from a key
+    letter. The cipher is its own inverse, so the cycle both encrypts and decrypts.
+
+    Args:
+        key (str): The key word.
+
+    Returns:
+        KeyCycle: The key cycle.
+    """
+    return KeyCycle([affine_table(25, shift) for shift in key_shifts(key)])
+
 
 def encrypt_caesar(plaintext, shift):
     """
@@ -12,14 +238,7 @@ def encrypt_caesar(plaintext, shift):
     Returns:
         str: The encrypted text.
     """
-    result = ""
-    for char in plaintext:
-        if char.isalpha():
-            shift_base = 65 if char.isupper() else 97
-            result += chr((ord(char) - shift_base - shift) % 26 + shift_base)
-        else:
-            result += char
-    return result
+    return plaintext.translate(caesar_table(shift))
 
 
 def encrypt_affine(plaintext, a, b):
@@ -34,14 +253,7 @@ def encrypt_affine(plaintext, a, b):
     Returns:
         str: The encrypted text.
     """
-    result = ""
-    for char in plaintext:
-        if char.isalpha():
-            shift_base = 65 if char.isupper() else 97
-            result += chr(((a * (ord(char) - shift_base) + b) % 26) + shift_base)
-        else:
-            result += char
-    return result
+    return plaintext.translate(affine_table(a, b))
 
 def encrypt_mono(plaintext, key):
     """
@@ -54,66 +266,250 @@ def encrypt_mono(plaintext, key):
     Returns:
         str: The encrypted text.
     """
+    return plaintext.translate(mono_table(key))
+
+
+def invert_mono_key(key):
+    """
+    Computes the key alphabet that undoes a Monoalphabetic key.
+
+    Args:
+        key (str): The key alphabet for the Monoalphabetic cipher.
+
+    Returns:
+        str: The inverse key alphabet.
+    """
     alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
-    key_map = {alphabet[i]: key[i] for i in range(26)}
-    result = ""
-    for char in plaintext:
-        if char.isalpha():
-            shift_base = 65 if char.isupper() else 97
-            result += key_map[char.upper()] if char.isupper() else key_map[char.upper()].lower()
-        else:
-            result += char
-    return result
+    inverse = dict(zip(key.upper(), alphabet))
+    return "".join(inverse[char] for char in alphabet)
+
+
+def encrypt_vigenere(plaintext, key):
+    """
+    Encrypts the given plaintext using the Vigenère cipher technique.
+
+    Args:
+        plaintext (str): The text to be encrypted.
+        key (str): The key word.
+
+    Returns:
+        str: The encrypted text.
+    """
+    return vigenere_cycle(key, "e").translate(plaintext)
+
+
+def encrypt_beaufort(plaintext, key):
+    """
+    Encrypts the given plaintext using the Beaufort cipher technique.
+
+    Args:
+        plaintext (str): The text to be encrypted.
+        key (str): The key word.
+
+    Returns:
+        str: The encrypted text.
+    """
+    return beaufort_cycle(key).translate(plaintext)
+
+
+def decrypt_caesar(ciphertext, shift):
+    """
+    Decrypts the given ciphertext using the Caesar cipher technique.
+
+    Args:
+        ciphertext (str): The text to be decrypted.
+        shift (int): The shift used for encryption.
+
+    Returns:
+        str: The decrypted text.
+    """
+    return ciphertext.translate(caesar_table(-shift))
+
+
+def decrypt_affine(ciphertext, a, b):
+    """
+    Decrypts the given ciphertext using the Affine cipher technique.
+
+    Args:
+        ciphertext (str): The text to be decrypted.
+        a (int): The multiplicative key, coprime with 26.
+        b (int): The additive key.
+
+    Returns:
+        str: The decrypted text.
+    """
+    return ciphertext.translate(affine_decryption_table(pow(a, -1, 26), b))
+
 
+def decrypt_mono(ciphertext, key):
+    """
+    Decrypts the given ciphertext using the Monoalphabetic cipher technique.
 
+    Args:
+        ciphertext (str): The text to be decrypted.
+        key (str): The key alphabet used for encryption.
 
-def write_output_file(mode, text):
+    Returns:
+        str: The decrypted text.
     """
-    Writes the decrypted text to an output file.
+    return ciphertext.translate(mono_table(invert_mono_key(key)))
+
+
+def decrypt_vigenere(ciphertext, key):
+    """
+    Decrypts the given ciphertext using the Vigenère cipher technique.
 
     Args:
-        mode (str): The mode of decryption (e.g., "caesar", "affine", "mono").
-        text (str): The decrypted text to write.
+        ciphertext (str): The text to be decrypted.
+        key (str): The key word used for encryption.
+
+    Returns:
+        str: The decrypted text.
+    """
+    return vigenere_cycle(key, "d").translate(ciphertext)
+
+
+def decrypt_beaufort(ciphertext, key):
     """
-    with open(f'encrypt_{mode}.txt', 'w') as file:
-        file.write(text)
+    Decrypts the given ciphertext using the Beaufort cipher technique.
+
+    Args:
+        ciphertext (str): The text to be decrypted.
+        key (str): The key word used for encryption.
+
+    Returns:
+        str: The decrypted text.
+    """
+    return beaufort_cycle(key).translate(ciphertext)
+
+
+def key_error(cipher, shift=None, a=None, b=None, key=None):
+    """
+    Checks that the key of a cipher is complete and valid.
+
+    Args:
+        cipher (str): The cipher technique (one of `CIPHERS`).
+        shift (int, optional): Shift amount for the Caesar cipher.
+        a (int, optional): Multiplicative key for the Affine cipher.
+        b (int, optional): Additive key for the Affine cipher.
+        key (str, optional): Key alphabet for the Monoalphabetic cipher, or key word
+            for the Vigenère and Beaufort ciphers.
+
+    Returns:
+        str: A description of the problem, or None if the key is valid.
+    """
+    if cipher == "caesar" and shift is None:
+        return "caesar requires -s/--shift"
+    if cipher == "affine" and (a is None or b is None or math.gcd(a, 26) != 1):
+        return "affine requires -a coprime with 26 and -b"
+    if cipher == "mono" and (key is None or sorted(key.upper()) != sorted(string.ascii_uppercase)):
+        return "mono requires -k/--key with the 26 letters of the alphabet"
+    if cipher in ("vigenere", "beaufort") and not (key and key.isascii() and key.isalpha()):
+        return f"{cipher} requires -k/--key with a key word of letters"
+    return None
+
+
+def cipher_table(cipher, mode, shift=None, a=None, b=None, key=None):
+    """
+    Selects the translation table for a cipher, key and mode.
+
+    Args:
+        cipher (str): The cipher technique (one of `CIPHERS`).
+        mode (str): "e" for encryption, "d" for decryption.
+        shift (int, optional): Shift amount for the Caesar cipher.
+        a (int, optional): Multiplicative key for the Affine cipher.
+        b (int, optional): Additive key for the Affine cipher.
+        key (str, optional): Key alphabet for the Monoalphabetic cipher, or key word
+            for the Vigenère and Beaufort ciphers.
+
+    Returns:
+        TranslationTable: The translation table, or a KeyCycle for the Vigenère and
+        Beaufort ciphers.
+    """
+    if cipher == "vigenere":
+        return vigenere_cycle(key, mode)
+    if cipher == "beaufort":
+        return beaufort_cycle(key)
+    if cipher == "caesar":
+        return caesar_table(shift % 26 if mode == "e" else -(shift % 26))
+    if cipher == "affine":
+        return affine_table(a, b) if mode == "e" else affine_decryption_table(pow(a, -1, 26), b)
+    return mono_table(key if mode == "e" else invert_mono_key(key))
+
+
+def translate_text(text, table):
+    """
+    Translates a text with a table from `cipher_table`.
+
+    Args:
+        text (str): The text to translate.
+        table (TranslationTable): The translation table, or a KeyCycle.
+
+    Returns:
+        str: The translated text.
+    """
+    if isinstance(table, KeyCycle):
+        return table.translate(text)
+    return text.translate(table)
+
+
+def translate_stream(source, target, table, chunk_size=CHUNK_SIZE, echo=None):
+    """
+    Translates a text stream chunk by chunk, so memory use does not grow with its size.
+
+    Args:
+        source (file): The text stream to read from.
+        target (file): The text stream to write the result to.
+        table (TranslationTable): The cipher's translation table, or a KeyCycle.
+        chunk_size (int, optional): Number of characters read at a time.
+        echo (file, optional): A stream that also receives the result, e.g. stdout.
+    """
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        chunk = translate_text(chunk, table)
+        target.write(chunk)
+        if echo is not None:
+            echo.write(chunk)
 
 
 
 def main():
     """
     Main function to parse command-line arguments and perform encryption or decryption
-    using Caesar, Affine, or Monoalphabetic ciphers.
+    using Caesar, Affine, Monoalphabetic, Vigenère or Beaufort ciphers.
     """
-    parser = argparse.ArgumentParser(description="Encrypt or decrypt using Caesar, Affine, or Monoalphabetic ciphers.")
-    parser.add_argument("cipher", choices=["caesar", "affine", "mono"], help="Cipher technique to use")
+    parser = argparse.ArgumentParser(description="Encrypt or decrypt using Caesar, Affine, Monoalphabetic, Vigenère "
+                                                 "or Beaufort ciphers.")
+    parser.add_argument("cipher", choices=CIPHERS, help="Cipher technique to use")
     parser.add_argument("file", help="Input file name/path")
     parser.add_argument("mode", choices=["e", "d"], help="Mode: e for encryption, d for decryption")
     parser.add_argument("-s", "--shift", type=int, help="Shift amount for Caesar Cipher")
     parser.add_argument("-a", type=int, help="a value for Affine Cipher")
     parser.add_argument("-b", type=int, help="b value for Affine Cipher")
-    parser.add_argument("-k", "--key", help="Key alphabet for Monoalphabetic Cipher")
+    parser.add_argument("-k", "--key", help="Key alphabet for Monoalphabetic Cipher, key word for Vigenère and Beaufort")
+    parser.add_argument("-o", "--output", help="Output file name/path (defaults to encrypt_<cipher>.txt or decrypt_<cipher>.txt)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Do not echo the result to stdout")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Number of characters processed at a time")
 
     args = parser.parse_args()
 
-    with open(args.file, 'r') as f:
-        text = f.read()
-
-    if args.cipher == "caesar":
-        if args.mode == "e":
-            result = encrypt_caesar(text, args.shift % 26)
-            write_output_file("caesar", result)
-
-    elif args.cipher == "affine":
-        if args.mode == "e":
-            result = encrypt_affine(text, args.a, args.b)
-
-    elif args.cipher == "mono":
-        if args.mode == "e":
-            result = encrypt_mono(text, args.key)
+    error = key_error(args.cipher, args.shift, args.a, args.b, args.key)
+    if error:
+        parser.error(error)
+    if args.chunk_size <= 0:
+        parser.error("--chunk-size must be positive")
 
+    table = cipher_table(args.cipher, args.mode, args.shift, args.a, args.b, args.key)
+    output = args.output or f"{'encrypt' if args.mode == 'e' else 'decrypt'}_{args.cipher}.txt"
+    echo = None if args.quiet else sys.stdout
 
-    print(result)
+    with open(args.file, 'r') as source, open(output, 'w') as target:
+        translate_stream(source, target, table, args.chunk_size, echo)
+    if echo is not None:
+        print()
 
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
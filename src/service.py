@@ -0,0 +1,531 @@
+import argparse
+import asyncio
+import concurrent.futures
+import importlib
+import itertools
+import json
+import os
+import socket
+import sys
+import time
+
+from ciphers import CIPHERS, cipher_table, key_error, translate_text
+
+# "break" is a keyword, so the breaker module cannot be imported with an import statement
+breaker = importlib.import_module("break")
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+# mono breaks waiting for a worker process; further requests wait to be queued
+QUEUE_SIZE = 16
+# requests of one connection that may be in progress before the server stops reading it
+PIPELINE_DEPTH = 8
+# longest request line the server accepts, so whole ciphertexts fit in one line
+LINE_LIMIT = 64 << 20
+DEFAULT_TIME_LIMIT = 30.0
+OPERATIONS = ("encrypt", "decrypt", "break", "ping")
+BREAK_CIPHERS = CIPHERS + ("auto",)
+# ciphers whose breakers are quick enough to run on a thread of the server process
+THREAD_CIPHERS = ("caesar", "affine", "vigenere", "beaufort")
+# request fields passed on to the monoalphabetic key search
+SEARCH_FIELDS = ("seed", "backend", "search", "init", "sample", "grow_sample")
+# most candidate keys a break response may list
+MAX_TOP_KEYS = 100
+
+# state of a worker process of the pool, set by init_service_worker
+_service_worker = {}
+
+
+def init_service_worker(dictionary_path, table_path):
+    """
+    Loads the language model a worker process scores every break with.
+
+    Args:
+        dictionary_path (str): Path of the dictionary file.
+        table_path (str): Path of the compiled score table, or None for the default.
+    """
+    _service_worker['model'] = breaker.LanguageModel(dictionary_path, table_path).load()
+
+
+def run_pooled_break(ciphertext, cipher, search_options, time_limit, top=None):
+    """
+    Breaks a ciphertext in a worker process of the pool.
+
+    The deadline is only set here, so time spent waiting in the queue does not count
+    against the time limit.
+
+    Args:
+        ciphertext (str): The text to be decrypted.
+        cipher (str): One of `BREAK_CIPHERS`.
+        search_options (dict): Keyword arguments of `find_key`.
+        time_limit (float): Seconds the key search may run, or None.
+        top (int, optional): Number of best keys to list.
+
+    Returns:
+        dict: The fields of the break response.
+    """
+    if time_limit:
+        search_options = dict(search_options, deadline=time.monotonic() + time_limit)
+    return break_fields(_service_worker['model'], ciphertext, cipher, search_options, top)
+
+
+def break_fields(model, ciphertext, cipher, search_options=None, top=None):
+    """
+    Breaks a ciphertext and describes the result.
+
+    Args:
+        model (LanguageModel): The language model to score decryptions with.
+        ciphertext (str): The text to be decrypted.
+        cipher (str): One of `BREAK_CIPHERS`.
+        search_options (dict, optional): Keyword arguments of `find_key`.
+        top (int, optional): Number of best distinct keys to list as candidates.
+
+    Returns:
+        dict: The cipher, key, decrypted text and share of dictionary words, plus the
+        candidate keys with their scores when they are asked for.
+
+    Raises:
+        ValueError: If the ciphertext could not be broken.
+    """
+    found = breaker.TopKeys(top) if top else None
+    broken = breaker.break_ciphertext(ciphertext, cipher, model, search_options, top=found)
+    if broken is None:
+        raise ValueError("no key found, the ciphertext has too few letters")
+    cipher, key, plaintext = broken
+    fields = {"cipher": cipher, "key": key, "text": plaintext,
+              "words": round(breaker.dictionary_hit_ratio(plaintext, model.words), 4)}
+    if found is not None:
+        fields["candidates"] = [{"key": candidate, "score": score} for score, candidate in found.ranked()]
+    return fields
+
+
+def translate_fields(request):
+    """
+    Encrypts or decrypts the text of a request with the key it gives.
+
+    Args:
+        request (dict): The request, with op, cipher, text and the key fields shift,
+            a, b or key.
+
+    Returns:
+        dict: The translated text.
+
+    Raises:
+        ValueError: If the cipher or key is missing, of the wrong type or invalid.
+    """
+    cipher = request.get("cipher")
+    if cipher not in CIPHERS:
+        raise ValueError(f"cipher must be one of {', '.join(CIPHERS)}")
+    shift, a, b, key = (request.get(field) for field in ("shift", "a", "b", "key"))
+    for name, value in (("shift", shift), ("a", a), ("b", b)):
+        if value is not None and type(value) is not int:
+            raise ValueError(f"{name} must be an integer")
+    if key is not None and not isinstance(key, str):
+        raise ValueError("key must be a string")
+    error = key_error(cipher, shift, a, b, key)
+    if error:
+        raise ValueError(error)
+    table = cipher_table(cipher, "e" if request["op"] == "encrypt" else "d", shift, a, b,
+                         key.upper() if key else None)
+    return {"text": translate_text(request_text(request), table)}
+
+
+def request_text(request):
+    """
+    Returns the text of a request.
+
+    Args:
+        request (dict): The request.
+
+    Returns:
+        str: The text.
+
+    Raises:
+        ValueError: If the request has no text.
+    """
+    text = request.get("text")
+    if not isinstance(text, str):
+        raise ValueError("text must be a string")
+    return text
+
+
+class BreakService:
+    """
+    Answers encrypt, decrypt and break requests with a language model that stays loaded.
+
+    Caesar, Affine, Vigenère and Beaufort breaks and key translations are cheap and run
+    on a thread next to the event loop. Monoalphabetic (and auto) breaks are queued for a pool of worker
+    processes, each holding its own copy of the model. The queue is bounded: when it is
+    full, new break requests wait for a free slot, and the connections sending them are
+    not read any further until then.
+    """
+
+    def __init__(self, model, workers=1, queue_size=QUEUE_SIZE, time_limit=DEFAULT_TIME_LIMIT):
+        """
+        Creates the service; `start` must be awaited before it answers requests.
+
+        Args:
+            model (LanguageModel): The language model.
+            workers (int, optional): Number of processes running mono breaks.
+            queue_size (int, optional): Number of mono breaks that may wait for a process.
+            time_limit (float, optional): Longest key search, in seconds; requests may
+                ask for less. None for no limit.
+        """
+        self.model = model
+        self.workers = workers
+        self.queue_size = queue_size
+        self.time_limit = time_limit
+        self.executor = None
+        self.queue = None
+        self.dispatchers = []
+
+    async def start(self):
+        """
+        Loads the language model and starts the worker processes.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.model.load)
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            self.workers, initializer=init_service_worker,
+            initargs=(self.model.dictionary_path, self.model.table_path))
+        self.queue = asyncio.Queue(self.queue_size)
+        self.dispatchers = [asyncio.create_task(self.dispatch()) for _ in range(self.workers)]
+
+    async def close(self):
+        """
+        Stops taking queued breaks and shuts the worker processes down.
+        """
+        for task in self.dispatchers:
+            task.cancel()
+        await asyncio.gather(*self.dispatchers, return_exceptions=True)
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+
+    async def dispatch(self):
+        """
+        Hands queued breaks to the pool, one at a time, for as long as the service runs.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            future, args = await self.queue.get()
+            try:
+                if not future.cancelled():
+                    result = await loop.run_in_executor(self.executor, run_pooled_break, *args)
+                    if not future.cancelled():
+                        future.set_result(result)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as error:
+                if not future.cancelled():
+                    future.set_exception(error)
+            finally:
+                self.queue.task_done()
+
+    def request_time_limit(self, request):
+        """
+        Returns the time limit of a break request, capped by the service's own.
+
+        Args:
+            request (dict): The request.
+
+        Returns:
+            float: Seconds the key search may run, or None for no limit.
+        """
+        limit = request.get("time_limit")
+        if limit is None:
+            return self.time_limit
+        if not isinstance(limit, (int, float)) or limit <= 0:
+            raise ValueError("time_limit must be a positive number")
+        return min(limit, self.time_limit) if self.time_limit else limit
+
+    async def break_text(self, request):
+        """
+        Breaks the text of a request.
+
+        Args:
+            request (dict): The request, with cipher (one of `BREAK_CIPHERS`), text and
+                optionally seed, backend, search, init, sample, grow_sample, time_limit
+                and top.
+
+        Returns:
+            dict: The fields of the break response.
+        """
+        cipher = request.get("cipher", "auto")
+        if cipher not in BREAK_CIPHERS:
+            raise ValueError(f"cipher must be one of {', '.join(BREAK_CIPHERS)}")
+        ciphertext = request_text(request)
+        top = request.get("top")
+        if top is not None and (type(top) is not int or not 1 <= top <= MAX_TOP_KEYS):
+            raise ValueError(f"top must be an integer from 1 to {MAX_TOP_KEYS}")
+        loop = asyncio.get_running_loop()
+        if cipher in THREAD_CIPHERS:
+            return await loop.run_in_executor(None, break_fields, self.model, ciphertext, cipher, None, top)
+        search_options = {field: request[field] for field in SEARCH_FIELDS if request.get(field) is not None}
+        if search_options.get("search", "hillclimb") not in breaker.SEARCH_STRATEGIES:
+            raise ValueError(f"search must be one of {', '.join(breaker.SEARCH_STRATEGIES)}")
+        if search_options.get("init", "random") not in breaker.INIT_MODES:
+            raise ValueError(f"init must be one of {', '.join(breaker.INIT_MODES)}")
+        sample = search_options.get("sample")
+        if sample is not None and (type(sample) is not int or sample < 4):
+            raise ValueError("sample must be an integer of at least 4 letters")
+        if type(search_options.get("grow_sample", False)) is not bool:
+            raise ValueError("grow_sample must be true or false")
+        time_limit = self.request_time_limit(request)
+        future = loop.create_future()
+        await self.queue.put((future, (ciphertext, cipher, search_options, time_limit, top)))
+        return await future
+
+    async def handle(self, request):
+        """
+        Answers one request.
+
+        Args:
+            request (dict): The decoded request line.
+
+        Returns:
+            dict: The response, with "ok" and the request's "id".
+        """
+        response = {"id": request.get("id")} if isinstance(request, dict) else {"id": None}
+        try:
+            if not isinstance(request, dict):
+                raise ValueError("a request must be a JSON object")
+            op = request.get("op")
+            if op == "ping":
+                fields = {"queued": self.queue.qsize(), "workers": self.workers}
+            elif op in ("encrypt", "decrypt"):
+                fields = translate_fields(request)
+            elif op == "break":
+                fields = await self.break_text(request)
+            else:
+                raise ValueError(f"op must be one of {', '.join(OPERATIONS)}")
+            response.update(ok=True, **fields)
+        except (ValueError, TypeError, KeyError) as error:
+            response.update(ok=False, error=str(error))
+        return response
+
+    async def serve_connection(self, reader, writer):
+        """
+        Reads JSON request lines from a client and writes one JSON response line for each.
+
+        Requests of a connection are answered concurrently, up to `PIPELINE_DEPTH` at a
+        time, so responses may come back in another order; they carry the request's id.
+
+        Args:
+            reader (asyncio.StreamReader): The client's stream.
+            writer (asyncio.StreamWriter): The stream to the client.
+        """
+        slots = asyncio.Semaphore(PIPELINE_DEPTH)
+        write_lock = asyncio.Lock()
+        pending = set()
+
+        async def answer(line):
+            request_id = None
+            try:
+                try:
+                    request = json.loads(line)
+                except ValueError as error:
+                    response = {"id": None, "ok": False, "error": f"invalid JSON: {error}"}
+                else:
+                    if isinstance(request, dict):
+                        request_id = request.get("id")
+                    response = await self.handle(request)
+                async with write_lock:
+                    writer.write(json.dumps(response).encode() + b"\n")
+                    await writer.drain()
+            except (ConnectionError, asyncio.CancelledError):
+                pass
+            except Exception as error:
+                # whatever went wrong, the client still gets an answer for its request
+                response = {"id": request_id, "ok": False, "error": f"internal error: {error}"}
+                try:
+                    async with write_lock:
+                        writer.write(json.dumps(response).encode() + b"\n")
+                        await writer.drain()
+                except (ConnectionError, asyncio.CancelledError):
+                    pass
+            finally:
+                slots.release()
+
+        try:
+            while True:
+                await slots.acquire()
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    writer.write(json.dumps({"id": None, "ok": False, "error": "request line too long"}).encode() + b"\n")
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    slots.release()
+                    continue
+                task = asyncio.create_task(answer(line))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.wait(pending)
+        except ConnectionError:
+            pass
+        finally:
+            for task in pending:
+                task.cancel()
+            writer.close()
+
+
+async def serve(service, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None):
+    """
+    Runs the service on a TCP port or a Unix socket until it is interrupted.
+
+    Args:
+        service (BreakService): The service answering the requests.
+        host (str, optional): Address to listen on.
+        port (int, optional): TCP port to listen on.
+        unix_path (str, optional): Path of a Unix socket to listen on instead of TCP.
+    """
+    await service.start()
+    try:
+        if unix_path:
+            server = await asyncio.start_unix_server(service.serve_connection, unix_path, limit=LINE_LIMIT)
+            print(f"Serving on {unix_path}", flush=True)
+        else:
+            server = await asyncio.start_server(service.serve_connection, host, port, limit=LINE_LIMIT)
+            print(f"Serving on {host}:{server.sockets[0].getsockname()[1]}", flush=True)
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+        if unix_path and os.path.exists(unix_path):
+            os.unlink(unix_path)
+
+
+class ServiceClient:
+    """
+    A blocking client of the break service that sends one request at a time.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None, timeout=None):
+        """
+        Connects to the service.
+
+        Args:
+            host (str, optional): Address of the service.
+            port (int, optional): TCP port of the service.
+            unix_path (str, optional): Path of the service's Unix socket, used instead of TCP.
+            timeout (float, optional): Seconds to wait for a response, or None to wait forever.
+        """
+        if unix_path:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            self.sock.connect(unix_path)
+        else:
+            self.sock = socket.create_connection((host, port), timeout)
+        self.stream = self.sock.makefile('rwb')
+        self.ids = itertools.count(1)
+
+    def request(self, **fields):
+        """
+        Sends a request and waits for its response.
+
+        Args:
+            **fields: The request fields, e.g. op="break", cipher="mono", text=...
+
+        Returns:
+            dict: The decoded response.
+
+        Raises:
+            ConnectionError: If the service closed the connection.
+        """
+        fields.setdefault("id", next(self.ids))
+        self.stream.write(json.dumps(fields).encode() + b"\n")
+        self.stream.flush()
+        line = self.stream.readline()
+        if not line:
+            raise ConnectionError("the service closed the connection")
+        return json.loads(line)
+
+    def close(self):
+        """
+        Closes the connection.
+        """
+        self.stream.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main():
+    """
+    Runs the break service, or sends it one request from the command line.
+
+    The "serve" command loads the language model once and answers JSON lines on a TCP
+    port or a Unix socket. The "client" command reads a text file, sends it with the given
+    operation, cipher and key, and prints the JSON response.
+    """
+    parser = argparse.ArgumentParser(description="Serve encrypt and break requests as JSON lines.")
+    address = argparse.ArgumentParser(add_help=False)
+    address.add_argument("--host", default=DEFAULT_HOST, help="Address of the service")
+    address.add_argument("--port", type=int, default=DEFAULT_PORT, help="TCP port of the service")
+    address.add_argument("--unix", help="Unix socket path, used instead of TCP")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", parents=[address], help="Run the service")
+    serve_parser.add_argument("-d", "--dictionary", default=breaker.DICTIONARY_FILE, help="Dictionary file name/path")
+    serve_parser.add_argument("-t", "--table", help="Compiled score table path")
+    serve_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                              help="Number of processes running mono breaks")
+    serve_parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE,
+                              help="Number of mono breaks that may wait for a process")
+    serve_parser.add_argument("--time-limit", type=float, default=DEFAULT_TIME_LIMIT,
+                              help="Longest key search in seconds (0 for no limit)")
+
+    client_parser = subparsers.add_parser("client", parents=[address], help="Send one request to the service")
+    client_parser.add_argument("op", choices=OPERATIONS, help="Operation to request")
+    client_parser.add_argument("file", nargs="?", help="Input file name/path")
+    client_parser.add_argument("-c", "--cipher", choices=BREAK_CIPHERS, help="Cipher technique")
+    client_parser.add_argument("-s", "--shift", type=int, help="Shift amount for Caesar Cipher")
+    client_parser.add_argument("-a", type=int, help="a value for Affine Cipher")
+    client_parser.add_argument("-b", type=int, help="b value for Affine Cipher")
+    client_parser.add_argument("-k", "--key", help="Key alphabet for Monoalphabetic Cipher")
+    client_parser.add_argument("--seed", type=int, help="Seed for a reproducible key search")
+    client_parser.add_argument("--search", choices=breaker.SEARCH_STRATEGIES, help="Key search strategy")
+    client_parser.add_argument("--init", choices=breaker.INIT_MODES, help="Key search start")
+    client_parser.add_argument("--time-limit", type=float, help="Seconds the key search may run")
+    client_parser.add_argument("--top", type=int, help="Number of best keys to list with a break")
+
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        if args.workers < 1 or args.queue_size < 1:
+            parser.error("--workers and --queue-size must be positive")
+        model = breaker.LanguageModel(args.dictionary, args.table)
+        service = BreakService(model, args.workers, args.queue_size, args.time_limit or None)
+        try:
+            asyncio.run(serve(service, args.host, args.port, args.unix))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    fields = {"op": args.op}
+    if args.op != "ping":
+        if args.file is None:
+            parser.error(f"{args.op} needs an input file")
+        with open(args.file, 'r') as f:
+            fields["text"] = f.read()
+    for name in ("cipher", "shift", "a", "b", "key", "seed", "search", "init", "time_limit", "top"):
+        if getattr(args, name) is not None:
+            fields[name] = getattr(args, name)
+    with ServiceClient(args.host, args.port, args.unix) as client:
+        response = client.request(**fields)
+    json.dump(response, sys.stdout)
+    print()
+    if not response.get("ok"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
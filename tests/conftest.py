@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pytest
+
+# the tools are scripts in src/, not an installed package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src"))
+
+# an English text long enough for the key searches, whose words make up the test dictionary
+ENGLISH_TEXT = (
+    "The licenses for most software and other practical works are designed to take away your freedom "
+    "to share and change the works. By contrast, the general public license is intended to guarantee "
+    "your freedom to share and change all versions of a program, to make sure it remains free software "
+    "for all its users. When we speak of free software, we are referring to freedom, not price. Our "
+    "licenses are designed to make sure that you have the freedom to distribute copies of free software, "
+    "that you receive source code or can get it if you want it, that you can change the software or use "
+    "pieces of it in new free programs, and that you know you can do these things. To protect your "
+    "rights, we need to prevent others from denying you these rights or asking you to surrender the "
+    "rights. Therefore, you have certain responsibilities if you distribute copies of the software, or "
+    "if you modify it: responsibilities to respect the freedom of others."
+)
+
+
+@pytest.fixture
+def dictionary(tmp_path):
+    """
+    Writes a dictionary of the words of `ENGLISH_TEXT` and returns its path.
+    """
+    words = {word.strip(".,:").lower() for word in ENGLISH_TEXT.split()}
+    path = tmp_path / "dictionary.txt"
+    path.write_text("\n".join(sorted(words)) + "\n")
+    return str(path)
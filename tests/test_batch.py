@@ -0,0 +1,67 @@
+import importlib
+import json
+
+import pytest
+
+import ciphers
+from conftest import ENGLISH_TEXT
+
+breaker = importlib.import_module("break")
+
+
+@pytest.fixture
+def ciphertexts(tmp_path):
+    """
+    Writes one ciphertext per cipher into a directory and returns the directory.
+    """
+    directory = tmp_path / "ciphertexts"
+    directory.mkdir()
+    (directory / "caesar.txt").write_text(ciphers.encrypt_caesar(ENGLISH_TEXT, 5))
+    (directory / "affine.txt").write_text(ciphers.encrypt_affine(ENGLISH_TEXT, 5, 8))
+    (directory / "mono.txt").write_text(ciphers.encrypt_mono(ENGLISH_TEXT[:300], "QWERTYUIOPASDFGHJKLZXCVBNM"))
+    return str(directory)
+
+
+@pytest.fixture
+def stats():
+    yield
+    breaker.enable_stats(False)
+
+
+def run_batch(dictionary, ciphertexts, tmp_path, workers):
+    report_path = str(tmp_path / f"report{workers}.jsonl")
+    search_options = dict(seed=3, search="anneal", schedule=breaker.SearchSchedule(iterations=500))
+    breaker.enable_stats()
+    broken = breaker.run_batch(breaker.collect_batch_files([ciphertexts]), report_path, dictionary,
+                               str(tmp_path / "dictionary.qgram"), "auto", workers, search_options)
+    with open(report_path) as report:
+        records = [json.loads(line) for line in report]
+    return broken, records, breaker.stats_report()
+
+
+def test_stats_do_not_depend_on_the_workers(dictionary, ciphertexts, tmp_path, stats):
+    # compiled up front, so neither run times the compilation
+    breaker.LanguageModel(dictionary, str(tmp_path / "dictionary.qgram")).load()
+    broken, records, single = run_batch(dictionary, ciphertexts, tmp_path, 1)
+    assert broken == 3
+    assert all("stats" not in record for record in records)
+    _, pooled_records, pooled = run_batch(dictionary, ciphertexts, tmp_path, 2)
+    assert [(record["cipher"], record["key"]) for record in pooled_records] == \
+        [(record["cipher"], record["key"]) for record in records]
+    assert pooled["counts"] == single["counts"]
+    assert pooled["counts"]["restarts"] > 0
+    assert set(pooled["phases"]) == set(single["phases"])
+    assert {"find_key", "rank_caesar_shifts", "rank_affine_keys"} <= set(pooled["phases"])
+
+
+def test_stats_count_the_lookups_of_every_swap(dictionary, tmp_path, stats):
+    model = breaker.LanguageModel(dictionary, str(tmp_path / "dictionary.qgram")).load()
+    table = model.ngrams
+    ciphertext = ciphers.encrypt_mono(ENGLISH_TEXT[:300], "QWERTYUIOPASDFGHJKLZXCVBNM")
+    breaker.enable_stats()
+    breaker.find_key(ciphertext, table.alphabet, table, seed=1)
+    counts = breaker.stats_report()["counts"]
+    windows, _ = breaker.group_quadgram_windows(breaker.char_to_number(ciphertext, table.alphabet), 26, table.order)
+    lookups = counts["quadgram_hits"] + counts["quadgram_misses"]
+    assert lookups > counts["score_evaluations"] * len(windows)
+    assert counts["quadgram_hits"] > 0
@@ -0,0 +1,25 @@
+import benchmark
+
+
+def test_frequency_start_records_the_restarts_it_saves(dictionary, monkeypatch):
+    model = benchmark.breaker.LanguageModel(dictionary)
+
+    def break_once(cipher, ciphertext, model, search_options):
+        restarts = 8 if search_options["init"] == "random" else 2
+        return None, restarts, restarts * 100
+
+    monkeypatch.setattr(benchmark, "break_once", break_once)
+    records = benchmark.benchmark_breaking(model, [400], seed=0, trials=2, ciphers=("mono",),
+                                           inits=("random", "frequency"))
+    by_init = {record["init"]: record for record in records}
+    assert "restarts_saved" not in by_init["random"]
+    assert by_init["frequency"]["restarts_saved"] == 0.75
+
+
+def test_compare_flags_fewer_restarts_saved():
+    record = {"cipher": "mono", "length": 400, "init": "frequency", "search": "hillclimb", "seconds": 1.0,
+              "success_rate": 1.0, "restarts_saved": 0.6}
+    baseline = {"breaking": [record]}
+    assert benchmark.compare_results(baseline, {"breaking": [dict(record, restarts_saved=0.5)]}) == []
+    regressions = benchmark.compare_results(baseline, {"breaking": [dict(record, restarts_saved=0.3)]})
+    assert regressions == ["break mono 400 frequency hillclimb: restarts saved 60% -> 30%"]
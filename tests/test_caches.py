@@ -0,0 +1,65 @@
+import importlib
+import json
+import os
+
+import pytest
+
+breaker = importlib.import_module("break")
+
+
+@pytest.fixture
+def checksums(monkeypatch):
+    """
+    Counts how often a dictionary is hashed.
+    """
+    calls = []
+    checksum = breaker.dictionary_checksum
+
+    def counted(path):
+        calls.append(path)
+        return checksum(path)
+
+    monkeypatch.setattr(breaker, "dictionary_checksum", counted)
+    return calls
+
+
+def touch(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_touched_dictionary_keeps_its_score_table(dictionary, tmp_path, checksums):
+    table_path = breaker.compile_score_table(dictionary, str(tmp_path / "table"))
+    touch(dictionary)
+    checksums.clear()
+    assert breaker.read_score_table(table_path, dictionary) is not None
+    assert len(checksums) == 1
+    assert breaker.SCORE_TABLE_HEADER.unpack_from(open(table_path, 'rb').read())[6] == os.stat(dictionary).st_mtime_ns
+    assert breaker.read_score_table(table_path, dictionary) is not None
+    assert len(checksums) == 1
+
+
+def test_touched_dictionary_keeps_its_word_cache(dictionary, tmp_path, checksums):
+    cache_path = str(tmp_path / "dictionary.words")
+    words, frequencies = breaker.compile_word_cache(dictionary, cache_path)
+    touch(dictionary)
+    checksums.clear()
+    assert breaker.read_word_cache(cache_path, dictionary) == (words, frequencies)
+    assert len(checksums) == 1
+    with open(cache_path) as file:
+        assert json.loads(file.readline())["mtime_ns"] == os.stat(dictionary).st_mtime_ns
+    assert breaker.read_word_cache(cache_path, dictionary) == (words, frequencies)
+    assert len(checksums) == 1
+
+
+def test_changed_dictionary_of_the_same_size_invalidates_the_caches(dictionary, tmp_path):
+    table_path = breaker.compile_score_table(dictionary, str(tmp_path / "table"))
+    cache_path = str(tmp_path / "dictionary.words")
+    breaker.compile_word_cache(dictionary, cache_path)
+    with open(dictionary) as file:
+        text = file.read()
+    with open(dictionary, 'w') as file:
+        file.write(text.replace("a\n", "z\n", 1))
+    touch(dictionary)
+    assert breaker.read_score_table(table_path, dictionary) is None
+    assert breaker.read_word_cache(cache_path, dictionary) is None
@@ -0,0 +1,89 @@
+import io
+
+import pytest
+
+import ciphers
+
+PLAINTEXT = "Attack at Dawn! The 3 quick brown foxes jump over 12 lazy dogs, don't they?\nZebra-crossing."
+MONO_KEY = "QWERTYUIOPASDFGHJKLZXCVBNM"
+
+
+@pytest.mark.parametrize("shift", [0, 3, 13, 25, 26, -4])
+def test_caesar_round_trip(shift):
+    ciphertext = ciphers.encrypt_caesar(PLAINTEXT, shift)
+    assert ciphers.decrypt_caesar(ciphertext, shift) == PLAINTEXT
+
+
+def test_caesar_keeps_case_and_other_characters():
+    assert ciphers.encrypt_caesar("Hello, World 42!", 3) == "Ebiil, Tloia 42!"
+
+
+@pytest.mark.parametrize("a, b", [(1, 0), (5, 8), (7, 3), (25, 25)])
+def test_affine_round_trip(a, b):
+    ciphertext = ciphers.encrypt_affine(PLAINTEXT, a, b)
+    assert ciphers.decrypt_affine(ciphertext, a, b) == PLAINTEXT
+
+
+@pytest.mark.parametrize("key", [MONO_KEY, MONO_KEY.lower(), "ZYXWVUTSRQPONMLKJIHGFEDCBA"])
+def test_mono_round_trip(key):
+    ciphertext = ciphers.encrypt_mono(PLAINTEXT, key)
+    assert ciphertext != PLAINTEXT
+    assert ciphers.decrypt_mono(ciphertext, key) == PLAINTEXT
+
+
+@pytest.mark.parametrize("cipher, keys", [
+    ("caesar", dict(shift=7)),
+    ("affine", dict(a=5, b=8)),
+    ("mono", dict(key=MONO_KEY)),
+])
+@pytest.mark.parametrize("chunk_size", [1, 5, 1 << 20])
+def test_stream_matches_whole_text(cipher, keys, chunk_size):
+    encrypted = io.StringIO()
+    ciphers.translate_stream(io.StringIO(PLAINTEXT), encrypted, ciphers.cipher_table(cipher, "e", **keys), chunk_size)
+    assert encrypted.getvalue() == ciphers.translate_text(PLAINTEXT, ciphers.cipher_table(cipher, "e", **keys))
+    decrypted = io.StringIO()
+    ciphers.translate_stream(io.StringIO(encrypted.getvalue()), decrypted, ciphers.cipher_table(cipher, "d", **keys),
+                             chunk_size)
+    assert decrypted.getvalue() == PLAINTEXT
+
+
+@pytest.mark.parametrize("cipher, keys", [
+    ("caesar", dict()),
+    ("affine", dict(a=13, b=1)),
+    ("mono", dict(key="ABC")),
+])
+def test_key_error_rejects_invalid_keys(cipher, keys):
+    assert ciphers.key_error(cipher, **keys) is not None
+
+
+@pytest.mark.parametrize("key", ["LEMON", "lemonade", "a", "Z"])
+def test_vigenere_round_trip(key):
+    ciphertext = ciphers.encrypt_vigenere(PLAINTEXT, key)
+    assert ciphers.decrypt_vigenere(ciphertext, key) == PLAINTEXT
+
+
+def test_vigenere_skips_non_letters():
+    assert ciphers.encrypt_vigenere("ATTACK AT DAWN", "LEMON") == "LXFOPV EF RNHR"
+
+
+@pytest.mark.parametrize("key", ["KEY", "beaufort", "A"])
+def test_beaufort_round_trip(key):
+    ciphertext = ciphers.encrypt_beaufort(PLAINTEXT, key)
+    assert ciphertext != PLAINTEXT
+    assert ciphers.decrypt_beaufort(ciphertext, key) == PLAINTEXT
+
+
+@pytest.mark.parametrize("cipher", ["vigenere", "beaufort"])
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+def test_key_cycle_continues_across_chunks(cipher, chunk_size):
+    encrypted = io.StringIO()
+    ciphers.translate_stream(io.StringIO(PLAINTEXT), encrypted, ciphers.cipher_table(cipher, "e", key="Lemon"),
+                             chunk_size)
+    encrypt = ciphers.encrypt_vigenere if cipher == "vigenere" else ciphers.encrypt_beaufort
+    assert encrypted.getvalue() == encrypt(PLAINTEXT, "Lemon")
+
+
+@pytest.mark.parametrize("cipher", ["vigenere", "beaufort"])
+@pytest.mark.parametrize("key", [None, "", "k3y", "clé"])
+def test_key_error_rejects_invalid_key_words(cipher, key):
+    assert ciphers.key_error(cipher, key=key) is not None
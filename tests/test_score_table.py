@@ -0,0 +1,82 @@
+import importlib
+
+import pytest
+
+breaker = importlib.import_module("break")
+
+
+def header_fields(table_path):
+    with open(table_path, 'rb') as file:
+        return list(breaker.SCORE_TABLE_HEADER.unpack(file.read(breaker.SCORE_TABLE_HEADER.size)))
+
+
+def rewrite_header(table_path, **changes):
+    names = ["magic", "version", "typecode", "order", "count", "size", "mtime_ns", "checksum", "alphabet_bytes",
+             "flags"]
+    fields = header_fields(table_path)
+    for name, value in changes.items():
+        fields[names.index(name)] = value
+    with open(table_path, 'r+b') as file:
+        file.write(breaker.SCORE_TABLE_HEADER.pack(*fields))
+
+
+@pytest.mark.parametrize("order", breaker.NGRAM_ORDERS)
+def test_compiled_table_round_trips(dictionary, tmp_path, order):
+    table_path = breaker.compile_score_table(dictionary, str(tmp_path / "table"), "abcdefghijklmnopqrstuvwxyz", order)
+    table = breaker.read_score_table(table_path, dictionary, "ABCDEFGHIJKLMNOPQRSTUVWXYZ", order)
+    assert table is not None
+    assert (table.alphabet, table.order, table.radix, table.trained) == (breaker.english_alphabet, order, 26, False)
+    assert len(table.scores) == 26 ** order
+    assert max(table.scores) > 0
+
+
+def test_default_path_depends_on_order_and_alphabet(dictionary):
+    assert breaker.score_table_path(dictionary).endswith("dictionary.qgram")
+    assert breaker.score_table_path(dictionary, 2).endswith("dictionary.bgram")
+    assert breaker.score_table_path(dictionary, 4, "abc") != breaker.score_table_path(dictionary, 4, "abd")
+
+
+@pytest.mark.parametrize("alphabet, order", [("abcdefghijklmnopqrstuvwxyzé", None), (None, 3)])
+def test_table_of_another_alphabet_or_order_is_rejected(dictionary, tmp_path, alphabet, order):
+    table_path = breaker.compile_score_table(dictionary, str(tmp_path / "table"))
+    assert breaker.read_score_table(table_path, dictionary, alphabet, order) is None
+
+
+@pytest.mark.parametrize("changes", [
+    dict(magic=b'XXXX'),
+    dict(version=breaker.SCORE_TABLE_VERSION - 1),
+    dict(version=breaker.SCORE_TABLE_VERSION + 1),
+    dict(order=5),
+    dict(count=1),
+])
+def test_table_with_another_header_is_rejected(dictionary, tmp_path, changes):
+    table_path = breaker.compile_score_table(dictionary, str(tmp_path / "table"))
+    rewrite_header(table_path, **changes)
+    assert breaker.read_score_table(table_path) is None
+
+
+def test_truncated_table_is_rejected(tmp_path):
+    table_path = tmp_path / "table"
+    table_path.write_bytes(b'QGRM')
+    assert breaker.read_score_table(str(table_path)) is None
+
+
+def test_table_of_a_changed_dictionary_is_recompiled(dictionary, tmp_path):
+    table_path = breaker.compile_score_table(dictionary, str(tmp_path / "table"))
+    with open(dictionary, 'a') as file:
+        file.write("quizzical\n")
+    assert breaker.read_score_table(table_path, dictionary) is None
+    table = breaker.load_score_table(dictionary, table_path)
+    assert header_fields(table_path)[5] == len(open(dictionary, 'rb').read())
+    quiz = ((16 * 26 + 20) * 26 + 8) * 26 + 25
+    assert table.scores[quiz] > 0
+
+
+def test_scores_start_at_a_multiple_of_eight(dictionary, tmp_path):
+    alphabet = "abcdefghijklmnopqrstuvwxyzäö"
+    table_path = breaker.compile_score_table(dictionary, str(tmp_path / "table"), alphabet, 2)
+    alphabet_bytes = header_fields(table_path)[8]
+    assert alphabet_bytes == len(alphabet.encode('utf-8'))
+    assert breaker.score_table_offset(alphabet_bytes) % 8 == 0
+    assert breaker.read_score_table(table_path, alphabet=alphabet, order=2).alphabet == alphabet
+
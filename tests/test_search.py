@@ -0,0 +1,53 @@
+import importlib
+
+import pytest
+
+import ciphers
+from conftest import ENGLISH_TEXT
+
+breaker = importlib.import_module("break")
+
+MONO_KEY = "QWERTYUIOPASDFGHJKLZXCVBNM"
+
+
+@pytest.fixture
+def model(dictionary, tmp_path):
+    """
+    A language model of the test dictionary, with its caches in the temporary directory.
+    """
+    return breaker.LanguageModel(dictionary, str(tmp_path / "dictionary.qgram"),
+                                 str(tmp_path / "dictionary.words")).load()
+
+
+@pytest.fixture
+def ciphertext():
+    return ciphers.encrypt_mono(ENGLISH_TEXT, MONO_KEY)
+
+
+@pytest.mark.parametrize("search", breaker.SEARCH_STRATEGIES)
+def test_seeded_search_does_not_depend_on_the_workers(model, ciphertext, search):
+    table = model.ngrams
+    short = ciphertext[:300]
+    schedule = breaker.SearchSchedule(iterations=500)
+    keys = [breaker.find_key(short, table.alphabet, table, workers, seed=7, search=search, schedule=schedule)
+            for workers in (1, 2)]
+    assert keys[0] == keys[1]
+    assert breaker.find_key(short, table.alphabet, table, seed=7, search=search, schedule=schedule) == keys[0]
+
+
+def test_search_recovers_the_key(model, ciphertext):
+    table = model.ngrams
+    key = breaker.find_key(ciphertext, table.alphabet, table, seed=1)
+    decryption = breaker.break_mono(ciphertext, breaker.key_mapping(table.alphabet, key))
+    assert decryption == ENGLISH_TEXT
+
+
+def test_progress_is_reported_while_a_restart_runs(model, ciphertext, monkeypatch):
+    table = model.ngrams
+    monkeypatch.setattr(breaker, "PROGRESS_PULSE_INTERVAL", 0.0)
+    progress = []
+    breaker.find_key(ciphertext, table.alphabet, table, seed=1, on_progress=progress.append)
+    during_first = [report for report in progress if report.restarts == 0]
+    assert during_first and during_first[-1].evaluations > 0
+    assert [report.evaluations for report in progress] == sorted(report.evaluations for report in progress)
+
@@ -0,0 +1,104 @@
+import asyncio
+import importlib
+import json
+
+import pytest
+
+import ciphers
+import service
+from conftest import ENGLISH_TEXT
+
+breaker = importlib.import_module("break")
+
+
+@pytest.fixture
+def break_service(dictionary, tmp_path):
+    """
+    A service that is not started: it answers everything but queued mono breaks.
+    """
+    model = breaker.LanguageModel(dictionary, str(tmp_path / "dictionary.qgram"), str(tmp_path / "dictionary.words"))
+    return service.BreakService(model)
+
+
+def exchange(break_service, lines):
+    """
+    Sends request lines to a service over a local connection.
+
+    Returns:
+        dict: The responses by request id.
+    """
+    async def run():
+        server = await asyncio.start_server(break_service.serve_connection, '127.0.0.1', 0, limit=service.LINE_LIMIT)
+        async with server:
+            reader, writer = await asyncio.open_connection('127.0.0.1', server.sockets[0].getsockname()[1])
+            writer.write(b"".join(line.encode() + b"\n" for line in lines))
+            writer.write_eof()
+            data = await reader.read()
+            writer.close()
+        return data
+
+    responses = [json.loads(line) for line in asyncio.run(run()).decode().splitlines()]
+    assert len(responses) == len(lines)
+    return {response["id"]: response for response in responses}
+
+
+@pytest.mark.parametrize("request_fields, error", [
+    (dict(op="launch"), "op must be one of"),
+    (dict(op="encrypt", cipher="enigma", text="abc"), "cipher must be one of"),
+    (dict(op="encrypt", cipher="caesar", text="abc", shift="3"), "shift must be an integer"),
+    (dict(op="encrypt", cipher="caesar", text="abc", shift=True), "shift must be an integer"),
+    (dict(op="encrypt", cipher="affine", text="abc", a=5.0, b=8), "a must be an integer"),
+    (dict(op="encrypt", cipher="affine", text="abc", a=13, b=8), "affine requires"),
+    (dict(op="decrypt", cipher="mono", text="abc", key=["Q"]), "key must be a string"),
+    (dict(op="decrypt", cipher="vigenere", text="abc"), "vigenere requires"),
+    (dict(op="encrypt", cipher="caesar", shift=3), "text must be a string"),
+    (dict(op="break", cipher="enigma", text="abc"), "cipher must be one of"),
+    (dict(op="break", cipher="caesar", text="abc", top=0), "top must be an integer"),
+    (dict(op="break", cipher="mono", text="abc", search="guess"), "search must be one of"),
+    (dict(op="break", cipher="mono", text="abc", init="sorted"), "init must be one of"),
+    (dict(op="break", cipher="mono", text="abc", sample="400"), "sample must be an integer"),
+    (dict(op="break", cipher="mono", text="abc", sample=2), "sample must be an integer"),
+    (dict(op="break", cipher="mono", text="abc", grow_sample="yes"), "grow_sample must be true or false"),
+    (dict(op="break", cipher="mono", text="abc", time_limit=-1), "time_limit must be a positive number"),
+])
+def test_malformed_request_gets_an_error(break_service, request_fields, error):
+    responses = exchange(break_service, [json.dumps(dict(request_fields, id=7))])
+    assert responses[7]["ok"] is False
+    assert error in responses[7]["error"]
+
+
+@pytest.mark.parametrize("line, error", [
+    ("{not json", "invalid JSON"),
+    ("[1, 2]", "a request must be a JSON object"),
+    ('"encrypt"', "a request must be a JSON object"),
+])
+def test_line_that_is_no_request_gets_an_error(break_service, line, error):
+    responses = exchange(break_service, [line])
+    assert responses[None]["ok"] is False
+    assert error in responses[None]["error"]
+
+
+def test_every_request_of_a_connection_is_answered(break_service):
+    ciphertext = ciphers.encrypt_caesar(ENGLISH_TEXT, 11)
+    responses = exchange(break_service, [
+        json.dumps(dict(id=1, op="encrypt", cipher="caesar", text="Attack at dawn", shift=3)),
+        "{broken",
+        json.dumps(dict(id=2, op="decrypt", cipher="caesar", shift="x", text="abc")),
+        json.dumps(dict(id=3, op="break", cipher="caesar", text=ciphertext, top=2)),
+    ])
+    assert responses[1] == {"id": 1, "ok": True, "text": ciphers.encrypt_caesar("Attack at dawn", 3)}
+    assert responses[None]["ok"] is False
+    assert responses[2]["ok"] is False
+    assert responses[3]["ok"] is True
+    assert responses[3]["text"] == ENGLISH_TEXT
+    assert ciphers.encrypt_caesar(ciphertext, responses[3]["key"]) == ENGLISH_TEXT
+    assert len(responses[3]["candidates"]) == 2
+
+
+def test_unexpected_failure_is_still_answered(break_service, monkeypatch):
+    async def fail(request):
+        raise RuntimeError("model went away")
+
+    monkeypatch.setattr(break_service, "handle", fail)
+    responses = exchange(break_service, [json.dumps(dict(id="a", op="ping"))])
+    assert responses["a"] == {"id": "a", "ok": False, "error": "internal error: model went away"}
@@ -0,0 +1,50 @@
+import importlib
+import subprocess
+import sys
+
+import pytest
+
+import ciphers
+from conftest import ENGLISH_TEXT
+
+breaker = importlib.import_module("break")
+
+
+def test_keeps_the_best_distinct_keys():
+    top = breaker.TopKeys(3)
+    for score, key in [(5, "a"), (9, "b"), (1, "c"), (9, "b"), (7, "d"), (2, "e")]:
+        top.add(score, key)
+    assert top.ranked() == [(9, "b"), (7, "d"), (5, "a")]
+    assert len(top) == 3
+
+
+def test_equal_scores_rank_in_offer_order():
+    top = breaker.TopKeys(2)
+    for key in ["first", "second", "third"]:
+        top.add(4, key)
+    assert top.ranked() == [(4, "first"), (4, "second")]
+
+
+def test_relabel_keeps_the_ranking():
+    top = breaker.TopKeys(3)
+    top.add(3, "abc")
+    top.add(8, "xyz")
+    top.relabel(str.upper)
+    assert top.ranked() == [(8, "XYZ"), (3, "ABC")]
+
+
+def test_size_must_be_positive():
+    with pytest.raises(ValueError):
+        breaker.TopKeys(0)
+
+
+def test_mono_command_lists_uppercase_keys(dictionary, tmp_path):
+    ciphertext = tmp_path / "ciphertext.txt"
+    ciphertext.write_text(ciphers.encrypt_mono(ENGLISH_TEXT, "QWERTYUIOPASDFGHJKLZXCVBNM"))
+    result = subprocess.run([sys.executable, breaker.__file__, "mono", str(ciphertext), "-d", dictionary,
+                             "--seed", "1", "--top", "2"], capture_output=True, text=True, cwd=tmp_path, check=True)
+    listed = result.stdout.split("Best keys found:\n")[1].splitlines()
+    assert len(listed) == 2
+    for line in listed:
+        key = line.split(". ", 1)[1].split(":")[0]
+        assert key == key.upper() and len(key) == 26
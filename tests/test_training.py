@@ -0,0 +1,67 @@
+import gzip
+import importlib
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ENGLISH_TEXT
+
+breaker = importlib.import_module("break")
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    """
+    Writes a corpus of one plain and one compressed file and returns its directory.
+    """
+    directory = tmp_path / "corpus"
+    directory.mkdir()
+    (directory / "a.txt").write_text(ENGLISH_TEXT)
+    with gzip.open(directory / "b.txt.gz", 'wt') as file:
+        file.write(ENGLISH_TEXT.upper())
+    return str(directory)
+
+
+def test_trained_table_is_marked_and_never_stale(dictionary, corpus, tmp_path):
+    table_path = breaker.train_score_table([corpus], str(tmp_path / "table"), order=3)
+    with open(dictionary, 'a') as file:
+        file.write("quizzical\n")
+    table = breaker.read_score_table(table_path, dictionary)
+    assert table.trained and table.order == 3
+
+
+def test_chunks_count_like_the_whole_file(corpus, tmp_path):
+    whole = breaker.train_score_table([corpus], str(tmp_path / "whole"), order=2)
+    chunked = breaker.train_score_table([corpus], str(tmp_path / "chunked"), order=2, chunk_size=7)
+    assert list(breaker.read_score_table(whole).scores) == list(breaker.read_score_table(chunked).scores)
+
+
+def test_trained_table_of_another_order_is_not_overwritten(dictionary, corpus, tmp_path):
+    table_path = breaker.train_score_table([corpus], str(tmp_path / "table"), order=3)
+    with pytest.raises(breaker.ScoreTableError, match="was trained for"):
+        breaker.load_score_table(dictionary, table_path, order=4)
+    assert breaker.read_score_table(table_path).order == 3
+
+
+@pytest.mark.parametrize("sources", [[], ["missing/*.txt"]])
+def test_empty_corpus_is_rejected(tmp_path, sources):
+    with pytest.raises(breaker.ScoreTableError):
+        breaker.train_score_table(sources, str(tmp_path / "table"))
+
+
+def test_corpus_without_ngrams_of_the_alphabet_is_rejected(tmp_path):
+    (tmp_path / "digits.txt").write_text("1234 5678")
+    with pytest.raises(breaker.ScoreTableError, match="no 4-letter sequence"):
+        breaker.train_score_table([str(tmp_path / "digits.txt")], str(tmp_path / "table"))
+
+
+def test_command_line_reports_a_mismatched_table(dictionary, corpus, tmp_path):
+    table_path = breaker.train_score_table([corpus], str(tmp_path / "table"), order=3)
+    ciphertext = tmp_path / "ciphertext.txt"
+    ciphertext.write_text(ENGLISH_TEXT)
+    result = subprocess.run([sys.executable, breaker.__file__, "mono", str(ciphertext), "-d", dictionary,
+                             "--table", table_path, "--order", "4"], capture_output=True, text=True, cwd=tmp_path)
+    assert result.returncode == 2
+    assert "was trained for the alphabet" in result.stderr
+    assert "Traceback" not in result.stderr
@@ -0,0 +1,49 @@
+import importlib
+import random
+
+import pytest
+
+breaker = importlib.import_module("break")
+
+DICTIONARY = {"the", "free", "software", "share", "change", "works"}
+
+
+def write_chunks(chunks, tmp_path):
+    path = tmp_path / "validated.txt"
+    ratio = breaker.write_validated_chunks(chunks, str(path), DICTIONARY)
+    return path.read_text(), ratio
+
+
+def split(text, rng):
+    cuts = sorted(rng.sample(range(1, len(text)), 12))
+    return [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+
+
+@pytest.mark.parametrize("text", [
+    "The free software, to share and change the works. Freedom is not price!",
+    "the,free.software!share?change-works'the.xyzzy,free" * 8,
+    "share.the.works.and.change.them" * 10 + " free",
+])
+def test_chunks_are_redacted_like_the_whole_text(text, tmp_path):
+    rng = random.Random(text)
+    validated, found, checked = breaker.redact_counts(text, DICTIONARY)
+    for trial in range(20):
+        assert write_chunks(split(text, rng), tmp_path) == (validated, found / checked)
+
+
+@pytest.mark.parametrize("letters, written, ratio", [
+    ("xy", breaker.REDACTED, 0.75),
+    ("1x", "1" * 1000 + "x" * 50000, 1.0),
+])
+def test_word_without_end_is_not_carried_along(letters, written, ratio, tmp_path, monkeypatch):
+    redacted = []
+    redact_counts = breaker.redact_counts
+
+    def record(text, dictionary):
+        redacted.append(len(text))
+        return redact_counts(text, dictionary)
+
+    monkeypatch.setattr(breaker, "redact_counts", record)
+    chunks = ["free " + letters[0] * 1000] + [letters[1] * 1000] * 50 + [".works share"]
+    assert write_chunks(chunks, tmp_path) == ("free " + written + ".works share", ratio)
+    assert max(redacted) <= 1000 + len("free ")